@@ -0,0 +1,185 @@
+'''
+CPU opponent for training mode: an AIController writes its player's Inputs, choosing them by searching
+a few actions ahead on a private headless copy of the GameState.
+
+An action is a short sequence of button bitmasks built from the Character's data: standing still, walking
+forward or back (which also blocks), each button move, and each motion command's inputs. The search
+tries every sequence of actions up to some depth against each of a few guesses at what the opponent does
+(by default, keep holding whatever they hold now), keeping the worst case for each (maximin),
+and scores the resulting states with evaluate().
+
+Searching deeper multiplies the work by the number of actions, so the search is iterative deepening
+under a time budget: depth 1, then 2, and so on, until the budget runs out, using the deepest depth it
+finished. Work is done in batches (all actions tried from one saved search node) with the budget checked
+between them, so a faster CPU searches deeper within the same frame time.
+
+The live GameState is only read (saveState()), never simulated, so rendering, collision boxes and
+profiling of the real match are unaffected by searching.
+'''
+from __future__ import annotations
+import time
+from collections import deque
+
+import inputs
+import motion
+from gamestate import GameState, GameStateSnapshot
+from profiler import profiler
+
+# Score of one point of HP difference; evaluate() also rewards stun advantage and staying in range
+HP_WEIGHT = 1.0
+STUN_WEIGHT = 0.1
+DISTANCE_WEIGHT = 0.01
+# Horizontal distance the AI tries to keep from the opponent, in pixels
+PREFERRED_RANGE = 80
+
+class SearchTimeout(Exception):
+    pass
+
+class AIController():
+    def __init__(self, gameState: GameState, player: str = "P2", time_budget: float = 0.012, max_depth: int = 4,
+                 action_frames: int = 6, opponent_replies: tuple[int | None, ...] = (None,)) -> None:
+        '''
+        time_budget is about the most seconds to search for, each time an action is chosen
+        (the default leaves room to render at 60 fps on the frames that search).
+        Actions are padded (by holding their last buttons) to at least action_frames frames.
+        opponent_replies are the bitmasks the opponent is assumed to hold during each action, None meaning
+        whatever they hold now; more replies make the AI more cautious, and the search slower.
+        '''
+        self.gameState = gameState
+        self.player = player
+        self.opponent = next(other for other in gameState.characters if other != player)
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.action_frames = action_frames
+        self.opponent_replies = opponent_replies
+
+        # Simulated in place of the live GameState, with its own InputHistories
+        self.searchState = GameState({other: inputs.InputHistory(other) for other in gameState.inputHistories},
+                                     headless=True, fixed_point_timer=gameState.fixed_point_timer,
+                                     characterPaths={other: character.dataPath for (other, character) in gameState.characters.items()})
+        # Preallocated search nodes, indexed by depth (0 is the live state being searched from)
+        self.snapshots = [GameStateSnapshot(gameState) for _ in range(max_depth + 1)]
+        # Actions as seen facing right and facing left, indexed by facingLeft
+        data = gameState.characters[player].data
+        self.actions = (self.createActions(data, False), self.createActions(data, True))
+
+        # Button bitmasks still to be input, one per frame, of the action chosen by the latest search
+        self.plan: deque[int] = deque()
+        # Statistics of the latest search: depth finished, actions simulated and seconds taken
+        self.depth = 0
+        self.simulated = 0
+        self.search_time = 0.0
+
+    def createActions(self, data, facingLeft: bool) -> list[tuple[int, ...]]:
+        '''
+        Takes a Character's CharacterData and facing, and returns the button bitmasks of each action, one per frame.
+        Charge commands are left out, since holding a charge takes longer than the search looks ahead.
+        '''
+        numpad_bits = {numpad: bits for (bits, numpad) in motion.NUMPAD_TABLES[facingLeft].items()}
+        forward = numpad_bits[6]
+        back = numpad_bits[4]
+        actions = [(0,), (forward,), (back,)]
+        for buttons in data.moveButtons:
+            if buttons and (buttons,) not in actions:
+                actions.append((buttons,))
+        for command in data.commands.commands:
+            if command.charge is None:
+                action = [numpad_bits[direction] for direction in command.directions]
+                action[-1] = action[-1] | command.buttons
+                actions.append(tuple(action))
+        return [action + (action[-1],) * (self.action_frames - len(action)) for action in actions]
+
+    def update(self) -> inputs.Input:
+        '''
+        Appends the AI player's Input for gameState.current_frame to their InputHistory, searching for
+        the next action first if the last one has been input, and returns it.
+        Call once per simulation step, before gameState.update().
+        '''
+        if len(self.plan) == 0:
+            self.plan.extend(self.search())
+        frame = self.gameState.current_frame
+        frame_input = inputs.Input(self.plan.popleft(), frame, frame + 1)
+        self.gameState.inputHistories[self.player].append(frame_input)
+        return frame_input
+
+    def search(self) -> tuple[int, ...]:
+        '''
+        Returns the action with the best worst case score, searching as deep as time_budget allows.
+        '''
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+        profiling = profiler.enabled
+        profiler.begin("ai")
+        profiler.enabled = False
+
+        root = self.gameState.saveState(self.snapshots[0])
+        actions = self.actions[self.gameState.characters[self.player].facingLeft]
+        opponent_inputs = self.gameState.inputHistories[self.opponent].inputs
+        opponent_bits = opponent_inputs[-1].bits if len(opponent_inputs) > 0 else 0
+        replies = [opponent_bits if reply is None else reply for reply in self.opponent_replies]
+
+        best = actions[0]
+        self.depth = 0
+        self.simulated = 0
+        try:
+            for depth in range(1, self.max_depth + 1):
+                values = self.expand(0, depth, actions, replies, deadline)
+                best = actions[values.index(max(values))]
+                self.depth = depth
+        except SearchTimeout:
+            pass
+        finally:
+            # Also undoes the search's changes to the newest live Inputs, which the search histories share
+            self.searchState.loadState(root)
+            profiler.enabled = profiling
+            profiler.end("ai")
+        self.search_time = time.perf_counter() - start
+        return best
+
+    def expand(self, depth: int, remaining: int, actions: list[tuple[int, ...]], replies: list[int],
+               deadline: float) -> list[float]:
+        '''
+        Tries every action from the search node at depth, against every reply, as one batch,
+        and returns each action's worst score, searching remaining - 1 more actions deep after each.
+        Raises SearchTimeout if the deadline has passed.
+        '''
+        if time.perf_counter() > deadline:
+            raise SearchTimeout()
+        node = self.snapshots[depth]
+        searchState = self.searchState
+        values = []
+        for action in actions:
+            worst = float("inf")
+            for reply in replies:
+                searchState.loadState(node)
+                self.simulate(action, reply)
+                if remaining <= 1 or searchState.isRoundOver():
+                    value = self.evaluate(searchState)
+                else:
+                    searchState.saveState(self.snapshots[depth + 1])
+                    value = max(self.expand(depth + 1, remaining - 1, actions, replies, deadline))
+                worst = min(worst, value)
+            values.append(worst)
+        return values
+
+    def simulate(self, action: tuple[int, ...], opponent_bits: int) -> None:
+        searchState = self.searchState
+        history = searchState.inputHistories[self.player]
+        opponent_history = searchState.inputHistories[self.opponent]
+        for bits in action:
+            frame = searchState.current_frame
+            history.append(inputs.Input(bits, frame, frame + 1))
+            opponent_history.append(inputs.Input(opponent_bits, frame, frame + 1))
+            searchState.update()
+        self.simulated = self.simulated + 1
+
+    def evaluate(self, gameState: GameState) -> float:
+        '''
+        Returns how good gameState is for the AI player: mostly the HP difference,
+        then being less stunned than the opponent, then being near PREFERRED_RANGE.
+        '''
+        character = gameState.characters[self.player]
+        opponent = gameState.characters[self.opponent]
+        return (HP_WEIGHT * (character.hp - opponent.hp)
+                + STUN_WEIGHT * (opponent.stun - character.stun)
+                - DISTANCE_WEIGHT * abs(abs(character.xpos - opponent.xpos) - PREFERRED_RANGE))
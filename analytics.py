@@ -0,0 +1,387 @@
+'''
+Offline analytics over large sets of replays (see replay.py), e.g. a whole tournament's, such as:
+
+    python analytics.py replays/ --query held-back --player P1
+    python analytics.py replays/ --query latency
+    python analytics.py replays/ --query combinations --workers 0
+
+Replays only hold inputs, so each replay is played back headlessly once into a frame index:
+a file of per-frame columns for each player (the button bitmask held, and each Character's state after the frame),
+plus the replay's latency records. Indexes are cached in constants.REPLAY_INDEX_DIR, and only rebuilt
+when their replay's size or modification time changes.
+
+Queries memory-map the indexes and scan whole columns at once with loops that run in C (bytes.translate(),
+map() over operator functions, itertools.compress(), Counter, and bitwise operations on masks packed into ints),
+rather than creating Python objects per frame. A mask is bytes with a 0 or 1 per frame.
+'''
+from __future__ import annotations
+import argparse
+import mmap
+import multiprocessing
+import operator
+import os
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+from itertools import compress, repeat
+from typing import Iterable, Iterator, Sequence
+
+import constants
+import file_cache
+import inputs
+import replay
+import simulation
+from inputs import Button
+from replay import ReplayError
+
+INDEX_MAGIC = b"FGIX"
+# Bumped whenever COLUMNS or the layout changes, so old indexes are rebuilt
+INDEX_VERSION = 1
+
+# magic, index version, replay version, replay size, replay modification time (ns), frame count, player count, latency count
+INDEX_HEADER = struct.Struct("<4sHHQqIBxxxI4x")
+# Columns of each player, in file order: name and array typecode. Values are native endian,
+# since indexes are a local cache rather than something to share between machines.
+COLUMNS = (("bits", 'I'), ("xpos", 'i'), ("ypos", 'i'), ("hp", 'i'), ("facingLeft", 'B'),
+           ("move", 'h'), ("moveFrame", 'H'), ("moveHit", 'B'), ("stun", 'H'))
+# Every column starts at a multiple of this many bytes
+COLUMN_ALIGNMENT = 8
+
+# Button bits that aren't directions, for buttonCombinations()
+ATTACK_BITS = inputs.ALL_BUTTON_BITS & ~inputs.DIRECTION_BITS
+
+getCharacterState = operator.attrgetter(*(name for (name, _) in COLUMNS[1:]))
+
+def alignColumn(offset: int) -> int:
+    return -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+
+def getIndexPath(path: str, index_dir: str) -> str:
+    return file_cache.getCachePath(path, index_dir, ".fidx")
+
+def isIndexCurrent(index_path: str, replay_path: str) -> bool:
+    '''
+    Returns whether the index at index_path exists and was built from the replay as it is now.
+    '''
+    try:
+        with open(index_path, "rb") as file:
+            header = file.read(INDEX_HEADER.size)
+        stat = os.stat(replay_path)
+    except OSError:
+        return False
+    if len(header) < INDEX_HEADER.size:
+        return False
+    (magic, version, replay_version, size, mtime, _, _, _) = INDEX_HEADER.unpack(header)
+    return (magic == INDEX_MAGIC and version == INDEX_VERSION and replay_version == replay.VERSION
+            and size == stat.st_size and mtime == stat.st_mtime_ns)
+
+def buildIndex(replay_path: str, index_path: str) -> int:
+    '''
+    Plays the replay at replay_path back, and writes its frame index to index_path. Returns the number of frames.
+    Raises ReplayError if the replay can't be read, or desyncs on playback (its columns would be wrong).
+    '''
+    stat = os.stat(replay_path)
+    gameState = simulation.createHeadlessGame()
+    characters = list(gameState.characters.values())
+    histories = list(gameState.inputHistories.values())
+    columns = [[array(typecode) for (_, typecode) in COLUMNS] for _ in characters]
+    with replay.ReplayReader(replay_path) as reader:
+        player = replay.ReplayPlayer(reader, gameState)
+        while player.step():
+            for (character, inputHistory, playerColumns) in zip(characters, histories, columns):
+                playerColumns[0].append(inputHistory.inputs[-1].bits)
+                for (column, value) in zip(playerColumns[1:], getCharacterState(character)):
+                    column.append(value)
+        if player.desyncDetector.isDesynced():
+            raise ReplayError(f"{replay_path} desynced on playback at frame {player.desyncDetector.first_desync_frame}")
+        latencies = array('I', (record[5] for record in reader.iterRecords() if record[0] == replay.RECORD_LATENCY))
+
+    frame_count = gameState.current_frame
+    with file_cache.writeAtomically(index_path) as file:
+        file.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, replay.VERSION, stat.st_size, stat.st_mtime_ns,
+                                     frame_count, len(characters), len(latencies)))
+        for column in [column for playerColumns in columns for column in playerColumns] + [latencies]:
+            file.write(column.tobytes())
+            file.write(bytes(alignColumn(file.tell()) - file.tell()))
+    return frame_count
+
+def _buildIndex(paths: tuple[str, str]) -> str:
+    '''
+    Worker process side of ReplayDataset.buildIndexes().
+    '''
+    buildIndex(*paths)
+    return paths[0]
+
+class FrameIndex():
+    '''
+    Memory-mapped frame index of one replay. Columns are memoryviews of the mapping, only paged in as they are scanned.
+    '''
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ReplayError(f"{path} is empty")
+        # Views handed out by column(), released on close() since the mapping can't be closed while they exist
+        self.views: list[memoryview] = []
+
+        if len(self.data) < INDEX_HEADER.size:
+            self.close()
+            raise ReplayError(f"{path} is too short to be a frame index")
+        (magic, version, _, _, _, self.frame_count, self.player_count, self.latency_count) = INDEX_HEADER.unpack_from(self.data)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ReplayError(f"{path} is not a version {INDEX_VERSION} frame index")
+
+        # (offset, typecode) of each player's columns by name, then the latencies
+        self.columns: list[dict[str, tuple[int, str]]] = []
+        offset = INDEX_HEADER.size
+        for _ in range(self.player_count):
+            playerColumns = {}
+            for (name, typecode) in COLUMNS:
+                offset = alignColumn(offset)
+                playerColumns[name] = (offset, typecode)
+                offset = offset + self.frame_count * array(typecode).itemsize
+            self.columns.append(playerColumns)
+        self.latencyOffset = alignColumn(offset)
+        if self.latencyOffset + self.latency_count * array('I').itemsize > len(self.data):
+            self.close()
+            raise ReplayError(f"{path} is truncated")
+
+    def __enter__(self) -> FrameIndex:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def getView(self, offset: int, typecode: str, count: int) -> memoryview:
+        view = memoryview(self.data)[offset:offset + count * array(typecode).itemsize].cast(typecode)
+        self.views.append(view)
+        return view
+
+    def column(self, player: str, name: str) -> memoryview:
+        '''
+        Takes a player ("P1", "P2", ...) and a column name from COLUMNS,
+        and returns that column's values, indexed by frame.
+        '''
+        (offset, typecode) = self.columns[simulation.PLAYERS.index(player)][name]
+        return self.getView(offset, typecode, self.frame_count)
+
+    def latencies(self) -> memoryview:
+        '''
+        Returns the replay's latency records (see replay.RECORD_LATENCY), in microseconds.
+        '''
+        return self.getView(self.latencyOffset, 'I', self.latency_count)
+
+    def close(self) -> None:
+        for view in self.views:
+            view.release()
+        self.views.clear()
+        self.data.close()
+        self.file.close()
+
+# Masks
+
+def orMasks(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, "little") | int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+def andMasks(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, "little") & int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+NOT_TABLE = bytes([1, 0]) + bytes(254)
+
+def notMask(mask: bytes) -> bytes:
+    return mask.translate(NOT_TABLE)
+
+def heldMask(bits: memoryview, buttons: int) -> bytes:
+    '''
+    Takes a bits column and a button bitmask, and returns a mask of the frames any of those buttons were held on.
+    Each byte of the bitmasks is tested separately with a lookup table.
+    '''
+    itemsize = bits.itemsize
+    raw = bits.cast('B')
+    mask = bytes(len(bits))
+    for byte in range(itemsize):
+        byte_buttons = (buttons >> (8 * byte)) & 0xFF
+        if byte_buttons != 0:
+            offset = byte if sys.byteorder == "little" else itemsize - 1 - byte
+            table = bytes(int(value & byte_buttons != 0) for value in range(256))
+            mask = orMasks(mask, bytes(raw[offset::itemsize]).translate(table))
+    raw.release()
+    return mask
+
+def decreasedMask(column: Sequence[int]) -> bytes:
+    '''
+    Returns a mask of the frames column's value is lower on than on the frame before (never the first frame).
+    '''
+    if len(column) == 0:
+        return b""
+    return b"\x00" + bytes(map(operator.lt, column[1:], column[:-1]))
+
+def changedMask(column: Sequence[int]) -> bytes:
+    '''
+    Returns a mask of the frames column's value differs on from the frame before (always the first frame).
+    '''
+    if len(column) == 0:
+        return b""
+    return b"\x01" + bytes(map(operator.ne, column[1:], column[:-1]))
+
+def maskFrames(mask: bytes) -> list[int]:
+    return [match.start() for match in re.finditer(b"\x01", mask)]
+
+# Queries of one replay
+
+def heldBackWhileLosingHp(index: FrameIndex, player: str) -> list[int]:
+    '''
+    Returns the frames player lost HP on while holding back (away from the opponent, as faced going into the frame).
+    '''
+    bits = index.column(player, "bits")
+    facingLeft = bytes(index.column(player, "facingLeft"))
+    # Facing as of the end of the frame before, when the frame's inputs were read
+    facingLeft = facingLeft[:1] + facingLeft[:-1]
+    back = orMasks(andMasks(heldMask(bits, Button.LEFT.bit), notMask(facingLeft)),
+                   andMasks(heldMask(bits, Button.RIGHT.bit), facingLeft))
+    return maskFrames(andMasks(back, decreasedMask(index.column(player, "hp"))))
+
+def buttonCombinations(index: FrameIndex, player: str, buttons: int = ATTACK_BITS) -> Counter[int]:
+    '''
+    Counts how many times player pressed each combination of buttons (only looking at the given button bits),
+    i.e. how many frames each combination started being held on. Frames holding none of them aren't counted.
+    '''
+    bits = index.column(player, "bits")
+    held = array('I', map(operator.and_, bits, repeat(buttons, len(bits))))
+    combinations = Counter(compress(held, changedMask(held)))
+    del combinations[0]
+    return combinations
+
+def latencyHistogram(index: FrameIndex, bucket: int = 1000) -> Counter[int]:
+    '''
+    Counts the replay's latency records by bucket microseconds: {0: under bucket, 1: bucket to 2 * bucket, ...}.
+    '''
+    return Counter(map(operator.floordiv, index.latencies(), repeat(bucket)))
+
+def histogramPercentile(histogram: Counter[int], percent: float) -> int:
+    '''
+    Returns the bucket that percent % of histogram's counts are in or below (0 if it is empty).
+    '''
+    target = sum(histogram.values()) * percent / 100
+    total = 0
+    for bucket in sorted(histogram):
+        total = total + histogram[bucket]
+        if total >= target:
+            return bucket
+    return 0
+
+def formatCombination(bits: int) -> str:
+    buttons = inputs.ButtonsView(bits)
+    return f"{inputs.directionsToArrow(buttons)} {inputs.attackButtonsToLetters(buttons)}".strip()
+
+class ReplayDataset():
+    '''
+    A set of replays to query together, with their frame indexes cached in index_dir.
+    '''
+    def __init__(self, paths: Iterable[str], index_dir: str = constants.REPLAY_INDEX_DIR) -> None:
+        self.paths = list(paths)
+        self.index_dir = index_dir
+
+    def buildIndexes(self, workers: int | None = 1) -> int:
+        '''
+        Builds the frame indexes that are missing or outdated, over a pool of worker processes
+        (default: in this process; None for one per core), and returns how many were built.
+        '''
+        stale = [(path, getIndexPath(path, self.index_dir)) for path in self.paths
+                 if not isIndexCurrent(getIndexPath(path, self.index_dir), path)]
+        if workers == 1:
+            for paths in stale:
+                _buildIndex(paths)
+        elif len(stale) > 0:
+            with multiprocessing.Pool(workers) as pool:
+                for _ in pool.imap_unordered(_buildIndex, stale):
+                    pass
+        return len(stale)
+
+    def iterIndexes(self) -> Iterator[tuple[str, FrameIndex]]:
+        '''
+        Yields each replay's path and open FrameIndex (closed once the next is yielded), building outdated indexes first.
+        '''
+        self.buildIndexes()
+        for path in self.paths:
+            with FrameIndex(getIndexPath(path, self.index_dir)) as index:
+                yield (path, index)
+
+    def heldBackWhileLosingHp(self, player: str) -> dict[str, list[int]]:
+        '''
+        Returns the frames found by heldBackWhileLosingHp() in each replay that has any.
+        '''
+        results = {}
+        for (path, index) in self.iterIndexes():
+            frames = heldBackWhileLosingHp(index, player)
+            if len(frames) > 0:
+                results[path] = frames
+        return results
+
+    def buttonCombinations(self, players: Sequence[str] = simulation.PLAYERS, buttons: int = ATTACK_BITS) -> Counter[int]:
+        combinations: Counter[int] = Counter()
+        for (_, index) in self.iterIndexes():
+            for player in players:
+                combinations.update(buttonCombinations(index, player, buttons))
+        return combinations
+
+    def latencyHistogram(self, bucket: int = 1000) -> Counter[int]:
+        histogram: Counter[int] = Counter()
+        for (_, index) in self.iterIndexes():
+            histogram.update(latencyHistogram(index, bucket))
+        return histogram
+
+def findReplays(paths: Iterable[str]) -> list[str]:
+    '''
+    Takes replay files and folders, and returns the replay files, including every .fgrp file in the folders.
+    '''
+    replays = []
+    for path in paths:
+        if os.path.isdir(path):
+            for (folder, _, files) in sorted(os.walk(path)):
+                replays.extend(os.path.join(folder, file) for file in sorted(files) if file.endswith(".fgrp"))
+        else:
+            replays.append(path)
+    return replays
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Query recorded replays, e.g. a tournament's.")
+    parser.add_argument("replays", nargs="+", help="replay files, or folders of .fgrp replay files")
+    parser.add_argument("--query", choices=("held-back", "latency", "combinations"), default="combinations")
+    parser.add_argument("--player", choices=simulation.PLAYERS, default=None, help="player to query (default: both)")
+    parser.add_argument("--top", type=int, default=10, help="number of combinations to list")
+    parser.add_argument("--bucket", type=float, default=1.0, help="latency histogram bucket size in milliseconds")
+    parser.add_argument("--index-dir", default=constants.REPLAY_INDEX_DIR)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes building indexes (0 for one per core, 1 to build in this process)")
+    args = parser.parse_args(argv)
+
+    dataset = ReplayDataset(findReplays(args.replays), args.index_dir)
+    built = dataset.buildIndexes(args.workers or None)
+    print(f"{len(dataset.paths)} replays ({built} indexed)")
+    players = simulation.PLAYERS if args.player is None else (args.player,)
+
+    if args.query == "held-back":
+        for player in players:
+            results = dataset.heldBackWhileLosingHp(player)
+            print(f"{player} lost HP while holding back on {sum(len(frames) for frames in results.values())} frames:")
+            for (path, frames) in results.items():
+                print(f"  {path}: {', '.join(str(frame) for frame in frames)}")
+    elif args.query == "latency":
+        bucket = max(1, round(args.bucket * 1000))
+        histogram = dataset.latencyHistogram(bucket)
+        print(f"{sum(histogram.values())} key events, median {histogramPercentile(histogram, 50) * bucket / 1000:g}ms, "
+              f"99th percentile {histogramPercentile(histogram, 99) * bucket / 1000:g}ms")
+        for value in sorted(histogram):
+            print(f"  {value * bucket / 1000:g}ms: {histogram[value]}")
+    else:
+        combinations = dataset.buttonCombinations(players)
+        for (bits, count) in combinations.most_common(args.top):
+            print(f"  {formatCombination(bits):>8} {count}")
+
+if __name__ == "__main__":
+    main()
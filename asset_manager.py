@@ -0,0 +1,209 @@
+from __future__ import annotations
+import json
+import os
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+import pygame as pg
+
+import constants
+
+class AssetManager():
+    '''
+    Shared cache of loaded images and surfaces derived from them,
+    so each file is loaded (and flipped) once no matter how many Characters use it,
+    instead of every frame or every Character.
+    '''
+    def __init__(self, max_derived: int = 128, max_texts: int = 512,
+                 font_cache_path: str | None = constants.FONT_CACHE_PATH) -> None:
+        # Images by path, and their horizontally flipped versions (for facing left)
+        self.images: dict[str, pg.Surface] = {}
+        self.flippedImages: dict[str, pg.Surface] = {}
+        # Images read from disk by preloadImages() (possibly on another thread), not converted for the display yet.
+        # getImage() finishes loading them on first use.
+        self.preloadedImages: dict[str, pg.Surface] = {}
+
+        # Least recently used first. Unlike images, derived surfaces can be created from arbitrary
+        # parameters (e.g. any scale), so they are capped at max_derived to bound memory.
+        self.derived: OrderedDict[Hashable, pg.Surface] = OrderedDict()
+        self.max_derived = max_derived
+
+        # Fonts by (path or system font name, size). Font objects are hashable, so they key self.texts directly.
+        self.fonts: dict[tuple[str, str, int], pg.font.Font] = {}
+        # Rendered text surfaces by (font, text, colour), least recently used first, capped at max_texts.
+        # HUD and input history strings repeat a lot from frame to frame, so most renders become lookups.
+        self.texts: OrderedDict[tuple[pg.font.Font, str, tuple[int, int, int]], pg.Surface] = OrderedDict()
+        self.max_texts = max_texts
+        # Font file paths by system font name (None for pygame's default font), loaded from and saved to
+        # font_cache_path (if not None), since finding them means scanning every font installed
+        self.sysFontPaths: dict[str, str | None] | None = None
+        self.font_cache_path = font_cache_path
+
+    def getImage(self, path: str) -> pg.Surface:
+        '''
+        Takes an image path, and returns the image, loading it on first use.
+        '''
+        image = self.images.get(path)
+        if image is None:
+            image = self.preloadedImages.pop(path, None)
+            if image is None:
+                image = pg.image.load(path)
+            # convert_alpha() needs a display; without one (e.g. offscreen rendering), use the image as loaded
+            if pg.display.get_surface() is not None:
+                image = image.convert_alpha()
+            self.images[path] = image
+            self.flippedImages[path] = pg.transform.flip(image, True, False)
+        return image
+
+    def getFlippedImage(self, path: str) -> pg.Surface:
+        '''
+        Takes an image path, and returns the image flipped horizontally.
+        '''
+        flipped = self.flippedImages.get(path)
+        if flipped is None:
+            self.getImage(path)
+            flipped = self.flippedImages[path]
+        return flipped
+
+    def loadCharacterSprites(self, paths: Iterable[str]) -> None:
+        '''
+        Loads all of a Character's sprites (and their flipped versions) up front,
+        so nothing is loaded from disk mid-match.
+        '''
+        for path in paths:
+            self.getImage(path)
+
+    def preloadImages(self, paths: Iterable[str]) -> None:
+        '''
+        Reads images from disk without touching the display, so it can be called from a loading thread
+        while the main thread keeps drawing; getImage() then only has to convert them.
+        '''
+        for path in paths:
+            if path not in self.images and path not in self.preloadedImages:
+                self.preloadedImages[path] = pg.image.load(path)
+
+    def getDerived(self, key: Hashable, create: Callable[[], pg.Surface]) -> pg.Surface:
+        '''
+        Takes a key and a function creating a surface,
+        and returns the cached surface for key, calling create() on a cache miss.
+        The least recently used surface is evicted once there are more than max_derived.
+        '''
+        surface = self.derived.get(key)
+        if surface is not None:
+            self.derived.move_to_end(key)
+            return surface
+
+        surface = create()
+        self.derived[key] = surface
+        if len(self.derived) > self.max_derived:
+            self.derived.popitem(last=False)
+        return surface
+
+    def getScaledImage(self, path: str, size: tuple[int, int], flipped: bool = False) -> pg.Surface:
+        '''
+        Takes an image path, and returns the image (flipped if flipped is True) scaled to size.
+        '''
+        image = self.getFlippedImage(path) if flipped else self.getImage(path)
+        return self.getDerived(("scaled", path, size, flipped), lambda: pg.transform.smoothscale(image, size))
+
+    def getTintedImage(self, path: str, colour: tuple[int, int, int], flipped: bool = False) -> pg.Surface:
+        '''
+        Takes an image path, and returns the image (flipped if flipped is True) multiplied by colour,
+        e.g. for hit flashes or palette swaps.
+        '''
+        image = self.getFlippedImage(path) if flipped else self.getImage(path)
+
+        def tint() -> pg.Surface:
+            tinted = image.copy()
+            tinted.fill(colour, special_flags=pg.BLEND_RGB_MULT)
+            return tinted
+
+        return self.getDerived(("tinted", path, colour, flipped), tint)
+
+    def getFont(self, path: str, size: int) -> pg.font.Font:
+        '''
+        Takes a font file path and size, and returns the Font, loading it on first use.
+        '''
+        key = ("file", path, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pg.font.get_init():
+                pg.font.init()
+            font = pg.font.Font(path, size)
+            self.fonts[key] = font
+        return font
+
+    def getSysFont(self, name: str, size: int) -> pg.font.Font:
+        '''
+        Like getFont(), but for a system font name (see pygame.font.SysFont), falling back to pygame's default font.
+        '''
+        key = ("system", name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pg.font.get_init():
+                pg.font.init()
+            font = pg.font.Font(self.findSysFont(name), size)
+            self.fonts[key] = font
+        return font
+
+    def findSysFont(self, name: str) -> str | None:
+        '''
+        Takes a system font name, and returns its font file path, or None if it isn't installed.
+        pygame.font.match_font() lists every installed font the first time it is called, which can take
+        a good part of a second, so the results are kept in font_cache_path for the next startup.
+        '''
+        if self.sysFontPaths is None:
+            self.sysFontPaths = self.readFontCache()
+        if name in self.sysFontPaths:
+            path = self.sysFontPaths[name]
+            # Fonts can be uninstalled between runs
+            if path is None or os.path.exists(path):
+                return path
+
+        path = pg.font.match_font(name)
+        self.sysFontPaths[name] = path
+        if self.font_cache_path is not None:
+            try:
+                with open(self.font_cache_path, "w") as file:
+                    json.dump(self.sysFontPaths, file, indent=1)
+            except OSError:
+                pass
+        return path
+
+    def readFontCache(self) -> dict[str, str | None]:
+        if self.font_cache_path is None:
+            return {}
+        try:
+            with open(self.font_cache_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def renderText(self, font: pg.font.Font, text: str, colour: tuple[int, int, int]) -> pg.Surface:
+        '''
+        Takes a Font, string and colour, and returns the antialiased text surface,
+        only rendering it if it isn't cached already.
+        The returned surface is shared, so it must not be drawn on.
+        '''
+        key = (font, text, colour)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            return surface
+
+        surface = font.render(text, True, colour)
+        self.texts[key] = surface
+        if len(self.texts) > self.max_texts:
+            self.texts.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        self.images.clear()
+        self.flippedImages.clear()
+        self.preloadedImages.clear()
+        self.derived.clear()
+        self.fonts.clear()
+        self.texts.clear()
+
+# Shared by everything that renders
+assetManager = AssetManager()
@@ -0,0 +1,258 @@
+'''
+Benchmarks of the game's hot paths: InputHistory, keyboard polling, headless simulation and rendering.
+
+Results can be saved as JSON and compared against a saved baseline, failing (exit status 1)
+if any benchmark got slower by more than the tolerance, e.g.:
+
+    python benchmark.py --output baseline.json
+    (make changes)
+    python benchmark.py --baseline baseline.json --tolerance 0.15
+
+Rendering benchmarks draw into an offscreen Surface, using SDL's dummy video driver if no display is set up.
+'''
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Sequence
+
+import constants
+import inputs
+import simulation
+
+# A benchmark's setup function returns a function that runs the benchmarked operation count times
+Runner = Callable[[int], None]
+BENCHMARKS: dict[str, Callable[[], Runner]] = {}
+
+def benchmark(name: str) -> Callable[[Callable[[], Runner]], Callable[[], Runner]]:
+    '''
+    Decorator registering a setup function in BENCHMARKS.
+    '''
+    def register(setup: Callable[[], Runner]) -> Callable[[], Runner]:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def initDisplay():
+    '''
+    Initializes pygame's display (offscreen if there is no real one) and fonts, for benchmarks that need them.
+    '''
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame as pg
+    if pg.display.get_surface() is None:
+        pg.display.init()
+        pg.font.init()
+        pg.display.set_mode((constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT))
+    return pg
+
+def randomBits(count: int, seed: int = 0) -> list[int]:
+    return simulation.randomScript(random.Random(seed), count)
+
+@benchmark("input_history_append")
+def benchInputHistoryAppend() -> Runner:
+    inputHistory = inputs.InputHistory("P1")
+    script = randomBits(4096)
+    frame = 0
+
+    def run(count: int) -> None:
+        nonlocal frame
+        append = inputHistory.append
+        for frame in range(frame, frame + count):
+            append(inputs.Input(script[frame & 4095], frame, frame + 1))
+        frame = frame + 1
+    return run
+
+@benchmark("get_frame_buttons")
+def benchGetFrameButtons() -> Runner:
+    inputHistory = inputs.InputHistory("P1")
+    script = randomBits(4096)
+    for frame in range(len(script)):
+        inputHistory.append(inputs.Input(script[frame], frame, frame + 1))
+    # Frames still covered by the InputHistory, mostly older ones (newest frame lookups are a fast path)
+    oldest = inputHistory.inputs[0].start_frame
+    frames = [oldest + i % (len(script) - oldest) for i in range(4096)]
+
+    def run(count: int) -> None:
+        getFrameButtons = inputHistory.getFrameButtons
+        for i in range(count):
+            getFrameButtons(frames[i & 4095])
+    return run
+
+@benchmark("keys_pressed_to_input")
+def benchKeysPressedToInput() -> Runner:
+    initDisplay()
+
+    def run(count: int) -> None:
+        for frame in range(count):
+            inputs.keysPressedToInput(frame, "P1")
+    return run
+
+@benchmark("keys_pressed_to_inputs")
+def benchKeysPressedToInputs() -> Runner:
+    initDisplay()
+
+    def run(count: int) -> None:
+        for frame in range(count):
+            inputs.keysPressedToInputs(frame)
+    return run
+
+@benchmark("gamestate_update_headless")
+def benchGameStateUpdate() -> Runner:
+    gameState = simulation.createHeadlessGame()
+    histories = list(gameState.inputHistories.values())
+    scripts = [randomBits(4096, seed) for seed in range(len(histories))]
+
+    def run(count: int) -> None:
+        for _ in range(count):
+            frame = gameState.current_frame
+            for (inputHistory, script) in zip(histories, scripts):
+                inputHistory.append(inputs.Input(script[frame & 4095], frame, frame + 1))
+            gameState.update()
+    return run
+
+@benchmark("render_offscreen")
+def benchRenderOffscreen() -> Runner:
+    pg = initDisplay()
+    from gamestate import GameState
+    inputHistories = {player: inputs.InputHistory(player) for player in simulation.PLAYERS}
+    gameState = GameState(inputHistories)
+    script = randomBits(64)
+    for frame in range(len(script)):
+        for inputHistory in inputHistories.values():
+            inputHistory.append(inputs.Input(script[frame], frame, frame + 1))
+        gameState.update()
+    surface = pg.Surface((constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT))
+
+    def run(count: int) -> None:
+        for _ in range(count):
+            surface.fill(constants.BLACK)
+            gameState.render(surface)
+            for inputHistory in inputHistories.values():
+                inputHistory.render(surface)
+    return run
+
+@benchmark("input_display_update")
+def benchInputDisplayUpdate() -> Runner:
+    initDisplay()
+    inputHistory = inputs.InputHistory("P1")
+    inputDisplay = inputs.InputDisplay(inputHistory, rows=120)
+    script = randomBits(4096)
+    frame = 0
+
+    def run(count: int) -> None:
+        nonlocal frame
+        append = inputHistory.append
+        update = inputDisplay.update
+        for frame in range(frame, frame + count):
+            append(inputs.Input(script[frame & 4095], frame, frame + 1))
+            update()
+        frame = frame + 1
+    return run
+
+def measure(setup: Callable[[], Runner], min_time: float = 0.2, repeat: int = 5) -> dict[str, float]:
+    '''
+    Times a benchmark, growing the number of operations per run until a run takes at least min_time seconds,
+    then timing repeat runs of that many operations.
+    Returns the best and median times per operation, and the best operations per second.
+    '''
+    run = setup()
+    count = 1
+    while True:
+        start = time.perf_counter()
+        run(count)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        # Aim a little past min_time, so the next try usually succeeds
+        count = count * 10 if elapsed <= 0 else max(count + 1, int(count * min_time * 1.2 / elapsed))
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(count)
+        times.append((time.perf_counter() - start) / count)
+    best = min(times)
+    return {
+        "operations": count,
+        "repeat": repeat,
+        "best_seconds": best,
+        "median_seconds": statistics.median(times),
+        "ops_per_second": 1 / best
+    }
+
+def runBenchmarks(names: Sequence[str] | None = None, min_time: float = 0.2, repeat: int = 5) -> dict:
+    '''
+    Runs the named benchmarks (default: all of them), and returns the results in the JSON output format.
+    '''
+    if names is None or len(names) == 0:
+        names = list(BENCHMARKS)
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "benchmarks": {name: measure(BENCHMARKS[name], min_time, repeat) for name in names}
+    }
+
+def compareResults(results: dict, baseline: dict, tolerance: float = 0.1) -> list[tuple[str, float]]:
+    '''
+    Returns (name, change) for every benchmark in both results and baseline that got more than tolerance slower,
+    where change is the relative increase in best time per operation (0.25 means 25% slower).
+    '''
+    regressions = []
+    for (name, result) in results["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            continue
+        change = result["best_seconds"] / base["best_seconds"] - 1
+        if change > tolerance:
+            regressions.append((name, change))
+    return regressions
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths.")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--output", help="file to write the results to, as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="how much slower than the baseline a benchmark may get before failing (0.1 = 10%%)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}")
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = runBenchmarks(args.names, args.min_time, args.repeat)
+    for (name, result) in results["benchmarks"].items():
+        line = f"{name:28} {result['ops_per_second']:>14,.0f} ops/s {result['best_seconds'] * 1e6:>10.3f} us/op"
+        if baseline is not None and name in baseline["benchmarks"]:
+            change = result["best_seconds"] / baseline["benchmarks"][name]["best_seconds"] - 1
+            line = line + f" {change:>+8.1%}"
+        print(line)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if baseline is not None:
+        regressions = compareResults(results, baseline, args.tolerance)
+        for (name, change) in regressions:
+            print(f"REGRESSION: {name} is {change:.1%} slower than the baseline", file=sys.stderr)
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
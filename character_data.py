@@ -0,0 +1,277 @@
+'''
+Character definitions: stats, moves, frame data and boxes, loaded from JSON files like assets/characters/guy.json.
+
+Definitions are compiled once into flat arrays indexed by move and frame (see CharacterData),
+so nothing is looked up in nested dicts during a match.
+The compiled form is cached on disk (constants.CHARACTER_CACHE_DIR), and only recompiled when the source file's hash changes.
+
+Format:
+
+    {
+        "name": "Guy",
+        "sprite": "assets/guy2.png",
+        "stats": {"maxHp": 200, "forwardWalkspeed": 10, "backwardWalkspeed": 5},
+        "hurtboxes": [box, ...],            hurtboxes while not doing a move
+        "moves": {
+            "5P": {
+                "button": "P",              started by newly pressing these buttons (motion.BUTTON_LETTERS), or
+                "command": "236P",          started by completing this motion.MotionCommand notation
+                "startup": 4, "active": 3, "recovery": 7,       in frames
+                "damage": 8, "hitstun": 12, "blockstun": 8,
+                "hitboxes": [box, ...],     default: none
+                "hurtboxes": [box, ...],    default: the character's hurtboxes on every frame of the move
+                "projectile": {             optional, doing the move's damage, hitstun and blockstun
+                    "frame": 12,            frame of the move it is spawned on
+                    "x": 60, "y": -120,     where, relative to the Character like a box
+                    "speed": 8, "lifetime": 90,     pixels forward per frame, frames until it disappears
+                    "hits": 1, "hitInterval": 0,    hits before it disappears, frames between hits
+                    "hitboxes": [box, ...]  relative to the projectile's position, without frames
+                }
+            }
+        }
+    }
+
+A box is {"x": ..., "y": ..., "width": ..., "height": ...} in pixels, relative to the Character's (xpos, ypos)
+(the midbottom of its sprite) while facing right, so y is negative above the ground.
+It may have "frames": [first, last], the 0-based frames of the move it is out on (inclusive).
+Hitboxes default to the move's active frames, and hurtboxes to all of its frames.
+'''
+from __future__ import annotations
+import hashlib
+import json
+import os
+import pickle
+from array import array
+
+import constants
+import file_cache
+import motion
+
+# Bumped whenever CharacterData's attributes change, so old caches are recompiled
+FORMAT_VERSION = 2
+
+# Values per box in the packed box arrays: x, y, width, height
+BOX_SIZE = 4
+
+class CharacterData():
+    '''
+    A compiled character definition.
+
+    Moves are numbered in the order they appear in the source file. Per-move values are arrays indexed by move number.
+    Per-frame values are arrays indexed by moveStart[move] + frame of the move.
+    Boxes are packed BOX_SIZE values each into hitboxes/hurtboxes, and each frame's boxes are
+    hitboxes[BOX_SIZE * frameHitboxStart[i]:BOX_SIZE * frameHitboxEnd[i]] (same for hurtboxes).
+    '''
+    def __init__(self, source_hash: str = "") -> None:
+        self.source_hash = source_hash
+        self.name = ""
+        self.sprite = ""
+        self.maxHp = 0
+        self.forwardWalkspeed = 0
+        self.backwardWalkspeed = 0
+
+        self.moveNames: list[str] = []
+        self.moveIndices: dict[str, int] = {}
+        # Buttons started by, 0 for moves started by a command
+        self.moveButtons = array('I')
+        # (move name, notation) of moves started by a command, compiled into self.commands
+        self.moveNotations: list[tuple[str, str]] = []
+        self.moveStart = array('I')
+        self.moveLength = array('H')
+        self.moveDamage = array('h')
+        self.moveHitstun = array('H')
+        self.moveBlockstun = array('H')
+        # Projectile of each move, frame -1 if it has none. Its hitboxes are numbered like frameHitboxStart/End.
+        self.moveProjectileFrame = array('h')
+        self.moveProjectileX = array('h')
+        self.moveProjectileY = array('h')
+        self.moveProjectileSpeed = array('h')
+        self.moveProjectileLifetime = array('H')
+        self.moveProjectileHits = array('H')
+        self.moveProjectileHitInterval = array('H')
+        self.moveProjectileBoxStart = array('I')
+        self.moveProjectileBoxEnd = array('I')
+
+        # 1 on each move's active frames
+        self.frameActive = array('B')
+        self.frameHitboxStart = array('I')
+        self.frameHitboxEnd = array('I')
+        self.frameHurtboxStart = array('I')
+        self.frameHurtboxEnd = array('I')
+        self.hitboxes = array('h')
+        self.hurtboxes = array('h')
+        # Hurtboxes while not doing a move
+        self.idleHurtboxStart = 0
+        self.idleHurtboxEnd = 0
+
+        self.commands = motion.CompiledCommands([])
+
+    def compileCommands(self) -> None:
+        '''
+        Builds self.commands from self.moveNotations. Not cached, since it is quick and the command tree holds objects.
+        '''
+        self.commands = motion.CompiledCommands([motion.MotionCommand(name, notation) for (name, notation) in self.moveNotations])
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state["commands"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.compileCommands()
+
+def compileCharacter(definition: dict, source_hash: str = "") -> CharacterData:
+    '''
+    Takes a parsed character definition, and returns it compiled. Throws a ValueError if it is invalid.
+    '''
+    data = CharacterData(source_hash)
+    try:
+        data.name = definition["name"]
+        data.sprite = definition["sprite"]
+        stats = definition["stats"]
+        data.maxHp = int(stats["maxHp"])
+        data.forwardWalkspeed = int(stats["forwardWalkspeed"])
+        data.backwardWalkspeed = int(stats["backwardWalkspeed"])
+    except KeyError as error:
+        raise ValueError(f"Character definition is missing {error}") from None
+
+    idle_hurtboxes = definition.get("hurtboxes", [])
+    data.idleHurtboxStart = len(data.hurtboxes) // BOX_SIZE
+    for box in idle_hurtboxes:
+        packBox(data.hurtboxes, box)
+    data.idleHurtboxEnd = len(data.hurtboxes) // BOX_SIZE
+
+    for (name, move) in definition.get("moves", {}).items():
+        compileMove(data, name, move, idle_hurtboxes)
+    data.compileCommands()
+    return data
+
+def compileMove(data: CharacterData, name: str, move: dict, idle_hurtboxes: list[dict]) -> None:
+    index = len(data.moveNames)
+    data.moveNames.append(name)
+    data.moveIndices[name] = index
+
+    buttons = 0
+    if "command" in move:
+        data.moveNotations.append((name, move["command"]))
+    elif "button" in move:
+        for letter in move["button"]:
+            if letter not in motion.BUTTON_LETTERS:
+                raise ValueError(f"Unknown button {letter!r} in move {name!r}")
+            buttons = buttons | motion.BUTTON_LETTERS[letter].bit
+    else:
+        raise ValueError(f"Move {name!r} has no button or command")
+    data.moveButtons.append(buttons)
+
+    try:
+        startup = int(move["startup"])
+        active = int(move["active"])
+        recovery = int(move["recovery"])
+    except KeyError as error:
+        raise ValueError(f"Move {name!r} is missing {error}") from None
+    length = startup + active + recovery
+    data.moveStart.append(len(data.frameActive))
+    data.moveLength.append(length)
+    data.moveDamage.append(int(move.get("damage", 0)))
+    data.moveHitstun.append(int(move.get("hitstun", 0)))
+    data.moveBlockstun.append(int(move.get("blockstun", 0)))
+
+    compileProjectile(data, name, move.get("projectile"), length)
+    
+    hitboxes = [(getBoxFrames(box, startup, startup + active - 1, name), box) for box in move.get("hitboxes", [])]
+    hurtboxes = [(getBoxFrames(box, 0, length - 1, name), box) for box in move.get("hurtboxes", idle_hurtboxes)]
+    for frame in range(length):
+        data.frameActive.append(1 if startup <= frame < startup + active else 0)
+        data.frameHitboxStart.append(len(data.hitboxes) // BOX_SIZE)
+        for ((first, last), box) in hitboxes:
+            if first <= frame <= last:
+                packBox(data.hitboxes, box)
+        data.frameHitboxEnd.append(len(data.hitboxes) // BOX_SIZE)
+
+        data.frameHurtboxStart.append(len(data.hurtboxes) // BOX_SIZE)
+        for ((first, last), box) in hurtboxes:
+            if first <= frame <= last:
+                packBox(data.hurtboxes, box)
+        data.frameHurtboxEnd.append(len(data.hurtboxes) // BOX_SIZE)
+
+def compileProjectile(data: CharacterData, move_name: str, projectile: dict | None, move_length: int) -> None:
+    if projectile is None:
+        for values in (data.moveProjectileX, data.moveProjectileY, data.moveProjectileSpeed, data.moveProjectileLifetime,
+                       data.moveProjectileHits, data.moveProjectileHitInterval):
+            values.append(0)
+        data.moveProjectileFrame.append(-1)
+        data.moveProjectileBoxStart.append(0)
+        data.moveProjectileBoxEnd.append(0)
+        return
+    
+    try:
+        frame = int(projectile["frame"])
+        data.moveProjectileX.append(int(projectile["x"]))
+        data.moveProjectileY.append(int(projectile["y"]))
+        data.moveProjectileSpeed.append(int(projectile["speed"]))
+        data.moveProjectileLifetime.append(int(projectile["lifetime"]))
+    except KeyError as error:
+        raise ValueError(f"Projectile of move {move_name!r} is missing {error}") from None
+    if not 0 <= frame < move_length:
+        raise ValueError(f"Projectile frame {frame} is outside move {move_name!r}")
+    data.moveProjectileFrame.append(frame)
+    data.moveProjectileHits.append(int(projectile.get("hits", 1)))
+    data.moveProjectileHitInterval.append(int(projectile.get("hitInterval", 0)))
+    data.moveProjectileBoxStart.append(len(data.hitboxes) // BOX_SIZE)
+    for box in projectile.get("hitboxes", []):
+        packBox(data.hitboxes, box)
+    data.moveProjectileBoxEnd.append(len(data.hitboxes) // BOX_SIZE)
+
+def getBoxFrames(box: dict, default_first: int, default_last: int, move_name: str) -> tuple[int, int]:
+    if "frames" not in box:
+        return (default_first, default_last)
+    (first, last) = box["frames"]
+    if first > last:
+        raise ValueError(f"Box frames {box['frames']} of move {move_name!r} are backwards")
+    return (first, last)
+
+def packBox(boxes: array, box: dict) -> None:
+    try:
+        boxes.extend((box["x"], box["y"], box["width"], box["height"]))
+    except KeyError as error:
+        raise ValueError(f"Box {box} is missing {error}") from None
+
+def loadCharacterData(path: str, cache_dir: str | None = constants.CHARACTER_CACHE_DIR) -> CharacterData:
+    '''
+    Takes the path of a character definition, and returns it compiled,
+    from the cache in cache_dir if the definition hasn't changed since it was cached (None to skip caching).
+    '''
+    with open(path, "rb") as file:
+        source = file.read()
+    source_hash = hashlib.sha256(source).hexdigest()
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = file_cache.getCachePath(path, cache_dir, ".pickle")
+        try:
+            with open(cache_path, "rb") as file:
+                (version, cached_hash, data) = pickle.load(file)
+            if version == FORMAT_VERSION and cached_hash == source_hash:
+                return data
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            # Missing, unreadable or outdated caches are recompiled
+            pass
+
+    data = compileCharacter(json.loads(source), source_hash)
+    if cache_path is not None:
+        with file_cache.writeAtomically(cache_path) as file:
+            pickle.dump((FORMAT_VERSION, source_hash, data), file, pickle.HIGHEST_PROTOCOL)
+    return data
+
+# Compiled CharacterData by path, shared between every Character using it
+_loaded: dict[str, CharacterData] = {}
+
+def getCharacterData(path: str) -> CharacterData:
+    '''
+    Returns the CharacterData of path, only loading it (cached in constants.CHARACTER_CACHE_DIR) the first time.
+    '''
+    data = _loaded.get(path)
+    if data is None:
+        data = _loaded[path] = loadCharacterData(path, constants.CHARACTER_CACHE_DIR)
+    return data
@@ -0,0 +1,136 @@
+'''
+Hitbox/hurtbox collision detection.
+
+Every frame, GameState adds the boxes of every Character and projectile to a CollisionWorld,
+transformed to world space (and flipped for whoever faces left) and packed as (left, top, right, bottom) ints
+into one flat array per kind of box. Boxes are added in groups (one owner's hitboxes or hurtboxes),
+each with a bounding box.
+
+The broad phase sweeps the groups' bounding boxes along the x axis, so only groups that overlap
+and belong to different teams have their boxes tested against each other:
+Characters at opposite ends of the stage cost a sort and no box tests, however many boxes they have.
+'''
+from __future__ import annotations
+from array import array
+
+HIT = 0
+HURT = 1
+
+# Values per world space rect: left, top, right, bottom
+RECT_SIZE = 4
+
+class CollisionWorld():
+    def __init__(self) -> None:
+        # Indexed by kind (HIT or HURT)
+        self.rects = (array('i'), array('i'))
+        # Per group: owner, team, first and end rect numbers, and bounds (RECT_SIZE values)
+        self.groupOwners: tuple[list, list] = ([], [])
+        self.groupTeams = (array('i'), array('i'))
+        self.groupStart = (array('I'), array('I'))
+        self.groupEnd = (array('I'), array('I'))
+        self.groupBounds = (array('i'), array('i'))
+
+        # Box pairs tested by the latest findCollisions(), to see how much the broad phase rejected
+        self.boxTests = 0
+
+    def clear(self) -> None:
+        for kind in (HIT, HURT):
+            del self.rects[kind][:]
+            self.groupOwners[kind].clear()
+            del self.groupTeams[kind][:]
+            del self.groupStart[kind][:]
+            del self.groupEnd[kind][:]
+            del self.groupBounds[kind][:]
+
+    def addBoxes(self, kind: int, owner: object, team: int, xpos: int, ypos: int, facingLeft: bool,
+                 boxes: array, start: int, end: int) -> None:
+        '''
+        Adds boxes[4 * start:4 * end] (x, y, width, height each, relative to (xpos, ypos) facing right)
+        as a group of kind HIT or HURT, belonging to owner. Boxes only collide with other teams' boxes.
+        '''
+        if start >= end:
+            return
+        rects = self.rects[kind]
+        first = len(rects) // RECT_SIZE
+        for i in range(4 * start, 4 * end, 4):
+            (x, y, width, height) = boxes[i:i + 4]
+            left = xpos - x - width if facingLeft else xpos + x
+            top = ypos + y
+            rects.extend((left, top, left + width, top + height))
+
+        if end - start == 1:
+            # Most groups are a single box, which is its own bounds
+            bounds = rects[-RECT_SIZE:]
+        else:
+            group_rects = rects[RECT_SIZE * first:]
+            bounds = (min(group_rects[0::4]), min(group_rects[1::4]), max(group_rects[2::4]), max(group_rects[3::4]))
+        self.groupOwners[kind].append(owner)
+        self.groupTeams[kind].append(team)
+        self.groupStart[kind].append(first)
+        self.groupEnd[kind].append(len(rects) // RECT_SIZE)
+        self.groupBounds[kind].extend(bounds)
+
+    def findCollisions(self) -> list[tuple[object, object]]:
+        '''
+        Returns (hitbox owner, hurtbox owner) for every hitbox group overlapping an opposing team's hurtbox group,
+        in the order the hitbox groups, then the hurtbox groups, were added.
+        '''
+        self.boxTests = 0
+        if len(self.groupOwners[HIT]) == 0 or len(self.groupOwners[HURT]) == 0:
+            return []
+        hit_bounds = self.groupBounds[HIT]
+        hurt_bounds = self.groupBounds[HURT]
+        # Both kinds' groups, sorted by left edge (hitboxes first on ties): (left, kind, group)
+        events = sorted([(hit_bounds[RECT_SIZE * group], HIT, group) for group in range(len(self.groupOwners[HIT]))]
+                        + [(hurt_bounds[RECT_SIZE * group], HURT, group) for group in range(len(self.groupOwners[HURT]))])
+
+        # Groups whose bounds may still overlap the rest of the sweep, indexed by kind
+        active: tuple[list[int], list[int]] = ([], [])
+        found: list[tuple[int, int]] = []
+        for (left, kind, group) in events:
+            other_kind = 1 - kind
+            other_bounds = self.groupBounds[other_kind]
+            bounds = self.groupBounds[kind]
+            # Groups ending at or before this one's left edge can't overlap it or anything later in the sweep
+            others = [other for other in active[other_kind] if other_bounds[RECT_SIZE * other + 2] > left]
+            active[other_kind][:] = others
+
+            top = bounds[RECT_SIZE * group + 1]
+            bottom = bounds[RECT_SIZE * group + 3]
+            team = self.groupTeams[kind][group]
+            other_teams = self.groupTeams[other_kind]
+            for other in others:
+                if (other_teams[other] != team and other_bounds[RECT_SIZE * other + 1] < bottom
+                        and top < other_bounds[RECT_SIZE * other + 3]):
+                    (hit_group, hurt_group) = (group, other) if kind == HIT else (other, group)
+                    if self.groupsOverlap(hit_group, hurt_group):
+                        found.append((hit_group, hurt_group))
+            active[kind].append(group)
+
+        found.sort()
+        return [(self.groupOwners[HIT][hit_group], self.groupOwners[HURT][hurt_group]) for (hit_group, hurt_group) in found]
+
+    def groupsOverlap(self, hit_group: int, hurt_group: int) -> bool:
+        '''
+        Narrow phase: returns whether any box of hit_group overlaps any box of hurt_group.
+        '''
+        hit_rects = self.rects[HIT]
+        hurt_rects = self.rects[HURT]
+        hurt_start = RECT_SIZE * self.groupStart[HURT][hurt_group]
+        hurt_end = RECT_SIZE * self.groupEnd[HURT][hurt_group]
+        for i in range(RECT_SIZE * self.groupStart[HIT][hit_group], RECT_SIZE * self.groupEnd[HIT][hit_group], RECT_SIZE):
+            (left, top, right, bottom) = hit_rects[i:i + RECT_SIZE]
+            for j in range(hurt_start, hurt_end, RECT_SIZE):
+                self.boxTests = self.boxTests + 1
+                if (left < hurt_rects[j + 2] and hurt_rects[j] < right
+                        and top < hurt_rects[j + 3] and hurt_rects[j + 1] < bottom):
+                    return True
+        return False
+
+    def iterRects(self, kind: int):
+        '''
+        Yields (left, top, width, height) of every rect of kind, e.g. for drawing.
+        '''
+        rects = self.rects[kind]
+        for i in range(0, len(rects), RECT_SIZE):
+            yield (rects[i], rects[i + 1], rects[i + 2] - rects[i], rects[i + 3] - rects[i + 1])
@@ -1,8 +1,35 @@
 # Constants
 WINDOW_WIDTH = 640
 WINDOW_HEIGHT = 480
+# Simulation steps (GameState.update() calls) per second, independent of the rendered frame rate
+SIMULATION_RATE = 60
+# Length of a round, in seconds
+ROUND_TIME = 99
+# Count the round timer down in whole simulation steps instead of adding up float fractions of a second,
+# so it is exact and the same on every machine (needed for replays and rollback to stay in sync)
+FIXED_POINT_TIMER = True
+# Character definition used when none is given, and where compiled definitions are cached (see character_data.py)
+DEFAULT_CHARACTER = "assets/characters/guy.json"
+CHARACTER_CACHE_DIR = ".character_cache"
+# Where the font files found for system font names are cached between runs (see asset_manager.AssetManager.findSysFont)
+FONT_CACHE_PATH = ".font_cache.json"
+# Folder each match is recorded to as a replay (see replay.py), or None
+REPLAY_DIR = None
+# Where frame indexes of replays are cached for analysis (see analytics.py)
+REPLAY_INDEX_DIR = ".replay_index"
+# Port to broadcast the match to spectators on (see spectator.py), or None
+SPECTATOR_PORT = None
+# Rendered frames per second cap, 0 for uncapped
 FRAME_RATE_CAP = 60
 
+# Build Inputs from timestamped key events (see input_capture.py) instead of sampling the keyboard once per rendered frame
+EVENT_INPUT_CAPTURE = True
+
+# Number of Inputs (not frames) kept per InputHistory
+INPUT_HISTORY_LENGTH = 30
+# Rows of the input history column (see inputs.InputDisplay), which may be more than INPUT_HISTORY_LENGTH
+INPUT_DISPLAY_ROWS = 30
+
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
@@ -10,4 +37,10 @@ BLUE = (0, 0, 255)
 
 # Global variables
 SHOW_HITBOXES = True
-SHOW_INPUT_HISTORY = True
\ No newline at end of file
+SHOW_INPUT_HISTORY = True
+# Player controlled by ai.AIController instead of the keyboard (training mode), or None
+AI_PLAYER = None
+# Frame time graph of profiler.profiler's sections
+SHOW_PROFILER = False
+# Render Characters between their last two simulated positions (see game_loop.FixedTimestep.alpha)
+INTERPOLATE_RENDERING = True
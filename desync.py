@@ -0,0 +1,84 @@
+'''
+Desync detection: comparing GameState.checksum()s of two simulations of the same inputs,
+e.g. the two sides of a RollbackSession, or a replay and the match it was recorded from.
+
+Checksums are keyed by GameState.current_frame right after the update() they follow.
+Either side may report checksums for any frames, in any order; frames only one side reported are never compared.
+'''
+from __future__ import annotations
+from typing import Iterator
+
+import inputs
+import simulation
+from gamestate import GameState
+
+class DesyncDetector():
+    def __init__(self, max_pending: int = 600) -> None:
+        '''
+        max_pending is how many checksums of each side are kept while waiting for the other side's,
+        the oldest being forgotten first.
+        '''
+        self.max_pending = max_pending
+        # Checksums not compared yet, by frame, indexed by side (0 for local, 1 for remote)
+        self.pending: tuple[dict[int, int], dict[int, int]] = ({}, {})
+        self.compared = 0
+        # (frame, local checksum, remote checksum) of every mismatch, in the order they were found
+        self.desyncs: list[tuple[int, int, int]] = []
+        self.first_desync_frame: int | None = None
+
+    def addLocal(self, frame_number: int, checksum: int) -> None:
+        self.add(0, frame_number, checksum)
+
+    def addRemote(self, frame_number: int, checksum: int) -> None:
+        self.add(1, frame_number, checksum)
+
+    def add(self, side: int, frame_number: int, checksum: int) -> None:
+        other_checksum = self.pending[1 - side].pop(frame_number, None)
+        if other_checksum is None:
+            pending = self.pending[side]
+            pending[frame_number] = checksum
+            if len(pending) > self.max_pending:
+                del pending[next(iter(pending))]
+            return
+
+        self.compared = self.compared + 1
+        if other_checksum != checksum:
+            (local, remote) = (checksum, other_checksum) if side == 0 else (other_checksum, checksum)
+            self.desyncs.append((frame_number, local, remote))
+            if self.first_desync_frame is None or frame_number < self.first_desync_frame:
+                self.first_desync_frame = frame_number
+
+    def isDesynced(self) -> bool:
+        return self.first_desync_frame is not None
+
+    def __repr__(self) -> str:
+        if self.isDesynced():
+            return f"DesyncDetector(desynced at frame {self.first_desync_frame}, {self.compared} checksums compared)"
+        return f"DesyncDetector(in sync, {self.compared} checksums compared)"
+
+def iterChecksums(gameState: GameState, scripts: dict[str, simulation.Script], max_frames: int | None = None) -> Iterator[tuple[int, int]]:
+    '''
+    Simulates scripts on gameState like simulation.runMatch(), yielding (frame, checksum) after every update().
+    '''
+    if max_frames is None:
+        max_frames = max(len(script) for script in scripts.values())
+    for frame in range(gameState.current_frame, max_frames):
+        for (player, inputHistory) in gameState.inputHistories.items():
+            script = scripts[player]
+            inputHistory.append(inputs.Input(script[frame] if frame < len(script) else 0, frame, frame + 1))
+        gameState.update()
+        yield (gameState.current_frame, gameState.checksum())
+
+def compareSimulations(local: GameState, remote: GameState, scripts: dict[str, simulation.Script],
+                       max_frames: int | None = None) -> DesyncDetector:
+    '''
+    Simulates scripts on both GameStates side by side, comparing their checksums every frame,
+    and returns the DesyncDetector (so first_desync_frame is exactly the first frame they diverged on).
+    Useful for checking that a change to the simulation keeps it deterministic.
+    '''
+    detector = DesyncDetector()
+    for ((frame, local_checksum), (_, remote_checksum)) in zip(iterChecksums(local, scripts, max_frames),
+                                                                iterChecksums(remote, scripts, max_frames)):
+        detector.addLocal(frame, local_checksum)
+        detector.addRemote(frame, remote_checksum)
+    return detector
@@ -0,0 +1,34 @@
+'''
+Files derived from other files and cached on disk, e.g. compiled character definitions (character_data.py)
+and replay frame indexes (analytics.py).
+'''
+from __future__ import annotations
+import hashlib
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+def getCachePath(path: str, cache_dir: str, extension: str) -> str:
+    '''
+    Returns where in cache_dir to cache the file derived from path, ending in extension (e.g. ".pickle").
+    '''
+    # Named after the source's absolute path, so sources with the same file name in different folders don't collide
+    path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(path))[0]}-{path_hash}{extension}")
+
+@contextmanager
+def writeAtomically(path: str) -> Iterator[BinaryIO]:
+    '''
+    Opens a temporary file for writing path's contents, and moves it to path once the with block finishes,
+    creating path's folder if needed. Other processes never see a half written file at path,
+    and nothing is written there if the block raises.
+    '''
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            yield file
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
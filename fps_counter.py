@@ -1,13 +1,17 @@
 import pygame as pg
 import constants
+from asset_manager import assetManager
 
 class FpsCounter:
     def __init__(self):
         self.clock = pg.time.Clock()
-        self.font = pg.font.SysFont("Verdana", 10)
-        self.text = self.font.render(str(self.clock.get_fps()), True, constants.WHITE)
-        
+
+    @property
+    def font(self):
+        # Looked up on first render, see GameState.font
+        return assetManager.getSysFont("Verdana", 10)
+
     def render(self, display):
         fps = int(self.clock.get_fps())
-        self.text = self.font.render(f"{fps}FPS", True, constants.WHITE)
+        self.text = assetManager.renderText(self.font, f"{fps}FPS", constants.WHITE)
         display.blit(self.text, (constants.WINDOW_WIDTH - 50, 5))
\ No newline at end of file
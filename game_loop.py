@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+NANOSECONDS_PER_SECOND = 1_000_000_000
+
+class FixedTimestep():
+    '''
+    Decides how many simulation steps to run per rendered frame,
+    so the simulation runs at exactly rate steps per second no matter how fast or slow rendering is.
+
+    Step deadlines are computed from the start time in integer nanoseconds rather than by adding up float
+    frame times, so the simulation can't drift from the wall clock however long the game runs.
+    '''
+    def __init__(self, rate: int, max_steps_per_frame: int = 4, max_lag: float = 0.25) -> None:
+        '''
+        When rendering falls behind, at most max_steps_per_frame steps are run before each render
+        and the rest are caught up on over the next frames.
+        If the simulation falls more than max_lag seconds behind (e.g. the window was dragged, or a debugger paused),
+        the steps it missed are dropped instead of fast-forwarded through.
+        '''
+        self.rate = rate
+        self.max_steps_per_frame = max_steps_per_frame
+        self.max_lag_steps = max(1, int(max_lag * rate))
+
+        self.start_time: int | None = None
+        # Steps run (or dropped) since start_time
+        self.step_count = 0
+        self.dropped_steps = 0
+        # How far between the last step and the next one the current render falls, from 0.0 to 1.0
+        self.alpha = 1.0
+
+    def advance(self, now: int) -> int:
+        '''
+        Takes the current time (time.perf_counter_ns()), and returns how many steps to simulate before rendering.
+        '''
+        if self.start_time is None:
+            self.start_time = now
+        elapsed = (now - self.start_time) * self.rate
+        due = elapsed // NANOSECONDS_PER_SECOND + 1
+        behind = due - self.step_count
+
+        if behind > self.max_lag_steps:
+            self.dropped_steps = self.dropped_steps + behind - 1
+            self.step_count = self.step_count + behind - 1
+            behind = 1
+
+        steps = min(behind, self.max_steps_per_frame)
+        self.step_count = self.step_count + steps
+        if steps == behind:
+            self.alpha = (elapsed % NANOSECONDS_PER_SECOND) / NANOSECONDS_PER_SECOND
+        else:
+            # Still catching up, so the newest step is the closest there is to now
+            self.alpha = 1.0
+        return steps
+
+    def getStepTime(self, step: int) -> int:
+        '''
+        Takes a step number (counting from 0, like step_count), and returns the time (time.perf_counter_ns()) it is due,
+        i.e. the boundary up to which real time events belong to that step.
+        '''
+        # Rounded up, like advance() only runs a step once it is fully due
+        return self.start_time - (-step * NANOSECONDS_PER_SECOND // self.rate)
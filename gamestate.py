@@ -1,121 +1,374 @@
 from __future__ import annotations
+import struct
+import zlib
 import pygame as pg
 
+import character_data
+import collision
 import constants
 import inputs
+import motion
+from asset_manager import assetManager
 from inputs import Button
+from profiler import profiler
+
+HP_BAR_COLOURS = {"P1": constants.RED, "P2": constants.BLUE}
+# Debug outlines of collision boxes, see constants.SHOW_HITBOXES
+BOX_COLOURS = {collision.HIT: (255, 60, 60), collision.HURT: (60, 255, 60)}
+PROJECTILE_COLOUR = (255, 200, 0)
+
+class GameStateSnapshot():
+    '''
+    Preallocated storage for GameState.saveState(), meant to be reused every frame (e.g. by rollback).
+    values holds GameState's own values followed by each Character's, see GameState.saveState().
+    '''
+    __slots__ = ("values", "histories", "projectiles")
+    
+    def __init__(self, gameState: GameState) -> None:
+        self.values: list = [None] * (GameState.STATE_SIZE + Character.STATE_SIZE * len(gameState.characters))
+        # Projectile.saveState() slots, of which the first values[3] are in use; grown as more projectiles are saved
+        self.projectiles: list[list] = []
+        self.histories: dict[str, inputs.InputHistorySnapshot] = {}
+        for (player, inputHistory) in gameState.inputHistories.items():
+            self.histories[player] = inputs.InputHistorySnapshot(inputHistory.inputs.capacity)
 
 class GameState():
-    def __init__(self, inputHistories: dict[str, inputs.InputHistory]) -> None:
+    # Number of values GameState itself saves into a GameStateSnapshot
+    STATE_SIZE = 4
+    
+    def __init__(self, inputHistories: dict[str, inputs.InputHistory], headless: bool = False,
+                 fixed_point_timer: bool = constants.FIXED_POINT_TIMER, characterPaths: dict[str, str] | None = None) -> None:
+        '''
+        characterPaths is the character definition (see character_data.py) of each player, constants.DEFAULT_CHARACTER by default.
+        If headless is True, nothing needing the pygame video or font subsystems is loaded,
+        so the game can be simulated (but not rendered) without a display, e.g. by simulation.py.
+        If fixed_point_timer is True, round_timer is computed from a whole number of simulation steps left
+        instead of accumulated in floating point, see constants.FIXED_POINT_TIMER.
+        '''
+        self.headless = headless
+        self.fixed_point_timer = fixed_point_timer
         self.current_frame: int = 0
-        self.round_timer: float = 99.0
+        self.round_timer: float = float(constants.ROUND_TIME)
+        # Simulation steps left in the round, only counted down in fixed point timer mode
+        self.round_timer_steps: int = constants.ROUND_TIME * constants.SIMULATION_RATE
         self.inputHistories = inputHistories
         
         self.characters: dict[str, Character]= {}
-        self.characters["P1"] = Character(inputHistories["P1"], self, "P1")
-        self.characters["P2"] = Character(inputHistories["P2"], self, "P2")
+        if characterPaths is None:
+            characterPaths = {}
+        for player in ("P1", "P2"):
+            self.characters[player] = Character(inputHistories[player], self, player,
+                                                characterPaths.get(player, constants.DEFAULT_CHARACTER))
         self.characters["P1"].assignOpponent(self.characters["P2"])
         self.characters["P2"].assignOpponent(self.characters["P1"])
         
-        # for rendering use
-        self.font = pg.font.SysFont("Verdana", 36)
+        self.projectiles: list[Projectile] = []
+        # Rebuilt with every Character's and Projectile's boxes each update()
+        self.collisionWorld = collision.CollisionWorld()
+        
+        # current_frame, round_timer, round_timer_steps, then each Character's
+        # xpos, ypos, hp, facingLeft, roundsWon, move, moveFrame, moveHit, stun, blocking
+        self.checksumStruct = struct.Struct("<idi" + "iiiBihHBHB" * len(self.characters))
+
+    @property
+    def font(self) -> pg.font.Font:
+        '''
+        Round timer font, looked up on first use rather than in __init__,
+        so creating a GameState doesn't wait for (or need) the font subsystem.
+        '''
+        return assetManager.getSysFont("Verdana", 36)
         
     def update(self) -> None:
         # TODO: may add more nuance to round timer than this
-        self.round_timer = self.round_timer - 1.0 / constants.FRAME_RATE_CAP
+        if self.fixed_point_timer:
+            self.round_timer_steps = self.round_timer_steps - 1
+            self.round_timer = self.round_timer_steps / constants.SIMULATION_RATE
+        else:
+            self.round_timer = self.round_timer - 1.0 / constants.SIMULATION_RATE
         
-        for character in self.characters.values():
-            character.update(self.current_frame)
+        if profiler.enabled:
+            for character in self.characters.values():
+                profiler.begin(character.profileSection)
+                character.update(self.current_frame)
+                profiler.end(character.profileSection)
+        else:
+            for character in self.characters.values():
+                character.update(self.current_frame)
+        if len(self.projectiles) > 0:
+            for projectile in self.projectiles:
+                projectile.update()
+        self.checkCollisions()
             
         self.current_frame = self.current_frame + 1
         
-    def render(self, display: pg.surface.Surface) -> None:
-        # render UI
-        self.renderRoundTimer(display)
+    def saveState(self, snapshot: GameStateSnapshot | None = None) -> GameStateSnapshot:
+        '''
+        Saves everything update() can change into snapshot (a new one if None is given) and returns it.
+        Reusing the same snapshot avoids allocating anything, so this is cheap enough to call every frame.
+        '''
+        if snapshot is None:
+            snapshot = GameStateSnapshot(self)
+        values = snapshot.values
+        values[0] = self.current_frame
+        values[1] = self.round_timer
+        values[2] = self.round_timer_steps
+        values[3] = len(self.projectiles)
+        slots = snapshot.projectiles
+        while len(slots) < len(self.projectiles):
+            slots.append([None] * Projectile.STATE_SIZE)
+        for (projectile, slot) in zip(self.projectiles, slots):
+            projectile.saveState(slot)
+        offset = GameState.STATE_SIZE
+        for character in self.characters.values():
+            character.saveState(values, offset)
+            offset = offset + Character.STATE_SIZE
+        for (player, inputHistory) in self.inputHistories.items():
+            inputHistory.saveState(snapshot.histories[player])
+        return snapshot
+    
+    def loadState(self, snapshot: GameStateSnapshot) -> None:
+        '''
+        Restores everything saved by saveState().
+        '''
+        values = snapshot.values
+        self.current_frame = values[0]
+        self.round_timer = values[1]
+        self.round_timer_steps = values[2]
+        self.projectiles = [Projectile.fromState(self, snapshot.projectiles[i]) for i in range(values[3])]
+        offset = GameState.STATE_SIZE
+        for character in self.characters.values():
+            character.loadState(values, offset)
+            offset = offset + Character.STATE_SIZE
+        for (player, inputHistory) in self.inputHistories.items():
+            inputHistory.loadState(snapshot.histories[player])
+        
+    def checksum(self) -> int:
+        '''
+        Returns a CRC32 of the simulation state (not including InputHistories),
+        for checking that two simulations of the same inputs (e.g. a replay and the original) match.
+        '''
+        values = [self.current_frame, self.round_timer, self.round_timer_steps]
+        for character in self.characters.values():
+            values.extend((character.xpos, character.ypos, character.hp, character.facingLeft, character.roundsWon,
+                           character.move, character.moveFrame, character.moveHit, character.stun, character.blocking))
+        checksum = zlib.crc32(self.checksumStruct.pack(*values))
+        for projectile in self.projectiles:
+            checksum = zlib.crc32(Projectile.CHECKSUM_STRUCT.pack(projectile.move, projectile.xpos, projectile.ypos,
+                                                                  projectile.facingLeft, projectile.framesLeft,
+                                                                  projectile.hitsLeft, projectile.cooldown), checksum)
+        return checksum
+    
+    def checkCollisions(self) -> None:
+        '''
+        Rebuilds self.collisionWorld, and applies every hit found in it.
+        '''
+        world = self.collisionWorld
+        world.clear()
+        for character in self.characters.values():
+            character.addBoxes(world)
+        for projectile in self.projectiles:
+            projectile.addBoxes(world)
+        
+        # Every hit is read before any lands, since takeHit() cancels the defender's own move,
+        # which may be a hit in the same trade
+        hits = [(defender, attacker.hit()) for (attacker, defender) in world.findCollisions()]
+        for (defender, (damage, hitstun, blockstun)) in hits:
+            defender.takeHit(damage, hitstun, blockstun)
+        if len(self.projectiles) > 0:
+            self.projectiles = [projectile for projectile in self.projectiles if projectile.isAlive()]
+        
+    def isRoundOver(self) -> bool:
+        '''
+        Returns whether the round timer has run out or either Character has run out of HP.
+        '''
+        if self.round_timer <= 0:
+            return True
+        for character in self.characters.values():
+            if character.hp <= 0:
+                return True
+        return False
+        
+    def render(self, display: pg.surface.Surface, alpha: float = 1.0) -> None:
+        '''
+        alpha is passed on to Character.render().
+        '''
+        # render UI (round timer goes over the HP bars, which span the whole window width)
         self.renderHpBars(display)
+        self.renderRoundTimer(display)
         
         # render characters
         for character in self.characters.values():
-            character.render(display)
+            character.render(display, alpha)
+        self.renderProjectiles(display)
+        if constants.SHOW_HITBOXES:
+            self.renderBoxes(display)
+    
+    def renderProjectiles(self, display: pg.surface.Surface, offset: tuple[int, int] = (0, 0)) -> None:
+        '''
+        Placeholder projectile visuals: their hitboxes, filled in.
+        offset is added to every position, e.g. to draw onto a Surface that doesn't start at the window's top left.
+        '''
+        for projectile in self.projectiles:
+            for (left, top, width, height) in projectile.getRects():
+                pg.draw.rect(display, PROJECTILE_COLOUR, (left + offset[0], top + offset[1], width, height))
+    
+    def renderBoxes(self, display: pg.surface.Surface, offset: tuple[int, int] = (0, 0)) -> None:
+        '''
+        Outlines the hurtboxes and hitboxes checked by the latest update(). offset is as in renderProjectiles().
+        '''
+        for kind in (collision.HURT, collision.HIT):
+            for (left, top, width, height) in self.collisionWorld.iterRects(kind):
+                pg.draw.rect(display, BOX_COLOURS[kind], (left + offset[0], top + offset[1], width, height), 1)
         
     def renderRoundTimer(self, display: pg.surface.Surface) -> None:
         '''
         Basic font-based method of rendering the round timer.
         '''
-        rounded_timer = "{:.0f}".format(self.round_timer)
-        self.text = self.font.render(rounded_timer, True, constants.WHITE)
+        rounded_timer = self.getRoundTimerText()
+        self.text = assetManager.renderText(self.font, rounded_timer, constants.WHITE)
         rect = self.text.get_rect()
         rect.midtop = (int(constants.WINDOW_WIDTH / 2), 5)
         display.blit(self.text, rect)
         
+    def getRoundTimerText(self) -> str:
+        return "{:.0f}".format(self.round_timer)
+        
     def renderHpBars(self, display: pg.surface.Surface) -> None:
         '''
         Basic HP bar UI.
         '''
+        for player in ("P1", "P2"):
+            (missing_hp_rect, current_hp_rect) = self.getHpBarRects(player)
+            pg.draw.rect(display, constants.WHITE, missing_hp_rect)
+            pg.draw.rect(display, HP_BAR_COLOURS[player], current_hp_rect)
+            
+    def getHpBarRects(self, player: str) -> tuple[pg.Rect, pg.Rect]:
+        '''
+        Takes "P1" or "P2", and returns the (missing HP, current HP) rects of their HP bar.
+        '''
         hp_bar_length = constants.WINDOW_WIDTH / 2
         
-        # P1
-        missing_hp_rect = pg.Rect(0, 0, hp_bar_length, 20)
-        p1_hp_proportion = max(0.0, self.characters["P1"].hp / self.characters["P1"].maxHp)
-        current_hp_rect = pg.Rect(missing_hp_rect)
-        current_hp_rect.width = int(hp_bar_length * p1_hp_proportion)
-        # For P1, the last bit of HP is the rightmost one
-        current_hp_rect.topright = missing_hp_rect.topright
-        
-        pg.draw.rect(display, constants.WHITE, missing_hp_rect)
-        pg.draw.rect(display, constants.RED, current_hp_rect)
-        
-        # P2
         missing_hp_rect = pg.Rect(0, 0, hp_bar_length, 20)
-        missing_hp_rect.topright = (constants.WINDOW_WIDTH, 0)
+        if player == "P2":
+            missing_hp_rect.topright = (constants.WINDOW_WIDTH, 0)
         
-        p2_hp_proportion = max(0.0, self.characters["P2"].hp / self.characters["P2"].maxHp)
+        hp_proportion = max(0.0, self.characters[player].hp / self.characters[player].maxHp)
         current_hp_rect = pg.Rect(missing_hp_rect)
-        current_hp_rect.width = int(hp_bar_length * p2_hp_proportion)
+        current_hp_rect.width = int(hp_bar_length * hp_proportion)
+        if player == "P1":
+            # For P1, the last bit of HP is the rightmost one
+            current_hp_rect.topright = missing_hp_rect.topright
         # For P2, the last bit of HP is the leftmost one (no change required)
         
-        pg.draw.rect(display, constants.WHITE, missing_hp_rect)
-        pg.draw.rect(display, constants.BLUE, current_hp_rect)
+        return (missing_hp_rect, current_hp_rect)
         
         
 class Character():
-    def __init__(self, inputHistory: inputs.InputHistory, gameState: GameState, player: str) -> None:
+    # Number of values Character saves into a GameStateSnapshot
+    STATE_SIZE = 11
+    
+    def __init__(self, inputHistory: inputs.InputHistory, gameState: GameState, player: str,
+                 dataPath: str = constants.DEFAULT_CHARACTER) -> None:
         # Pass in references to other systems Character needs to know about
         self.inputHistory = inputHistory
         self.gameState = gameState
+        self.dataPath = dataPath
+        # Compiled stats, moves, frame data and boxes, shared with every Character using the same definition
+        self.data = character_data.getCharacterData(dataPath)
+        self.player = player
+        # Boxes only collide with other teams' boxes
+        self.team = 0 if player == "P1" else 1
+        # Name of the profiler section timing update()
+        self.profileSection = f"{player} update"
         
         if player == "P1":
             self.xpos: int = 50
         else: # P2
             self.xpos: int = constants.WINDOW_WIDTH - 50
         self.ypos: int = constants.WINDOW_HEIGHT - 50
+        # Position before the last update(), only used to interpolate rendering
+        self.prevXpos = self.xpos
+        self.prevYpos = self.ypos
         
-        # TODO: probably want a special load_character helper for loading char's sprites en masse
-        self.surface: pg.Surface = pg.image.load('assets/guy2.png').convert_alpha()
+        # Sprites are shared between Characters through assetManager, and flipped once at load time
+        self.spritePath = self.data.sprite
+        self.surface: pg.Surface | None = None
+        self.flippedSurface: pg.Surface | None = None
+        if not gameState.headless:
+            assetManager.loadCharacterSprites([self.spritePath])
+            self.surface = assetManager.getImage(self.spritePath)
+            self.flippedSurface = assetManager.getFlippedImage(self.spritePath)
         
-        # TODO: arbitrary placeholder values, would like to load this in from a character data file
-        self.maxHp: int = 200
+        self.maxHp: int = self.data.maxHp
         self.hp: int = self.maxHp
-        self.forwardWalkspeed: int = 10
-        self.backwardWalkspeed: int = 5
+        self.forwardWalkspeed: int = self.data.forwardWalkspeed
+        self.backwardWalkspeed: int = self.data.backwardWalkspeed
+        
+        # Index of the move (in self.data) being done, -1 for none, and how many frames into it
+        self.move = -1
+        self.moveFrame = 0
+        # Whether the move has hit already (each move hits at most once)
+        self.moveHit = False
+        # Frames of hitstun or blockstun left, during which the Character can't act
+        self.stun = 0
+        # Whether the last hit taken was blocked, so stun is blockstun, during which holding back keeps blocking
+        self.blocking = False
         
         self.facingLeft = False
         
         self.roundsWon = 0
         
+        # Special move commands, recognized incrementally from each frame's buttons
+        self.motionRecognizer = motion.MotionRecognizer(self.data.commands)
+        # Commands completed on the latest update(), highest priority first
+        self.motionCommands: list[motion.MotionCommand] = []
+        
     def assignOpponent(self, opponent: Character) -> None:
         '''
         Part of initialization, but deferred until after both Characters have been created.
         '''
         self.opponent = opponent
     
+    def saveState(self, values: list, offset: int) -> None:
+        '''
+        Writes the values update() can change into values[offset:offset + Character.STATE_SIZE].
+        The motion recognizer's state is copied into the MotionState values already holds, if any.
+        '''
+        values[offset:offset + Character.STATE_SIZE - 1] = (self.xpos, self.ypos, self.hp, self.facingLeft, self.roundsWon,
+                                                             self.move, self.moveFrame, self.moveHit, self.stun, self.blocking)
+        index = offset + Character.STATE_SIZE - 1
+        values[index] = self.motionRecognizer.saveState(values[index])
+        
+    def loadState(self, values: list, offset: int) -> None:
+        (self.xpos, self.ypos, self.hp, self.facingLeft, self.roundsWon,
+         self.move, self.moveFrame, self.moveHit, self.stun, self.blocking, motion_state) = values[offset:offset + Character.STATE_SIZE]
+        self.motionRecognizer.loadState(motion_state)
+    
     def update(self, frame_number: int) -> None:
         '''
         Takes a frame_number, and updates self based on the Buttons pressed on that frame.
         '''
-        frame_buttons = self.inputHistory.getFrameButtons(frame_number)
-        if (frame_buttons[Button.LEFT] or frame_buttons[Button.RIGHT]):
-            self.walk(frame_buttons)
+        self.prevXpos = self.xpos
+        self.prevYpos = self.ypos
+        
+        frame_bits = self.inputHistory.getFrameBits(frame_number)
+        newly_pressed = frame_bits & ~self.motionRecognizer.lastBits
+        self.motionCommands = self.motionRecognizer.update(frame_bits, frame_number, self.facingLeft)
+        
+        if self.stun > 0:
+            self.stun = self.stun - 1
+        else:
+            if self.move >= 0:
+                self.moveFrame = self.moveFrame + 1
+                if self.moveFrame >= self.data.moveLength[self.move]:
+                    self.move = -1
+            if self.move < 0:
+                if newly_pressed:
+                    self.startMove(frame_bits, newly_pressed)
+                if self.move < 0 and frame_bits & inputs.LEFT_RIGHT_BITS:
+                    self.walk(frame_bits)
+            if self.move >= 0 and self.moveFrame == self.data.moveProjectileFrame[self.move]:
+                self.gameState.projectiles.append(Projectile(self, self.move))
         
         # Limits on xpos
         self.xpos = min(constants.WINDOW_WIDTH, self.xpos)
@@ -123,15 +376,76 @@ class Character():
         
         self.faceOpponent()
     
-    def walk(self, buttons: dict[Button, bool]) -> None:
+    def startMove(self, bits: int, newly_pressed: int) -> None:
+        '''
+        Starts the move of the highest priority command completed this frame, if any,
+        or else the first button move whose buttons are all held, at least one of them newly pressed.
+        '''
+        for command in self.motionCommands:
+            move = self.data.moveIndices.get(command.name)
+            if move is not None:
+                self.move = move
+                break
+        else:
+            for (move, buttons) in enumerate(self.data.moveButtons):
+                if buttons & newly_pressed and buttons & ~bits == 0:
+                    self.move = move
+                    break
+            else:
+                return
+        self.moveFrame = 0
+        self.moveHit = False
+    
+    def addBoxes(self, world: collision.CollisionWorld) -> None:
+        '''
+        Adds the hurtboxes, and hitboxes if the current move hasn't hit yet, of the current frame to world.
+        '''
+        data = self.data
+        if self.move < 0:
+            world.addBoxes(collision.HURT, self, self.team, self.xpos, self.ypos, self.facingLeft,
+                           data.hurtboxes, data.idleHurtboxStart, data.idleHurtboxEnd)
+            return
+        index = data.moveStart[self.move] + self.moveFrame
+        world.addBoxes(collision.HURT, self, self.team, self.xpos, self.ypos, self.facingLeft,
+                       data.hurtboxes, data.frameHurtboxStart[index], data.frameHurtboxEnd[index])
+        if not self.moveHit:
+            world.addBoxes(collision.HIT, self, self.team, self.xpos, self.ypos, self.facingLeft,
+                           data.hitboxes, data.frameHitboxStart[index], data.frameHitboxEnd[index])
+    
+    def hit(self) -> tuple[int, int, int]:
+        '''
+        Called when the current move's hitboxes overlap a defender's hurtboxes.
+        Returns the move's damage, hitstun and blockstun, for the defender's takeHit().
+        '''
+        self.moveHit = True
+        data = self.data
+        return (data.moveDamage[self.move], data.moveHitstun[self.move], data.moveBlockstun[self.move])
+    
+    def takeHit(self, damage: int, hitstun: int, blockstun: int) -> None:
+        '''
+        Blocks the hit if holding back while not doing a move or in hitstun, otherwise takes damage and hitstun.
+        Blockstun doesn't stop blocking, so later hits of a projectile or blockstring (or other hits on the same frame)
+        are blocked too.
+        '''
+        back = Button.RIGHT.bit if self.isRightOfOpponent() else Button.LEFT.bit
+        if self.move < 0 and (self.stun == 0 or self.blocking) and self.motionRecognizer.lastBits & back:
+            self.stun = blockstun
+            self.blocking = True
+            return
+        self.hp = self.hp - damage
+        self.stun = hitstun
+        self.blocking = False
+        self.move = -1
+    
+    def walk(self, bits: int) -> None:
         if self.facingLeft:
-            if buttons[Button.LEFT]:
+            if bits & Button.LEFT.bit:
                 self.xpos = self.xpos - self.forwardWalkspeed
             else:
                 self.xpos = self.xpos + self.backwardWalkspeed
                 self.hp = self.hp - 1 # TODO: temporarily added to show HP loss
         else:
-            if buttons[Button.LEFT]:
+            if bits & Button.LEFT.bit:
                 self.xpos = self.xpos - self.backwardWalkspeed
                 self.hp = self.hp - 1 # TODO: temporarily added to show HP loss
             else:
@@ -152,13 +466,104 @@ class Character():
         '''
         self.facingLeft = self.isRightOfOpponent()
         
-    def render(self, display: pg.surface.Surface) -> None:
+    def getRenderPosition(self, alpha: float = 1.0) -> tuple[int, int]:
+        '''
+        Takes how far between the last two updates to render (0.0 for the previous one, 1.0 for the latest one),
+        and returns the interpolated (xpos, ypos).
+        '''
+        if alpha >= 1.0:
+            return (self.xpos, self.ypos)
+        return (round(self.prevXpos + (self.xpos - self.prevXpos) * alpha),
+                round(self.prevYpos + (self.ypos - self.prevYpos) * alpha))
+        
+    def render(self, display: pg.surface.Surface, alpha: float = 1.0) -> None:
         rect = pg.Rect(self.surface.get_rect())
-        rect.midbottom = (self.xpos, self.ypos)
+        rect.midbottom = self.getRenderPosition(alpha)
         
         surface_facing = self.surface
         if self.facingLeft:
-            surface_facing = pg.transform.flip(surface_facing, True, False)
+            surface_facing = self.flippedSurface
 
         display.blit(surface_facing, rect)
-        
\ No newline at end of file
+        
+
+class Projectile():
+    '''
+    Projectile spawned by a Character's move (see character_data), flying forward until it runs out of hits or lifetime.
+    '''
+    __slots__ = ("owner", "move", "xpos", "ypos", "facingLeft", "framesLeft", "hitsLeft", "cooldown")
+    
+    # Number of values saveState() writes
+    STATE_SIZE = 8
+    # Everything in saveState() but the owner, for GameState.checksum()
+    CHECKSUM_STRUCT = struct.Struct("<hiiBHHH")
+    
+    def __init__(self, owner: Character, move: int) -> None:
+        data = owner.data
+        self.owner = owner
+        self.move = move
+        self.facingLeft = owner.facingLeft
+        x = data.moveProjectileX[move]
+        self.xpos = owner.xpos - x if self.facingLeft else owner.xpos + x
+        self.ypos = owner.ypos + data.moveProjectileY[move]
+        self.framesLeft = data.moveProjectileLifetime[move]
+        self.hitsLeft = data.moveProjectileHits[move]
+        # Frames until it can hit again
+        self.cooldown = 0
+        
+    def update(self) -> None:
+        speed = self.owner.data.moveProjectileSpeed[self.move]
+        self.xpos = self.xpos - speed if self.facingLeft else self.xpos + speed
+        self.framesLeft = self.framesLeft - 1
+        if self.cooldown > 0:
+            self.cooldown = self.cooldown - 1
+        
+    def isAlive(self) -> bool:
+        return self.framesLeft > 0 and self.hitsLeft > 0 and -constants.WINDOW_WIDTH <= self.xpos <= 2 * constants.WINDOW_WIDTH
+    
+    def addBoxes(self, world: collision.CollisionWorld) -> None:
+        if self.cooldown == 0:
+            data = self.owner.data
+            world.addBoxes(collision.HIT, self, self.owner.team, self.xpos, self.ypos, self.facingLeft,
+                           data.hitboxes, data.moveProjectileBoxStart[self.move], data.moveProjectileBoxEnd[self.move])
+    
+    def hit(self) -> tuple[int, int, int]:
+        '''
+        Like Character.hit().
+        '''
+        data = self.owner.data
+        self.hitsLeft = self.hitsLeft - 1
+        self.cooldown = data.moveProjectileHitInterval[self.move]
+        return (data.moveDamage[self.move], data.moveHitstun[self.move], data.moveBlockstun[self.move])
+    
+    def getRects(self):
+        '''
+        Yields (left, top, width, height) of each of its hitboxes in world space.
+        '''
+        data = self.owner.data
+        boxes = data.hitboxes
+        for i in range(4 * data.moveProjectileBoxStart[self.move], 4 * data.moveProjectileBoxEnd[self.move], 4):
+            (x, y, width, height) = boxes[i:i + 4]
+            left = self.xpos - x - width if self.facingLeft else self.xpos + x
+            yield (left, self.ypos + y, width, height)
+    
+    def saveState(self, state: list) -> None:
+        '''
+        Writes everything needed to recreate the projectile into state, a list of STATE_SIZE values.
+        '''
+        state[0] = self.owner.player
+        state[1] = self.move
+        state[2] = self.xpos
+        state[3] = self.ypos
+        state[4] = self.facingLeft
+        state[5] = self.framesLeft
+        state[6] = self.hitsLeft
+        state[7] = self.cooldown
+    
+    @staticmethod
+    def fromState(gameState: GameState, state: list) -> Projectile:
+        projectile = Projectile.__new__(Projectile)
+        (player, projectile.move, projectile.xpos, projectile.ypos, projectile.facingLeft,
+         projectile.framesLeft, projectile.hitsLeft, projectile.cooldown) = state
+        projectile.owner = gameState.characters[player]
+        return projectile
@@ -0,0 +1,138 @@
+'''
+Event-based keyboard input: key presses and releases are timestamped as they are drained from pygame's event queue,
+and folded into each simulation step's Inputs at that step's boundary, instead of sampling
+pygame.key.get_pressed() once per rendered frame.
+
+Sampling loses any press and release that both fall between two samples, and a key's latency depends on
+where in the frame it went down. With InputCapture, a key pressed at any point before a step's boundary
+counts as pressed on that step, even if it was released again before the boundary (a sub-frame tap),
+and the game loop drains events about once a millisecond while waiting for the next frame (see waitUntil()),
+so timestamps are accurate to about a millisecond.
+
+SDL only delivers events to the thread that created the window, so events are drained on the main thread
+rather than a separate capture thread.
+'''
+from __future__ import annotations
+import time
+from array import array
+from collections import deque
+
+import pygame as pg
+
+import inputs
+from profiler import NANOSECONDS_PER_MILLISECOND, profiler
+
+class PressedKeys(set):
+    '''
+    Set of pressed keys, indexable by key like the result of pygame.key.get_pressed(), for InputTable.poll().
+    '''
+    __getitem__ = set.__contains__
+
+class InputCapture():
+    def __init__(self, latency_capacity: int = 600) -> None:
+        # (timestamp, key, pressed) of key events not folded into an Input yet, oldest first
+        self.events: deque[tuple[int, int, bool]] = deque()
+        # Events that aren't key presses or releases (and every KEYDOWN too, for hotkeys), for the game loop to handle
+        self.otherEvents: list[pg.event.Event] = []
+        # Keys held as of the last step's boundary
+        self.keysDown = PressedKeys()
+
+        # Time from each key event to the step it was folded into being built, in nanoseconds,
+        # indexed by latency_count % latency_capacity
+        self.latencies = array('q', bytes(8 * latency_capacity))
+        self.latency_count = 0
+        # Keys pressed and released between the same two step boundaries, kept as one step presses
+        self.taps = 0
+
+    def sync(self) -> None:
+        '''
+        Sets which keys are held from pygame.key.get_pressed(), e.g. when starting to capture
+        with keys already held down. Only keys bound in inputs.keybinds are checked.
+        '''
+        keys_pressed = pg.key.get_pressed()
+        self.keysDown = PressedKeys(key for bindings in inputs.keybinds.values() for key in bindings if keys_pressed[key])
+
+    def pump(self, now: int | None = None) -> None:
+        '''
+        Drains pygame's event queue, timestamping key events with now (time.perf_counter_ns() by default).
+        '''
+        if now is None:
+            now = time.perf_counter_ns()
+        for event in pg.event.get():
+            self.addEvent(event, now)
+
+    def addEvent(self, event: pg.event.Event, timestamp: int) -> None:
+        if event.type == pg.KEYDOWN:
+            self.events.append((timestamp, event.key, True))
+            self.otherEvents.append(event)
+        elif event.type == pg.KEYUP:
+            self.events.append((timestamp, event.key, False))
+        else:
+            self.otherEvents.append(event)
+
+    def takeOtherEvents(self) -> list[pg.event.Event]:
+        '''
+        Returns (and forgets) the events pump() drained that the game loop may want to handle itself, e.g. pg.QUIT.
+        '''
+        events = self.otherEvents
+        self.otherEvents = []
+        return events
+
+    def waitUntil(self, deadline: int, poll_interval: float = 0.001) -> None:
+        '''
+        Sleeps until deadline (time.perf_counter_ns()), calling pump() about every poll_interval seconds meanwhile.
+        Use instead of sleeping off the rest of a frame.
+        '''
+        while True:
+            now = time.perf_counter_ns()
+            self.pump(now)
+            remaining = (deadline - now) / 1e9
+            if remaining <= 0:
+                return
+            time.sleep(min(poll_interval, remaining))
+
+    def buildInputs(self, current_frame: int, boundary: int, now: int | None = None) -> dict[str, inputs.Input]:
+        '''
+        Folds every key event timestamped up to boundary (time.perf_counter_ns()) into an Input for current_frame
+        for each player in inputs.keybinds: a key counts as pressed if it was held at the boundary,
+        or pressed at any point since the previous step's boundary.
+        now is when the Inputs are built, for measuring latency.
+        '''
+        if now is None:
+            now = time.perf_counter_ns()
+        events = self.events
+        keysDown = self.keysDown
+        # Keys that went down since the previous boundary
+        newlyPressed = set()
+        while len(events) > 0 and events[0][0] <= boundary:
+            (timestamp, key, pressed) = events.popleft()
+            if pressed:
+                keysDown.add(key)
+                newlyPressed.add(key)
+            elif key in keysDown:
+                keysDown.discard(key)
+                if key in newlyPressed:
+                    self.taps = self.taps + 1
+            self.latencies[self.latency_count % len(self.latencies)] = now - timestamp
+            self.latency_count = self.latency_count + 1
+            profiler.recordPeak("input_latency", now - timestamp)
+
+        frameKeys = PressedKeys(keysDown)
+        frameKeys.update(newlyPressed)
+        table = inputs.getInputTable()
+        frame_inputs = {}
+        for (player, bits) in zip(table.players, table.poll(frameKeys)):
+            frame_inputs[player] = inputs.Input(bits, current_frame, current_frame + 1)
+        return frame_inputs
+
+    def getLatencyStats(self) -> dict[str, float]:
+        '''
+        Returns the mean and worst latency from key event to Input of the last latency_capacity key events,
+        in milliseconds (both 0.0 before any).
+        '''
+        count = min(self.latency_count, len(self.latencies))
+        if count == 0:
+            return {"mean": 0.0, "max": 0.0}
+        latencies = self.latencies[:count]
+        return {"mean": sum(latencies) / count / NANOSECONDS_PER_MILLISECOND,
+                "max": max(latencies) / NANOSECONDS_PER_MILLISECOND}
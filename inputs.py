@@ -1,10 +1,16 @@
 from __future__ import annotations
 # https://stackoverflow.com/questions/33533148/how-do-i-type-hint-a-method-with-the-type-of-the-enclosing-class
+from collections.abc import Mapping
 from enum import Enum
+from functools import reduce
+from itertools import compress
+from operator import itemgetter, or_
+from typing import Iterator
 
 import pygame.locals as locals
 import pygame as pg
 import constants
+from asset_manager import assetManager
 
 class Button(Enum):
     LEFT = 0
@@ -20,6 +26,17 @@ class Button(Enum):
     MACRO_PD = 21
     MACRO_PKS = 22
     MACRO_PKSH = 23
+    
+    def __init__(self, value: int) -> None:
+        # Each Button owns one bit of an Input's bitmask, indexed by its value.
+        self.bit = 1 << value
+
+LEFT_RIGHT_BITS = Button.LEFT.bit | Button.RIGHT.bit
+UP_DOWN_BITS = Button.UP.bit | Button.DOWN.bit
+DIRECTION_BITS = LEFT_RIGHT_BITS | UP_DOWN_BITS
+# Every Button bit fits below this
+PLAYER_BITS_WIDTH = max(button.value for button in Button) + 1
+ALL_BUTTON_BITS = (1 << PLAYER_BITS_WIDTH) - 1
 
 # define keybindings manually here
 # TODO: eventually replace with a proper menu interface for rebinding keys
@@ -65,20 +82,160 @@ def keysPressedToInput(current_frame: int, player: str) -> Input:
     '''
     Takes an int current_frame,
     checks pygame.key.keys_pressed() for all keys currently pressed,
-    and returns an Input created with a dict of all assigned Buttons pressed (after SOCD cleaning) and current_frame.
+    and returns an Input created with a bitmask of all assigned Buttons pressed (after SOCD cleaning) and current_frame.
     '''
-    keys_pressed = pg.key.get_pressed()
-    frame_buttons: dict[Button, bool] = {}
-    for (key, button) in keybinds[player].items():
-        frame_buttons[button] = keys_pressed[key]
-        
-    for macro_button in macro_defs.keys():
-        if frame_buttons.get(macro_button) and frame_buttons[macro_button]:
-            for button in macro_defs[macro_button]:
-                frame_buttons[button] = True
+    return keysPressedToInputs(current_frame)[player]
+
+def keysPressedToInputs(current_frame: int) -> dict[str, Input]:
+    '''
+    Like keysPressedToInput(), but for every player in keybinds at once,
+    which only reads pygame.key.get_pressed() once (see InputTable).
+    '''
+    table = getInputTable()
+    all_bits = table.poll(pg.key.get_pressed())
+    frame_inputs = {}
+    for (player, bits) in zip(table.players, all_bits):
+        frame_inputs[player] = Input(bits, current_frame, current_frame + 1)
+    return frame_inputs
+
+class InputTable():
+    '''
+    keybinds and macro_defs compiled into lookup tables,
+    so that polling the keyboard for every player is a few C-level calls instead of a Python loop per key.
     
-    frame_buttons = cleanSocdButtons(frame_buttons)
-    return Input(frame_buttons, current_frame, current_frame + 1)
+    Each player's Button bits are packed side by side into one int, PLAYER_BITS_WIDTH bits per player:
+    the pressed state of every bound key is fetched at once (itemgetter), the matching shifted bits are kept
+    (compress) and ORed together (reduce), and macro expansion and SOCD cleaning are table lookups.
+    '''
+    def __init__(self, keybinds: dict[str, dict[int, Button]], macro_defs: dict[Button, list[Button]]) -> None:
+        # What this table was compiled from, see getInputTable()
+        self.keybinds = keybinds
+        self.macro_defs = macro_defs
+        self.version = _keybinds_version
+        
+        self.players = list(keybinds.keys())
+        keys = []
+        self.shiftedBits = []
+        for (index, player) in enumerate(self.players):
+            for (key, button) in keybinds[player].items():
+                keys.append(key)
+                self.shiftedBits.append(button.bit << (index * PLAYER_BITS_WIDTH))
+        self.getPressed = itemgetter(*keys) if len(keys) > 0 else None
+        # itemgetter() with a single key returns the value itself rather than a 1-tuple
+        self.singleKey = len(keys) == 1
+        
+        self.macroBits = 0
+        for macro_button in macro_defs:
+            self.macroBits = self.macroBits | macro_button.bit
+        # Expansion of each combination of pressed macros, filled in as combinations come up
+        self.macroExpansions: dict[int, int] = {}
+        
+        # SOCD cleaned directions, for every combination of direction bits
+        self.socdDirections: dict[int, int] = {}
+        directions = DIRECTION_BITS
+        while True:
+            self.socdDirections[directions] = cleanSocdBits(directions)
+            if directions == 0:
+                break
+            directions = (directions - 1) & DIRECTION_BITS
+        
+    def isStale(self) -> bool:
+        '''
+        Returns whether keybinds or macro_defs have changed since this table was compiled.
+        '''
+        return self.keybinds is not keybinds or self.macro_defs is not macro_defs or self.version != _keybinds_version
+        
+    def poll(self, keys_pressed) -> list[int]:
+        '''
+        Takes the result of pygame.key.get_pressed(),
+        and returns each player's SOCD cleaned button bitmask with macros expanded, in self.players order.
+        '''
+        packed = 0
+        if self.getPressed is not None:
+            pressed = self.getPressed(keys_pressed)
+            if self.singleKey:
+                pressed = (pressed,)
+            packed = reduce(or_, compress(self.shiftedBits, pressed), 0)
+        
+        all_bits = []
+        for _ in self.players:
+            bits = packed & ALL_BUTTON_BITS
+            packed = packed >> PLAYER_BITS_WIDTH
+            
+            macros = bits & self.macroBits
+            if macros:
+                expansion = self.macroExpansions.get(macros)
+                if expansion is None:
+                    expansion = expandMacroBits(macros)
+                    self.macroExpansions[macros] = expansion
+                bits = bits | expansion
+            
+            directions = bits & DIRECTION_BITS
+            all_bits.append(bits ^ directions | self.socdDirections[directions])
+        return all_bits
+
+_input_table: InputTable | None = None
+# Bumped whenever keybinds or macro_defs are changed in place
+_keybinds_version = 0
+
+def getInputTable() -> InputTable:
+    '''
+    Returns the InputTable for the current keybinds and macro_defs, compiling it first if they changed.
+    '''
+    global _input_table
+    if _input_table is None or _input_table.isStale():
+        _input_table = InputTable(keybinds, macro_defs)
+    return _input_table
+
+def invalidateInputTable() -> None:
+    '''
+    Makes the next poll recompile the InputTable.
+    Call after changing keybinds or macro_defs in place (bindKey() and unbindKey() already do).
+    '''
+    global _keybinds_version
+    _keybinds_version = _keybinds_version + 1
+
+def bindKey(player: str, key: int, button: Button) -> None:
+    '''
+    Binds key (pygame.locals) to button for player, replacing any previous binding of that key.
+    '''
+    keybinds.setdefault(player, {})[key] = button
+    invalidateInputTable()
+
+def unbindKey(player: str, key: int) -> None:
+    keybinds[player].pop(key, None)
+    invalidateInputTable()
+
+def buttonsToBits(buttons: Mapping[Button, bool]) -> int:
+    '''
+    Takes a dict of buttons pressed and returns the equivalent bitmask.
+    '''
+    bits = 0
+    for (button, pressed) in buttons.items():
+        if pressed:
+            bits = bits | button.bit
+    return bits
+
+def expandMacroBits(bits: int) -> int:
+    '''
+    Takes a bitmask of buttons pressed,
+    and returns a copy of it with the buttons of every pressed macro (see macro_defs) added.
+    '''
+    for (macro_button, buttons) in macro_defs.items():
+        if bits & macro_button.bit:
+            for button in buttons:
+                bits = bits | button.bit
+    return bits
+
+def cleanSocdBits(bits: int) -> int:
+    '''
+    Bitmask equivalent of cleanSocdButtons().
+    '''
+    if bits & LEFT_RIGHT_BITS == LEFT_RIGHT_BITS:
+        bits = bits & ~LEFT_RIGHT_BITS
+    if bits & UP_DOWN_BITS == UP_DOWN_BITS:
+        bits = bits & ~UP_DOWN_BITS
+    return bits
 
 def cleanSocdButtons(frame_buttons: dict[Button, bool]) -> dict[Button, bool]:
     '''
@@ -147,74 +304,377 @@ def attackButtonsToLetters(buttons: dict[Button, bool]) -> str:
         string = string + "D"
     return string
 
+# Vertical spacing of InputHistory.render() rows
+ROW_HEIGHT = 15
+# Font that supports Unicode arrows, for InputHistory.render()
+INPUT_DISPLAY_FONT = ("assets/seguisym.ttf", 20)
+
+class ButtonsView(Mapping):
+    '''
+    Read-only dict[Button, bool] view over a button bitmask,
+    so code written against the dict API keeps working without a dict being stored per frame.
+    '''
+    __slots__ = ("bits",)
+    
+    def __init__(self, bits: int):
+        self.bits = bits
+        
+    def __getitem__(self, button: Button) -> bool:
+        try:
+            return self.bits & button.bit != 0
+        except AttributeError:
+            raise KeyError(button) from None
+        
+    def __iter__(self) -> Iterator[Button]:
+        return iter(Button)
+    
+    def __len__(self) -> int:
+        return len(Button)
+    
+    def __eq__(self, other):
+        if isinstance(other, ButtonsView):
+            return self.bits == other.bits
+        return super().__eq__(other)
+    
+    def __repr__(self) -> str:
+        return f"ButtonsView({dict(self)!r})"
+
 class Input():
-    def __init__(self, buttons: dict[Button, bool], start_frame: int, end_frame: int):
-        self.buttons = buttons
+    # Millions of these can be alive at once in replays/rollback, so avoid a per-instance __dict__.
+    __slots__ = ("bits", "start_frame", "end_frame")
+    
+    def __init__(self, buttons: Mapping[Button, bool] | int, start_frame: int, end_frame: int):
+        # Bitmask of Buttons pressed, see Button.bit.
+        if isinstance(buttons, int):
+            self.bits = buttons
+        elif isinstance(buttons, ButtonsView):
+            self.bits = buttons.bits
+        else:
+            self.bits = buttonsToBits(buttons)
         # Frame number that this Input began on, inclusive.
         self.start_frame = start_frame
         # Frame number that this Input was released on, exclusive (self.buttons changed on this frame).
         self.end_frame = end_frame
         
+    @property
+    def buttons(self) -> ButtonsView:
+        '''
+        dict[Button, bool]-like view of self.bits.
+        '''
+        return ButtonsView(self.bits)
+    
+    @buttons.setter
+    def buttons(self, buttons: Mapping[Button, bool]) -> None:
+        self.bits = buttonsToBits(buttons)
+        
     # https://stackoverflow.com/questions/390250/elegant-ways-to-support-equivalence-equality-in-python-classes
     def __eq__(self, other):
         if isinstance(other, Input):
-            return self.buttons == other.buttons and self.start_frame == other.start_frame and self.end_frame == other.end_frame
+            return self.bits == other.bits and self.start_frame == other.start_frame and self.end_frame == other.end_frame
         return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"Input({self.bits:#x}, {self.start_frame}, {self.end_frame})"
+
+class InputHistorySnapshot():
+    '''
+    Preallocated storage for InputHistory.saveState(), meant to be reused every frame.
+    '''
+    __slots__ = ("slots", "head", "size", "last_end_frame")
+    
+    def __init__(self, capacity: int):
+        self.slots: list[Input | None] = [None] * capacity
+        self.head = 0
+        self.size = 0
+        self.last_end_frame = 0
+
+class InputRingBuffer():
+    '''
+    Fixed-capacity list of Inputs, oldest first.
+    Once full, appending overwrites the oldest Input instead of shifting every element down.
+    '''
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"InputRingBuffer capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self._slots: list[Input | None] = [None] * capacity
+        # Slot of the oldest Input
+        self._head = 0
+        self._size = 0
+        
+    def __len__(self) -> int:
+        return self._size
+    
+    def __getitem__(self, index: int) -> Input:
+        if index < 0:
+            index = index + self._size
+        if index < 0 or index >= self._size:
+            raise IndexError("InputRingBuffer index out of range")
+        return self._slots[(self._head + index) % self.capacity]
+    
+    def __iter__(self) -> Iterator[Input]:
+        for i in range(self._size):
+            yield self._slots[(self._head + i) % self.capacity]
+            
+    def __reversed__(self) -> Iterator[Input]:
+        for i in range(self._size - 1, -1, -1):
+            yield self._slots[(self._head + i) % self.capacity]
+    
+    def append(self, input: Input) -> None:
+        if self._size < self.capacity:
+            self._slots[(self._head + self._size) % self.capacity] = input
+            self._size = self._size + 1
+        else:
+            self._slots[self._head] = input
+            self._head = (self._head + 1) % self.capacity
+            
+    def clear(self) -> None:
+        self._slots[:] = [None] * self.capacity
+        self._head = 0
+        self._size = 0
+        
+    def saveState(self, snapshot: InputHistorySnapshot) -> None:
+        '''
+        Copies the slot references (not the Inputs) into snapshot.
+        Only the newest Input is ever modified after being appended (its end_frame grows),
+        so its end_frame is the only Input value that needs saving.
+        '''
+        snapshot.slots[:] = self._slots
+        snapshot.head = self._head
+        snapshot.size = self._size
+        if self._size > 0:
+            snapshot.last_end_frame = self[-1].end_frame
+        
+    def loadState(self, snapshot: InputHistorySnapshot) -> None:
+        self._slots[:] = snapshot.slots
+        self._head = snapshot.head
+        self._size = snapshot.size
+        if self._size > 0:
+            self[-1].end_frame = snapshot.last_end_frame
+    
+    def findLatestStartingBy(self, frame_number: int) -> Input:
+        '''
+        Takes a frame number, and binary searches for the newest Input with start_frame <= frame_number.
+        
+        Assumes Inputs were appended in start_frame order,
+        and that frame_number is not before the oldest Input's start_frame.
+        '''
+        slots = self._slots
+        capacity = self.capacity
+        head = self._head
+        low = 0
+        high = self._size
+        while high - low > 1:
+            mid = (low + high) // 2
+            if slots[(head + mid) % capacity].start_frame <= frame_number:
+                low = mid
+            else:
+                high = mid
+        return slots[(head + low) % capacity]
 
 class InputHistory():
-    def __init__(self, player: str):
+    def __init__(self, player: str, max_inputs: int = constants.INPUT_HISTORY_LENGTH):
         self.player = player # "P1" or "P2"
-        self.inputs: list[Input] = []
+        # Don't need to keep inputs after a certain amount of time has passed.
+        # Down/back charge history will be stored in game state, so deleting old inputs has no effect on charge moves.
+        self.inputs = InputRingBuffer(max_inputs)
+        # Render model of the input history column, see getDisplay()
+        self.display: InputDisplay | None = None
     
     def append(self, input: Input) -> None:
         '''
         Takes an Input and adds it to self.inputs,
-        and removes old inputs from self.inputs.
+        overwriting the oldest input once self.inputs is full.
         '''
-        if len(self.inputs) > 0 and input.buttons == self.inputs[-1].buttons:
+        if len(self.inputs) > 0 and input.bits == self.inputs[-1].bits:
             # If input buttons are the same as last input, combine it with last input instead of making a duplicate.
             self.inputs[-1].end_frame = self.inputs[-1].end_frame + 1
         else:
             self.inputs.append(input)
             
-        # Don't need to keep inputs after a certain amount of time has passed.
-        # Down/back charge history will be stored in game state, so deleting old inputs has no effect on charge moves.
-        if len(self.inputs) > 30:
-            self.inputs.pop(0)
+    def saveState(self, snapshot: InputHistorySnapshot | None = None) -> InputHistorySnapshot:
+        '''
+        Saves self.inputs into snapshot (a new one if None is given) and returns it.
+        '''
+        if snapshot is None:
+            snapshot = InputHistorySnapshot(self.inputs.capacity)
+        self.inputs.saveState(snapshot)
+        return snapshot
+    
+    def loadState(self, snapshot: InputHistorySnapshot) -> None:
+        '''
+        Restores self.inputs to what it was when snapshot was saved.
+        '''
+        self.inputs.loadState(snapshot)
             
-    def getFrameButtons(self, frame_number: int) -> dict[Button, bool]:
+    def getFrameButtons(self, frame_number: int) -> ButtonsView:
         '''
         Takes a frame number, and returns the dict of buttons pressed on that frame.
         
         Throws an IndexError if no input can be found for that frame number.
         '''
-        if frame_number < self.inputs[0].start_frame:
-            raise IndexError(f"Frame number {frame_number} < earliest input start frame {self.inputs[0].start_frame}")
-        elif frame_number >= self.inputs[-1].end_frame:
-            raise IndexError(f"Frame number {frame_number} >= latest input end frame {self.inputs[-1].end_frame}")
+        return self.getFrameInput(frame_number).buttons
+    
+    def getFrameBits(self, frame_number: int) -> int:
+        '''
+        Bitmask equivalent of getFrameButtons().
+        '''
+        return self.getFrameInput(frame_number).bits
+    
+    def getFrameInput(self, frame_number: int) -> Input:
+        '''
+        Takes a frame number, and returns the Input covering that frame.
+        The newest Input is checked first, since that is the usual case;
+        any other frame is found by binary search, so lookups stay O(log max_inputs).
         
-        for input in reversed(self.inputs):
-            if frame_number >= input.start_frame and frame_number < input.end_frame:
-                return input.buttons
+        Throws an IndexError if no input can be found for that frame number.
+        '''
+        if len(self.inputs) == 0:
+            raise IndexError(f"Frame number {frame_number} not found in empty input history")
+        
+        latest = self.inputs[-1]
+        if frame_number >= latest.end_frame:
+            raise IndexError(f"Frame number {frame_number} >= latest input end frame {latest.end_frame}")
+        elif frame_number >= latest.start_frame:
+            return latest
+        
+        earliest = self.inputs[0]
+        if frame_number < earliest.start_frame:
+            raise IndexError(f"Frame number {frame_number} < earliest input start frame {earliest.start_frame}")
+        
+        input = self.inputs.findLatestStartingBy(frame_number)
+        if frame_number < input.end_frame:
+            return input
         
         raise IndexError(f"Frame number {frame_number} not found in inputs")
     
     def render(self, display: pg.surface.Surface) -> None:
-        # Font that supports Unicode arrows
-        font = pg.font.Font("assets/seguisym.ttf", 20)
-    
-        for i in range(len(self.inputs)):
-            # Print the newest inputs first, closer to the top.
-            input = self.inputs[len(self.inputs) - 1 - i]
+        inputDisplay = self.getDisplay()
+        inputDisplay.update()
+        display.blit(inputDisplay.surface, (self.getColumnX(), inputDisplay.rowTop), special_flags=pg.BLEND_PREMULTIPLIED)
             
-            arrow_direction = directionsToArrow(input.buttons)
-            attack_buttons = attackButtonsToLetters(input.buttons)
-            input_string = f"{arrow_direction} {attack_buttons} {input.end_frame - input.start_frame}"
-            
-            text = font.render(f"{input_string}", True, constants.WHITE)
-            # TODO remove magic numbers that don't account for window size
-            if self.player == "P1":
-                x = 10
-            else:
-                x = constants.WINDOW_WIDTH - 80
-            display.blit(text, (x, 15 * i))
\ No newline at end of file
+    def getDisplay(self) -> InputDisplay:
+        '''
+        Returns the InputDisplay rendering this InputHistory, creating it on first use.
+        '''
+        if self.display is None:
+            self.display = InputDisplay(self)
+        return self.display
+    
+    def getColumnX(self) -> int:
+        '''
+        Returns the x position the input history is rendered at.
+        '''
+        # TODO remove magic numbers that don't account for window size
+        if self.player == "P1":
+            return 10
+        else:
+            return constants.WINDOW_WIDTH - 80
+
+class InputDisplay():
+    '''
+    Incremental render model of an InputHistory's column of rows (e.g. "→ P 12"), newest at the top.
+    
+    Rows are drawn once onto a column surface that scrolls down a row whenever a new Input arrives,
+    so rows falling off the bottom are evicted for free and each frame only redraws the newest row,
+    whose frame count grows while the buttons are held. Row text isn't rendered per frame either:
+    the arrow and letters are rendered once per button bitmask, and frame counts are drawn from digit surfaces.
+    The column can show more rows than the InputHistory keeps, since drawn rows stay on the surface.
+    
+    The whole column is only redrawn when the InputHistory changes other than by appending, i.e. after loadState().
+    Its pixels are premultiplied by alpha, so it needs blitting with pg.BLEND_PREMULTIPLIED,
+    which is a few times faster than a regular alpha blit.
+    '''
+    def __init__(self, inputHistory: InputHistory, rows: int = constants.INPUT_DISPLAY_ROWS) -> None:
+        self.inputHistory = inputHistory
+        self.rows = rows
+        font = assetManager.getFont(*INPUT_DISPLAY_FONT)
+        # Rows are drawn ROW_HEIGHT apart but rendered text is taller, mostly blank above the glyphs:
+        # rows are cropped to ROW_HEIGHT from the top of the glyphs, so they don't overlap on the surface
+        self.rowTop = font.render("↙↗PKSHD0123456789", True, constants.WHITE).get_bounding_rect().top
+        self.digits = [self.renderText(str(digit)) for digit in range(10)]
+        width = self.renderText("↙ PKSHD ").get_width() + 4 * self.digits[0].get_width()
+        self.surface = pg.Surface((width, rows * ROW_HEIGHT), pg.SRCALPHA)
+        # Arrow and letters of each button bitmask seen so far
+        self.prefixes: dict[int, pg.Surface] = {}
+        
+        # Newest Input drawn (in the top row) and the frame count drawn for it
+        self.newest: Input | None = None
+        self.newestLength = 0
+        # Bumped whenever the top row, or any other row, is redrawn, for renderer.InputHistorySprite
+        self.newestVersion = 0
+        self.olderVersion = 0
+        
+    def renderText(self, text: str) -> pg.Surface:
+        return assetManager.renderText(assetManager.getFont(*INPUT_DISPLAY_FONT), text, constants.WHITE).premul_alpha()
+        
+    def update(self) -> None:
+        '''
+        Brings the column up to date with the InputHistory. Cheap to call when nothing changed.
+        '''
+        inputs = self.inputHistory.inputs
+        newest = inputs[-1] if len(inputs) > 0 else None
+        if newest is self.newest:
+            if newest is not None and newest.end_frame - newest.start_frame != self.newestLength:
+                self.drawRow(0, newest)
+            return
+        
+        # Inputs appended since the last update(), newest first
+        added = []
+        for input in reversed(inputs):
+            if input is self.newest:
+                break
+            if self.newest is not None and input.start_frame <= self.newest.start_frame:
+                # Replaced rather than appended to, e.g. by loadState()
+                self.redrawAll()
+                return
+            added.append(input)
+            if len(added) == self.rows:
+                break
+        else:
+            if self.newest is not None:
+                self.redrawAll()
+                return
+        
+        if self.newest is not None and self.newest.end_frame - self.newest.start_frame != self.newestLength:
+            # Held for a few more frames before being replaced
+            self.drawRow(0, self.newest)
+        for input in reversed(added):
+            self.surface.scroll(0, ROW_HEIGHT)
+            self.drawRow(0, input)
+        self.olderVersion = self.olderVersion + 1
+        
+    def redrawAll(self) -> None:
+        self.surface.fill((0, 0, 0, 0))
+        self.newest = None
+        for (row, input) in enumerate(reversed(self.inputHistory.inputs)):
+            if row == self.rows:
+                break
+            self.drawRow(row, input)
+        self.olderVersion = self.olderVersion + 1
+        
+    def drawRow(self, row: int, input: Input) -> None:
+        '''
+        Draws input (its arrow, letters and frame count) over the given row, 0 being the top.
+        '''
+        y = row * ROW_HEIGHT
+        self.surface.fill((0, 0, 0, 0), (0, y, self.surface.get_width(), ROW_HEIGHT))
+        prefix = self.prefixes.get(input.bits)
+        if prefix is None:
+            buttons = input.buttons
+            prefix = self.renderText(f"{directionsToArrow(buttons)} {attackButtonsToLetters(buttons)} ")
+            self.prefixes[input.bits] = prefix
+        self.surface.blit(prefix, (0, y), (0, self.rowTop, prefix.get_width(), ROW_HEIGHT), pg.BLEND_PREMULTIPLIED)
+        
+        length = input.end_frame - input.start_frame
+        x = prefix.get_width()
+        for digit in str(length):
+            image = self.digits[int(digit)]
+            self.surface.blit(image, (x, y), (0, self.rowTop, image.get_width(), ROW_HEIGHT), pg.BLEND_PREMULTIPLIED)
+            x = x + image.get_width()
+        
+        if row == 0:
+            self.newest = input
+            self.newestLength = length
+            self.newestVersion = self.newestVersion + 1
+
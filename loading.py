@@ -0,0 +1,96 @@
+'''
+Startup loading: compiling character definitions, reading sprites and finding fonts on a background thread,
+while the main thread keeps the window responsive and draws a loading screen.
+
+Only work that doesn't touch the display happens on the loading thread (SDL wants the window used from one thread):
+images are read from disk there, and converted for the display by AssetManager.getImage() on the main thread.
+'''
+from __future__ import annotations
+import threading
+from typing import Callable
+
+import pygame as pg
+
+import character_data
+import constants
+from asset_manager import assetManager
+
+# (description, function) pairs, run in order
+Task = tuple[str, Callable[[], object]]
+
+LOADING_BAR_SIZE = (320, 16)
+
+class BackgroundLoader():
+    def __init__(self, tasks: list[Task]) -> None:
+        self.tasks = tasks
+        # Number of tasks finished so far, and the exception that stopped loading, if any
+        self.completed = 0
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(target=self.run, name="BackgroundLoader", daemon=True)
+
+    def start(self) -> BackgroundLoader:
+        self.thread.start()
+        return self
+
+    def run(self) -> None:
+        try:
+            for (_, task) in self.tasks:
+                task()
+                self.completed = self.completed + 1
+        except BaseException as error:
+            self.error = error
+
+    def isDone(self) -> bool:
+        return not self.thread.is_alive()
+
+    def getProgress(self) -> float:
+        '''
+        Returns the fraction of tasks finished, from 0.0 to 1.0.
+        '''
+        if len(self.tasks) == 0:
+            return 1.0
+        return self.completed / len(self.tasks)
+
+    def getDescription(self) -> str:
+        '''
+        Returns the description of the task being run, or "" once they have all finished.
+        '''
+        if self.completed >= len(self.tasks):
+            return ""
+        return self.tasks[self.completed][0]
+
+    def join(self) -> None:
+        '''
+        Waits for loading to finish, raising the exception any task raised.
+        '''
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+def getStartupTasks(characterPaths: list[str]) -> list[Task]:
+    '''
+    Takes the character definitions a match will use,
+    and returns the tasks loading everything GameState and the renderer would otherwise load on creation.
+    '''
+    tasks: list[Task] = []
+    for path in dict.fromkeys(characterPaths):
+        tasks.append((f"Compiling {path}", lambda path=path: character_data.getCharacterData(path)))
+        tasks.append((f"Loading sprites of {path}",
+                      lambda path=path: assetManager.preloadImages([character_data.getCharacterData(path).sprite])))
+    # The HUD's system font; creating the Font itself is left to the main thread
+    tasks.append(("Finding fonts", lambda: assetManager.findSysFont("Verdana")))
+    return tasks
+
+def renderLoadingScreen(window: pg.Surface, progress: float) -> None:
+    '''
+    Draws a progress bar in the middle of window, and updates the display.
+    Text is left out, since fonts may still be loading.
+    '''
+    window.fill(constants.BLACK)
+    outline = pg.Rect((0, 0), LOADING_BAR_SIZE)
+    outline.center = window.get_rect().center
+    bar = outline.inflate(-4, -4)
+    bar.width = int(bar.width * max(0.0, min(1.0, progress)))
+    pg.draw.rect(window, constants.WHITE, outline, 1)
+    pg.draw.rect(window, constants.RED, bar)
+    pg.display.flip()
@@ -1,43 +1,145 @@
+'''
+The game: a window, two keyboard-controlled players, and the game loop.
+
+Importing this module has no side effects; run it (python main.py) to play.
+Only the pygame subsystems the game uses are initialized (video and events; fonts on first use by assetManager),
+the window opens right away, and everything else is loaded on a background thread behind a loading screen.
+'''
+import os
 import sys
+import time
 import pygame as pg
 from pygame import locals
 
 import fps_counter as fps
 import constants
 import inputs
+import loading
+from ai import AIController
+from input_capture import InputCapture
+from replay import ReplayRecorder
+from spectator import SpectatorBroadcaster, SpectatorServer
+from game_loop import NANOSECONDS_PER_SECOND, FixedTimestep
 from gamestate import GameState
+from profiler import profiler
+from renderer import DirtyRectRenderer
 
-pg.init()
-window = pg.display.set_mode((constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT))
-fpsCounter = fps.FpsCounter()
-
-inputHistories = {}
-inputHistories["P1"] = inputs.InputHistory("P1")
-inputHistories["P2"] = inputs.InputHistory("P2")
-gameState = GameState(inputHistories)
-
-def processInput():
-    # Method (1): Use key.get_pressed()
-    parseKeysPressed()
-    
-    # Method (2): Event queue. For special keys unrelated to character control (debug options)
-    for event in pg.event.get():
-        if event.type == pg.QUIT:
-            cleanupGame()
-            break
-        elif event.type == pg.KEYDOWN:
-            if event.key == locals.K_F7:
-                constants.SHOW_INPUT_HISTORY = not constants.SHOW_INPUT_HISTORY  
-
-def parseKeysPressed():
-    '''
-    Checks what keys are currently being pressed, 
-    and creates a corresponding Input in input_history.
-    '''
-    p1_input = inputs.keysPressedToInput(gameState.current_frame, "P1")
-    inputHistories["P1"].append(p1_input)
-    p2_input = inputs.keysPressedToInput(gameState.current_frame, "P2")
-    inputHistories["P2"].append(p2_input)    
+class Game():
+    def __init__(self, window: pg.Surface) -> None:
+        self.window = window
+        self.fpsCounter = fps.FpsCounter()
+
+        self.inputHistories = {}
+        self.inputHistories["P1"] = inputs.InputHistory("P1")
+        self.inputHistories["P2"] = inputs.InputHistory("P2")
+        self.gameState = GameState(self.inputHistories)
+        self.renderer = DirtyRectRenderer(window, self.gameState, self.fpsCounter, self.inputHistories)
+
+        # The simulation runs at exactly SIMULATION_RATE steps per second:
+        # zero or more steps per rendered frame, however fast (or slow) rendering is.
+        self.timestep = FixedTimestep(constants.SIMULATION_RATE)
+        self.running = True
+
+        # Timestamped key events, drained every loop iteration and while waiting for the next frame
+        self.inputCapture = InputCapture()
+        self.inputCapture.sync()
+        # Created the first time constants.AI_PLAYER is set
+        self.ai: AIController | None = None
+
+        self.broadcaster: SpectatorBroadcaster | None = None
+        if constants.SPECTATOR_PORT is not None:
+            server = SpectatorServer("0.0.0.0", constants.SPECTATOR_PORT).start()
+            self.broadcaster = SpectatorBroadcaster(self.gameState, server)
+
+        self.recorder: ReplayRecorder | None = None
+        if constants.REPLAY_DIR is not None:
+            os.makedirs(constants.REPLAY_DIR, exist_ok=True)
+            path = os.path.join(constants.REPLAY_DIR, time.strftime("%Y%m%d-%H%M%S.fgrp"))
+            self.recorder = ReplayRecorder(open(path, "wb"), self.gameState, inputCapture=self.inputCapture)
+
+    def processEvents(self):
+        '''
+        Called once per rendered frame.
+        Character control is handled by parseKeysPressed() instead, once per simulation step.
+        '''
+        # Event queue. For special keys unrelated to character control (debug options)
+        self.inputCapture.pump()
+        for event in self.inputCapture.takeOtherEvents():
+            if event.type == pg.QUIT:
+                if self.recorder is not None:
+                    self.recorder.close()
+                cleanupGame()
+                break
+            elif event.type == pg.KEYDOWN:
+                if event.key == locals.K_F6:
+                    # Training mode: the CPU plays P2
+                    constants.AI_PLAYER = None if constants.AI_PLAYER else "P2"
+                elif event.key == locals.K_F7:
+                    constants.SHOW_INPUT_HISTORY = not constants.SHOW_INPUT_HISTORY
+                elif event.key == locals.K_F8:
+                    constants.SHOW_PROFILER = not constants.SHOW_PROFILER
+                elif event.key == locals.K_F9:
+                    # Frame times (and the input latency of each frame) of the last few seconds, for offline analysis
+                    profiler.exportCsv("profile.csv")
+                    profiler.exportJson("profile.json")
+
+    def parseKeysPressed(self, boundary: int, now: int):
+        '''
+        Creates an Input in input_history for each player from the keys pressed up to boundary
+        (see InputCapture.buildInputs()), or, without constants.EVENT_INPUT_CAPTURE, currently being pressed.
+        constants.AI_PLAYER's Input comes from the AIController instead.
+        '''
+        if constants.EVENT_INPUT_CAPTURE:
+            frame_inputs = self.inputCapture.buildInputs(self.gameState.current_frame, boundary, now)
+        else:
+            frame_inputs = inputs.keysPressedToInputs(self.gameState.current_frame)
+            self.inputCapture.events.clear()
+        for (player, frame_input) in frame_inputs.items():
+            if player != constants.AI_PLAYER:
+                self.inputHistories[player].append(frame_input)
+        if constants.AI_PLAYER is not None:
+            if self.ai is None or self.ai.player != constants.AI_PLAYER:
+                self.ai = AIController(self.gameState, constants.AI_PLAYER)
+            self.ai.update()
+
+    def update(self):
+        self.gameState.update()
+        if self.recorder is not None:
+            self.recorder.record()
+        if self.broadcaster is not None:
+            self.broadcaster.record()
+
+    def render(self, alpha):
+        # Only redraws (and updates the display for) the parts of the window that changed.
+        # Debug information (FPS, inputs) is layered on top.
+        if not constants.INTERPOLATE_RENDERING:
+            alpha = 1.0
+        self.renderer.render(alpha)
+
+    def run(self):
+        while self.running:
+            frame_start = time.perf_counter_ns()
+            profiler.beginFrame()
+            self.processEvents()
+            now = time.perf_counter_ns()
+            steps = self.timestep.advance(now)
+            first_step = self.timestep.step_count - steps
+            for step in range(steps):
+                # When catching up on several steps, each gets the key events up to its own boundary,
+                # and the newest gets everything so far, so nothing waits for the next frame
+                boundary = now if step == steps - 1 else self.timestep.getStepTime(first_step + step)
+                profiler.begin("input")
+                self.parseKeysPressed(boundary, now)
+                profiler.end("input")
+                profiler.begin("update")
+                self.update()
+                profiler.end("update")
+            self.render(self.timestep.alpha)
+
+            # Rather than sleeping off the rest of the frame, keep timestamping key events as they come in
+            if constants.FRAME_RATE_CAP:
+                self.inputCapture.waitUntil(frame_start + NANOSECONDS_PER_SECOND // constants.FRAME_RATE_CAP)
+            self.fpsCounter.clock.tick()
 
 def cleanupGame():
     '''
@@ -45,29 +147,30 @@ def cleanupGame():
     '''
     pg.quit()
     sys.exit()
-        
-def update():
-    gameState.update()
-
-def render():
-    window.fill(constants.BLACK)
-    
-    gameState.render(window)
-    
-    # debug information (FPS, inputs) on top
-    fpsCounter.render(window)
-    
-    if constants.SHOW_INPUT_HISTORY:
-        for ih in inputHistories.values():
-            ih.render(window)
-    
-    pg.display.update()
-
-running = True
-while running:
-    processInput()
-    update()
-    render()
-    
-    fpsCounter.clock.tick(constants.FRAME_RATE_CAP)
 
+def load(window: pg.Surface) -> None:
+    '''
+    Loads the assets a match needs on a background thread, drawing a loading screen in window until they are loaded.
+    '''
+    loader = loading.BackgroundLoader(loading.getStartupTasks([constants.DEFAULT_CHARACTER] * 2)).start()
+    clock = pg.time.Clock()
+    while not loader.isDone():
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                cleanupGame()
+        loading.renderLoadingScreen(window, loader.getProgress())
+        clock.tick(constants.FRAME_RATE_CAP or constants.SIMULATION_RATE)
+    loader.join()
+
+def main():
+    # Rather than pg.init(), which also starts audio, joysticks and so on
+    pg.display.init()
+    window = pg.display.set_mode((constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT))
+    loading.renderLoadingScreen(window, 0.0)
+    load(window)
+
+    profiler.enabled = True
+    Game(window).run()
+
+if __name__ == "__main__":
+    main()
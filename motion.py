@@ -0,0 +1,292 @@
+'''
+Motion input (special move command) recognition.
+
+Commands are written in numpad notation relative to the Character's facing (6 is forward, 4 is back, 2 is down),
+optionally starting with a charge direction in brackets and ending with the attack button letters
+used by inputs.attackButtonsToLetters(), e.g.:
+
+    236P     quarter circle forward + Punch
+    623P     dragon punch + Punch
+    [4]6P    charge back, then forward + Punch
+    66       double tap forward (dash)
+
+The directionsToArrow() arrows (as seen facing right) can be used in place of digits, e.g. "↓↘→P".
+
+All of a Character's commands are compiled into one prefix tree of direction steps.
+MotionRecognizer walks it incrementally as each frame's buttons arrive,
+only doing work when the direction or buttons change,
+instead of scanning the InputHistory once per command every frame.
+'''
+from __future__ import annotations
+
+from inputs import Button, DIRECTION_BITS
+
+NUMPAD_ARROWS = {'↙': 1, '↓': 2, '↘': 3, '←': 4, ' ': 5, '→': 6, '↖': 7, '↑': 8, '↗': 9}
+
+BUTTON_LETTERS = {'P': Button.PUNCH, 'K': Button.KICK, 'S': Button.SLASH, 'H': Button.HEAVY, 'D': Button.DUST}
+
+# Numpad directions that count as holding each charge direction
+CHARGE_GROUPS = {
+    4: frozenset((1, 4, 7)),
+    2: frozenset((1, 2, 3)),
+    6: frozenset((3, 6, 9)),
+    8: frozenset((7, 8, 9))
+}
+
+def _createNumpadTable(facingLeft: bool) -> dict[int, int]:
+    '''
+    Returns the numpad direction of every combination of SOCD cleaned direction bits.
+    '''
+    table = {}
+    back = Button.RIGHT.bit if facingLeft else Button.LEFT.bit
+    forward = Button.LEFT.bit if facingLeft else Button.RIGHT.bit
+    for (horizontal, column) in ((back, 1), (0, 2), (forward, 3)):
+        for (vertical, row) in ((Button.DOWN.bit, 0), (0, 3), (Button.UP.bit, 6)):
+            table[horizontal | vertical] = column + row
+    return table
+
+# Indexed by facingLeft
+NUMPAD_TABLES = (_createNumpadTable(False), _createNumpadTable(True))
+
+def directionsToNumpad(bits: int, facingLeft: bool) -> int:
+    '''
+    Takes a SOCD cleaned button bitmask and whether the Character faces left,
+    and returns the numpad notation of its direction (5 for neutral).
+    '''
+    return NUMPAD_TABLES[facingLeft][bits & DIRECTION_BITS]
+
+class MotionCommand():
+    def __init__(self, name: str, notation: str, window: int = 12, buffer: int = 8, charge_frames: int = 40) -> None:
+        '''
+        window is how many frames may pass between consecutive directions of the motion,
+        and buffer is how many frames after completing the motion the buttons may be pressed.
+        charge_frames is how long the charge direction, if any, must be held.
+        '''
+        self.name = name
+        self.notation = notation
+        self.window = window
+        self.buffer = buffer
+        self.charge_frames = charge_frames
+
+        # Numpad direction to charge (see CHARGE_GROUPS), or None
+        self.charge: int | None = None
+        self.directions: list[int] = []
+        # Buttons that must all be held, at least one of them newly pressed. 0 completes on the last direction.
+        self.buttons = 0
+
+        i = 0
+        if notation.startswith('['):
+            close = notation.index(']')
+            self.charge = self.parseDirection(notation[1:close])
+            if self.charge not in CHARGE_GROUPS:
+                raise ValueError(f"Can't charge direction {self.charge} in {notation!r}")
+            i = close + 1
+        while i < len(notation) and notation[i] not in BUTTON_LETTERS:
+            self.directions.append(self.parseDirection(notation[i]))
+            i = i + 1
+        for letter in notation[i:]:
+            if letter not in BUTTON_LETTERS:
+                raise ValueError(f"Unknown button {letter!r} in {notation!r}")
+            self.buttons = self.buttons | BUTTON_LETTERS[letter].bit
+        if len(self.directions) == 0:
+            raise ValueError(f"No motion in {notation!r}")
+
+        # Longer motions take priority when several commands complete on the same frame (e.g. 632146H over 236P)
+        self.priority = -(len(self.directions) + (1 if self.charge is not None else 0))
+
+    @staticmethod
+    def parseDirection(char: str) -> int:
+        if char in NUMPAD_ARROWS:
+            return NUMPAD_ARROWS[char]
+        if len(char) == 1 and '1' <= char <= '9':
+            return int(char)
+        raise ValueError(f"Unknown direction {char!r}")
+
+    def __repr__(self) -> str:
+        return f"MotionCommand({self.name!r}, {self.notation!r})"
+
+class MotionNode():
+    '''
+    One step of the compiled prefix tree: reached by entering a direction, within timeout frames of the previous step.
+    '''
+    __slots__ = ("direction", "children", "commands", "timeout")
+
+    def __init__(self, direction: int = 0) -> None:
+        # Direction entered to reach this node (0 for roots)
+        self.direction = direction
+        self.children: dict[int, MotionNode] = {}
+        # Commands whose motion is complete at this node
+        self.commands: list[MotionCommand] = []
+        self.timeout = 0
+
+class CompiledCommands():
+    '''
+    A list of MotionCommands compiled into a prefix tree of direction steps, shareable between MotionRecognizers.
+    '''
+    def __init__(self, commands: list[MotionCommand]) -> None:
+        self.commands = commands
+        self.root = MotionNode()
+        # Roots of charge commands' trees, activated when their charge is released: {charge direction: {frames: root}}
+        self.chargeRoots: dict[int, dict[int, MotionNode]] = {}
+        # Any of these being newly pressed can complete a command
+        self.buttonBits = 0
+
+        for command in commands:
+            if command.charge is None:
+                node = self.root
+            else:
+                charge_roots = self.chargeRoots.setdefault(command.charge, {})
+                node = charge_roots.setdefault(command.charge_frames, MotionNode())
+                node.timeout = max(node.timeout, command.window)
+
+            for (i, direction) in enumerate(command.directions):
+                node = node.children.setdefault(direction, MotionNode(direction))
+                is_last = i == len(command.directions) - 1
+                node.timeout = max(node.timeout, command.buffer if is_last else command.window)
+            node.commands.append(command)
+            self.buttonBits = self.buttonBits | command.buttons
+
+        # Every node in a fixed order, so MotionRecognizer states can refer to nodes by index (see encodeState())
+        self.nodes: list[MotionNode] = []
+        pending = [self.root] + [root for charge_roots in self.chargeRoots.values() for root in charge_roots.values()]
+        while len(pending) > 0:
+            node = pending.pop(0)
+            self.nodes.append(node)
+            pending.extend(node.children.values())
+        self.nodeIndices = {node: index for (index, node) in enumerate(self.nodes)}
+
+class MotionState():
+    '''
+    Storage for MotionRecognizer.saveState(), meant to be reused every frame (e.g. by rollback).
+    '''
+    __slots__ = ("lastBits", "lastDirection", "active", "chargeStart")
+
+    def __init__(self) -> None:
+        self.lastBits = 0
+        self.lastDirection = 5
+        self.active: dict[MotionNode, int] = {}
+        self.chargeStart: dict[int, int] = {}
+
+class MotionRecognizer():
+    '''
+    Runtime state of recognizing CompiledCommands for one Character. Call update() once per frame.
+    '''
+    def __init__(self, commands: CompiledCommands | list[MotionCommand]) -> None:
+        if not isinstance(commands, CompiledCommands):
+            commands = CompiledCommands(commands)
+        self.compiled = commands
+        self.lastBits = 0
+        self.lastDirection = 5
+        # Nodes reached (and not yet timed out) with the frame they were reached on
+        self.active: dict[MotionNode, int] = {}
+        # Frame each charge direction started being held on, if it is being held
+        self.chargeStart: dict[int, int] = {}
+
+    def update(self, bits: int, frame_number: int, facingLeft: bool) -> list[MotionCommand]:
+        '''
+        Takes a frame's button bitmask, and returns the commands completed on that frame, highest priority first.
+        '''
+        direction = NUMPAD_TABLES[facingLeft][bits & DIRECTION_BITS]
+        if bits == self.lastBits and direction == self.lastDirection:
+            return []
+
+        # (command, frame its motion was completed on)
+        completed: list[tuple[MotionCommand, int]] = []
+        if direction != self.lastDirection:
+            self.enterDirection(direction, frame_number, completed)
+
+        newly_pressed = bits & ~self.lastBits & self.compiled.buttonBits
+        self.lastBits = bits
+        if newly_pressed:
+            for (node, reached_frame) in self.active.items():
+                for command in node.commands:
+                    if (command.buttons & newly_pressed and command.buttons & ~bits == 0
+                            and frame_number - reached_frame <= command.buffer):
+                        completed.append((command, reached_frame))
+
+        if len(completed) > 1:
+            # Longest motion first, then the most recently completed one
+            completed.sort(key=lambda entry: (entry[0].priority, -entry[1]))
+        return [command for (command, _) in completed]
+
+    def enterDirection(self, direction: int, frame_number: int, completed: list[tuple[MotionCommand, int]]) -> None:
+        previous = self.lastDirection
+        self.lastDirection = direction
+
+        for (charge, charge_roots) in self.compiled.chargeRoots.items():
+            group = CHARGE_GROUPS[charge]
+            if direction in group:
+                if previous not in group:
+                    self.chargeStart[charge] = frame_number
+            elif charge in self.chargeStart:
+                held = frame_number - self.chargeStart.pop(charge)
+                for (charge_frames, root) in charge_roots.items():
+                    if held >= charge_frames:
+                        self.active[root] = frame_number
+
+        reached = []
+        expired = []
+        for (node, reached_frame) in self.active.items():
+            if frame_number - reached_frame > node.timeout:
+                expired.append(node)
+                continue
+            child = node.children.get(direction)
+            # Repeating a direction (a double tap, e.g. 66) has to be a new tap from neutral, not e.g. 636
+            if child is not None and (direction != node.direction or previous == 5):
+                reached.append(child)
+        for node in expired:
+            del self.active[node]
+
+        child = self.compiled.root.children.get(direction)
+        if child is not None:
+            reached.append(child)
+
+        for node in reached:
+            self.active[node] = frame_number
+            for command in node.commands:
+                if command.buttons == 0:
+                    completed.append((command, frame_number))
+
+    def saveState(self, state: MotionState | None = None) -> MotionState:
+        '''
+        Copies the recognizer's state into state (a new one if None is given) and returns it.
+        Reusing the same state avoids allocating anything, like GameState.saveState().
+        '''
+        if state is None:
+            state = MotionState()
+        state.lastBits = self.lastBits
+        state.lastDirection = self.lastDirection
+        state.active.clear()
+        state.active.update(self.active)
+        state.chargeStart.clear()
+        state.chargeStart.update(self.chargeStart)
+        return state
+
+    def loadState(self, state: MotionState) -> None:
+        self.lastBits = state.lastBits
+        self.lastDirection = state.lastDirection
+        self.active.clear()
+        self.active.update(state.active)
+        self.chargeStart.clear()
+        self.chargeStart.update(state.chargeStart)
+
+    def encodeState(self, state: MotionState) -> list:
+        '''
+        Takes a saveState() state, and returns it as JSON-serializable lists and ints, with nodes as indices,
+        for sending to another process (see spectator.py) that compiled the same commands.
+        '''
+        return [state.lastBits, state.lastDirection,
+                [[self.compiled.nodeIndices[node], frame] for (node, frame) in state.active.items()],
+                [[charge, frame] for (charge, frame) in state.chargeStart.items()]]
+
+    def decodeState(self, data: list) -> MotionState:
+        '''
+        Inverse of encodeState().
+        '''
+        (lastBits, lastDirection, active, chargeStart) = data
+        state = MotionState()
+        state.lastBits = lastBits
+        state.lastDirection = lastDirection
+        state.active.update((self.compiled.nodes[index], frame) for (index, frame) in active)
+        state.chargeStart.update((charge, frame) for (charge, frame) in chargeStart)
+        return state
@@ -0,0 +1,139 @@
+'''
+Per-frame timings of the game loop's subsystems (input polling, simulation, each Character, rendering, display updates).
+
+Each section's time is added up over a rendered frame (a frame can run several simulation steps),
+into ring buffers preallocated for the last `capacity` frames, so recording allocates nothing.
+Shown as a graph by renderer.ProfilerSprite (F8 in main.py), and exportable as CSV or JSON.
+
+Recording is off until profiler.enabled is set, and then costs two perf_counter_ns() calls per section.
+'''
+from __future__ import annotations
+import csv
+import json
+import time
+from array import array
+
+import constants
+
+NANOSECONDS_PER_MILLISECOND = 1_000_000
+NANOSECONDS_PER_MICROSECOND = 1_000
+
+class Profiler():
+    def __init__(self, capacity: int = 600, enabled: bool = False) -> None:
+        self.capacity = capacity
+        self.enabled = enabled
+        # Time from each beginFrame() to the next, in nanoseconds, indexed by frame % capacity
+        self.frame_times = array('q', bytes(8 * capacity))
+        # Time spent in each section per frame, in nanoseconds, indexed by frame % capacity.
+        # Sections are added the first time they are used, and kept in that order.
+        self.sections: dict[str, array] = {}
+        # Start times of the sections currently being measured
+        self.starts: dict[str, int] = {}
+        # Largest value recorded per frame of measurements other than section times (e.g. input latency),
+        # in nanoseconds, indexed by frame % capacity. Exported after the sections, but not graphed.
+        self.peaks: dict[str, array] = {}
+
+        # Frames begun so far; the current frame is frame_count - 1
+        self.frame_count = 0
+        self.frame_start = 0
+
+    def beginFrame(self) -> None:
+        '''
+        Ends the current frame and starts recording the next one. Call once per rendered frame.
+        '''
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self.frame_count > 0:
+            self.frame_times[(self.frame_count - 1) % self.capacity] = now - self.frame_start
+        index = self.frame_count % self.capacity
+        self.frame_times[index] = 0
+        for times in self.sections.values():
+            times[index] = 0
+        for values in self.peaks.values():
+            values[index] = 0
+        self.frame_count = self.frame_count + 1
+        self.frame_start = now
+
+    def begin(self, section: str) -> None:
+        if self.enabled:
+            self.starts[section] = time.perf_counter_ns()
+
+    def end(self, section: str) -> None:
+        '''
+        Adds the time since begin(section) to section's time for the current frame.
+        '''
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter_ns() - self.starts.pop(section)
+        times = self.sections.get(section)
+        if times is None:
+            times = self.sections[section] = array('q', bytes(8 * self.capacity))
+        times[(self.frame_count - 1) % self.capacity] += elapsed
+
+    def recordPeak(self, name: str, value: int) -> None:
+        '''
+        Records value (in nanoseconds) for the current frame, if it is the largest of name's values so far this frame.
+        '''
+        if not self.enabled:
+            return
+        values = self.peaks.get(name)
+        if values is None:
+            values = self.peaks[name] = array('q', bytes(8 * self.capacity))
+        index = (self.frame_count - 1) % self.capacity
+        if value > values[index]:
+            values[index] = value
+
+    def completedFrames(self) -> range:
+        '''
+        Returns the frame numbers still in the ring buffers whose recording has finished, oldest first.
+        '''
+        end = self.frame_count - 1
+        return range(max(0, end - self.capacity + 1), max(0, end))
+
+    def getFrame(self, frame_number: int) -> dict[str, float]:
+        '''
+        Takes a frame number from completedFrames(), and returns its frame and section times, then its peaks,
+        in milliseconds.
+        '''
+        index = frame_number % self.capacity
+        row = {"frame": self.frame_times[index] / NANOSECONDS_PER_MILLISECOND}
+        for (section, times) in self.sections.items():
+            row[section] = times[index] / NANOSECONDS_PER_MILLISECOND
+        for (name, values) in self.peaks.items():
+            row[name] = values[index] / NANOSECONDS_PER_MILLISECOND
+        return row
+
+    def slowFrames(self, deadline: float | None = None) -> list[int]:
+        '''
+        Returns the completed frames that took longer than deadline milliseconds
+        (default: one frame at constants.FRAME_RATE_CAP, or at SIMULATION_RATE when uncapped).
+        '''
+        if deadline is None:
+            deadline = 1000 / (constants.FRAME_RATE_CAP or constants.SIMULATION_RATE)
+        deadline_ns = deadline * NANOSECONDS_PER_MILLISECOND
+        return [frame for frame in self.completedFrames() if self.frame_times[frame % self.capacity] > deadline_ns]
+
+    def exportCsv(self, path: str) -> None:
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame_number", "frame", *self.sections, *self.peaks])
+            for frame_number in self.completedFrames():
+                writer.writerow([frame_number, *self.getFrame(frame_number).values()])
+
+    def exportJson(self, path: str) -> None:
+        '''
+        Writes {"sections": [...], "peaks": [...], "frames": [{"frame_number": ..., "frame": ms, section: ms, peak: ms, ...}, ...]}.
+        '''
+        frames = [{"frame_number": frame_number, **self.getFrame(frame_number)} for frame_number in self.completedFrames()]
+        with open(path, "w") as file:
+            json.dump({"sections": list(self.sections), "peaks": list(self.peaks), "frames": frames}, file, indent=1)
+
+    def clear(self) -> None:
+        self.sections.clear()
+        self.starts.clear()
+        self.peaks.clear()
+        self.frame_count = 0
+
+# Shared by the game loop, GameState and the renderer
+profiler = Profiler()
@@ -0,0 +1,368 @@
+'''
+Dirty-rectangle renderer for the game window.
+
+Instead of filling the whole window and pushing the full framebuffer to the display every frame,
+each UI element (HP bars, round timer, Characters, input history columns, FPS counter) is a sprite
+that is only redrawn when the state it shows changes.
+Only the rects those sprites covered before and after are restored from the cached background
+and passed to pg.display.update().
+
+GameState.render() and InputHistory.render() still draw everything directly,
+e.g. for rendering to an offscreen Surface.
+'''
+from __future__ import annotations
+from abc import ABC, abstractmethod
+
+import pygame as pg
+
+import collision
+import constants
+from asset_manager import assetManager
+from fps_counter import FpsCounter
+from gamestate import GameState, Character, HP_BAR_COLOURS
+from inputs import InputHistory, ROW_HEIGHT
+from profiler import Profiler, profiler, NANOSECONDS_PER_MILLISECOND
+
+# Layers, drawn in increasing order over the background
+HP_BAR_LAYER = 1
+CHARACTER_LAYER = 2
+BOX_LAYER = 3
+HUD_LAYER = 4
+DEBUG_LAYER = 5
+
+class StateSprite(pg.sprite.DirtySprite, ABC):
+    '''
+    DirtySprite that is only redrawn (and marked dirty) when the state it shows changes.
+    Subclasses implement getState(), returning a comparable value that isn't modified later,
+    and redraw(state), which sets self.image and self.rect.
+    '''
+    def __init__(self, layer: int) -> None:
+        super().__init__()
+        self._layer = layer
+        self.image = pg.Surface((0, 0))
+        self.rect = pg.Rect(0, 0, 0, 0)
+        self.state: object = None
+
+    @abstractmethod
+    def getState(self) -> object:
+        ...
+
+    @abstractmethod
+    def redraw(self, state) -> None:
+        ...
+
+    def update(self) -> None:
+        state = self.getState()
+        if state != self.state:
+            self.state = state
+            self.redraw(state)
+            self.dirty = 1
+
+class HpBarSprite(StateSprite):
+    '''
+    Current HP part of an HP bar; the missing HP part is drawn on the background.
+    '''
+    def __init__(self, gameState: GameState, player: str) -> None:
+        super().__init__(HP_BAR_LAYER)
+        self.gameState = gameState
+        self.player = player
+
+    def getState(self) -> int:
+        return self.gameState.characters[self.player].hp
+
+    def redraw(self, state: int) -> None:
+        (_, current_hp_rect) = self.gameState.getHpBarRects(self.player)
+        self.image = pg.Surface(current_hp_rect.size)
+        self.image.fill(HP_BAR_COLOURS[self.player])
+        self.rect = current_hp_rect
+
+class RoundTimerSprite(StateSprite):
+    def __init__(self, gameState: GameState) -> None:
+        super().__init__(HUD_LAYER)
+        self.gameState = gameState
+
+    def getState(self) -> str:
+        return self.gameState.getRoundTimerText()
+
+    def redraw(self, state: str) -> None:
+        self.image = assetManager.renderText(self.gameState.font, state, constants.WHITE)
+        self.rect = self.image.get_rect()
+        self.rect.midtop = (int(constants.WINDOW_WIDTH / 2), 5)
+
+class CharacterSprite(StateSprite):
+    def __init__(self, character: Character) -> None:
+        super().__init__(CHARACTER_LAYER)
+        self.character = character
+        # Set by DirtyRectRenderer.render(), see Character.getRenderPosition()
+        self.alpha = 1.0
+
+    def getState(self) -> tuple[int, int, bool]:
+        (xpos, ypos) = self.character.getRenderPosition(self.alpha)
+        return (xpos, ypos, self.character.facingLeft)
+
+    def redraw(self, state: tuple[int, int, bool]) -> None:
+        (xpos, ypos, facingLeft) = state
+        self.image = self.character.flippedSurface if facingLeft else self.character.surface
+        self.rect = self.image.get_rect()
+        self.rect.midbottom = (xpos, ypos)
+
+class WorldRectsSprite(StateSprite):
+    '''
+    Covers the bounding rect of a set of (left, top, width, height) rects in window coordinates,
+    drawn by a GameState method taking (display, offset), e.g. GameState.renderBoxes().
+    Hidden while there are no rects, or isShown() is False.
+    '''
+    def __init__(self, layer: int) -> None:
+        super().__init__(layer)
+        self.state = ()
+        self.visible = 0
+    
+    @abstractmethod
+    def getState(self) -> tuple:
+        ...
+    
+    def isShown(self) -> bool:
+        return True
+    
+    @abstractmethod
+    def draw(self, surface: pg.Surface, offset: tuple[int, int]) -> None:
+        ...
+    
+    def redraw(self, state: tuple) -> None:
+        self.rect = pg.Rect(state[0]).unionall(state[1:])
+        self.image = pg.Surface(self.rect.size, pg.SRCALPHA)
+        self.draw(self.image, (-self.rect.left, -self.rect.top))
+    
+    def update(self) -> None:
+        state = self.getState() if self.isShown() else ()
+        visible = int(len(state) > 0)
+        if visible != self.visible:
+            # Setting DirtySprite.visible marks it dirty, so the area it covered is restored when hidden
+            self.visible = visible
+        if visible and state != self.state:
+            self.redraw(state)
+            self.dirty = 1
+        elif not visible and self.rect.width == 0:
+            # Never drawn, so there is no area to restore
+            self.dirty = 0
+        self.state = state
+
+class ProjectileSprite(WorldRectsSprite):
+    def __init__(self, gameState: GameState) -> None:
+        super().__init__(CHARACTER_LAYER)
+        self.gameState = gameState
+    
+    def getState(self) -> tuple:
+        return tuple(rect for projectile in self.gameState.projectiles for rect in projectile.getRects())
+    
+    def draw(self, surface: pg.Surface, offset: tuple[int, int]) -> None:
+        self.gameState.renderProjectiles(surface, offset)
+
+class BoxesSprite(WorldRectsSprite):
+    '''
+    Collision box outlines, shown while constants.SHOW_HITBOXES is True.
+    '''
+    def __init__(self, gameState: GameState) -> None:
+        super().__init__(BOX_LAYER)
+        self.gameState = gameState
+    
+    def getState(self) -> tuple:
+        world = self.gameState.collisionWorld
+        return tuple(world.iterRects(collision.HURT)) + tuple(world.iterRects(collision.HIT))
+    
+    def isShown(self) -> bool:
+        return constants.SHOW_HITBOXES
+    
+    def draw(self, surface: pg.Surface, offset: tuple[int, int]) -> None:
+        self.gameState.renderBoxes(surface, offset)
+
+class InputHistorySprite(StateSprite):
+    '''
+    Part of one player's input history column (see inputs.InputDisplay): either its newest row,
+    which changes every frame its buttons stay held, or the rows below it, which only change when
+    a new Input scrolls them down. Hidden while constants.SHOW_INPUT_HISTORY is False.
+    '''
+    def __init__(self, inputHistory: InputHistory, newest: bool) -> None:
+        super().__init__(DEBUG_LAYER)
+        self.inputHistory = inputHistory
+        self.newest = newest
+        self.blendmode = pg.BLEND_PREMULTIPLIED
+
+    def getState(self) -> int:
+        inputDisplay = self.inputHistory.getDisplay()
+        inputDisplay.update()
+        return inputDisplay.newestVersion if self.newest else inputDisplay.olderVersion
+
+    def redraw(self, state: int) -> None:
+        inputDisplay = self.inputHistory.getDisplay()
+        surface = inputDisplay.surface
+        # Subsurfaces share the column's pixels, so only need creating once
+        if self.image.get_width() == 0:
+            if self.newest:
+                area = pg.Rect(0, 0, surface.get_width(), ROW_HEIGHT)
+            else:
+                area = pg.Rect(0, ROW_HEIGHT, surface.get_width(), surface.get_height() - ROW_HEIGHT)
+            self.image = surface.subsurface(area)
+            self.rect = area.move(self.inputHistory.getColumnX(), inputDisplay.rowTop)
+
+    def update(self) -> None:
+        visible = int(constants.SHOW_INPUT_HISTORY)
+        if visible != self.visible:
+            # Setting DirtySprite.visible marks it dirty, so the area it covered is restored when hidden
+            self.visible = visible
+        if visible:
+            super().update()
+
+class FpsSprite(StateSprite):
+    def __init__(self, fpsCounter: FpsCounter) -> None:
+        super().__init__(DEBUG_LAYER)
+        self.fpsCounter = fpsCounter
+
+    def getState(self) -> int:
+        return int(self.fpsCounter.clock.get_fps())
+
+    def redraw(self, state: int) -> None:
+        self.image = assetManager.renderText(self.fpsCounter.font, f"{state}FPS", constants.WHITE)
+        self.rect = self.image.get_rect()
+        self.rect.topleft = (constants.WINDOW_WIDTH - 50, 5)
+
+class ProfilerSprite(StateSprite):
+    '''
+    Scrolling graph of a Profiler's frame times: one column per frame, the top level sections stacked
+    in colour over the whole frame time in grey, with a line at the frame deadline.
+    Hidden while constants.SHOW_PROFILER is False.
+    '''
+    # Sections that don't overlap each other, from the bottom of each column up
+    SECTION_COLOURS = {"input": (255, 200, 0), "update": (0, 200, 0), "render": (0, 150, 255), "display": (200, 0, 200)}
+    FRAME_COLOUR = (90, 90, 90)
+    DEADLINE_COLOUR = (255, 60, 60)
+    COLUMN_WIDTH = 2
+    PIXELS_PER_MILLISECOND = 3
+    
+    def __init__(self, profiler: Profiler, width: int = 240, height: int = 100) -> None:
+        super().__init__(DEBUG_LAYER)
+        self.profiler = profiler
+        self.graph = pg.Surface((width, height))
+        self.graph.fill(constants.BLACK)
+        # Newest frame drawn on self.graph
+        self.graphFrame = -1
+        self.deadline_y = height - int(1000 / (constants.FRAME_RATE_CAP or constants.SIMULATION_RATE) * self.PIXELS_PER_MILLISECOND)
+        self.legend = self.createLegend()
+        self.image = pg.Surface((width, height + self.legend.get_height()))
+        self.rect = self.image.get_rect()
+        self.rect.bottomright = (constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT)
+        
+    def createLegend(self) -> pg.Surface:
+        font = assetManager.getSysFont("Verdana", 10)
+        labels = [assetManager.renderText(font, section, colour) for (section, colour) in self.SECTION_COLOURS.items()]
+        legend = pg.Surface((self.graph.get_width(), max(label.get_height() for label in labels)))
+        x = 0
+        for label in labels:
+            legend.blit(label, (x, 0))
+            x = x + label.get_width() + 6
+        return legend
+    
+    def getState(self) -> int:
+        frames = self.profiler.completedFrames()
+        return frames[-1] if len(frames) > 0 else -1
+    
+    def redraw(self, state: int) -> None:
+        # Only the frames completed since the last redraw are drawn, after scrolling the graph left to make room
+        frames = self.profiler.completedFrames()
+        if state < self.graphFrame:
+            # The profiler was cleared
+            self.graph.fill(constants.BLACK)
+            self.graphFrame = -1
+        max_columns = self.graph.get_width() // self.COLUMN_WIDTH
+        first = max(self.graphFrame + 1, frames.start, state - max_columns + 1)
+        self.graph.scroll(-self.COLUMN_WIDTH * (state - self.graphFrame), 0)
+        for frame_number in range(first, state + 1):
+            self.drawColumn(frame_number, self.graph.get_width() - self.COLUMN_WIDTH * (state - frame_number + 1))
+        self.graphFrame = state
+        
+        self.image.blit(self.legend, (0, 0))
+        self.image.blit(self.graph, (0, self.legend.get_height()))
+        
+    def drawColumn(self, frame_number: int, x: int) -> None:
+        height = self.graph.get_height()
+        self.graph.fill(constants.BLACK, (x, 0, self.COLUMN_WIDTH, height))
+        index = frame_number % self.profiler.capacity
+        scale = self.PIXELS_PER_MILLISECOND / NANOSECONDS_PER_MILLISECOND
+        
+        frame_height = int(self.profiler.frame_times[index] * scale)
+        self.graph.fill(self.FRAME_COLOUR, (x, height - frame_height, self.COLUMN_WIDTH, frame_height))
+        y = height
+        for (section, colour) in self.SECTION_COLOURS.items():
+            times = self.profiler.sections.get(section)
+            if times is None:
+                continue
+            section_height = int(times[index] * scale)
+            y = y - section_height
+            self.graph.fill(colour, (x, y, self.COLUMN_WIDTH, section_height))
+        self.graph.fill(self.DEADLINE_COLOUR, (x, self.deadline_y, self.COLUMN_WIDTH, 1))
+    
+    def update(self) -> None:
+        visible = int(constants.SHOW_PROFILER)
+        if visible != self.visible:
+            self.visible = visible
+        if visible:
+            super().update()
+
+class DirtyRectRenderer():
+    def __init__(self, window: pg.Surface, gameState: GameState, fpsCounter: FpsCounter,
+                 inputHistories: dict[str, InputHistory]) -> None:
+        self.window = window
+        self.gameState = gameState
+        self.background = self.createBackground()
+
+        self.sprites = pg.sprite.LayeredDirty(_use_update=True)
+        for player in gameState.characters:
+            self.sprites.add(HpBarSprite(gameState, player))
+        self.characterSprites = [CharacterSprite(character) for character in gameState.characters.values()]
+        self.sprites.add(self.characterSprites)
+        self.sprites.add(ProjectileSprite(gameState))
+        self.sprites.add(BoxesSprite(gameState))
+        self.sprites.add(RoundTimerSprite(gameState))
+        for inputHistory in inputHistories.values():
+            self.sprites.add(InputHistorySprite(inputHistory, newest=True), InputHistorySprite(inputHistory, newest=False))
+        self.sprites.add(FpsSprite(fpsCounter))
+        self.sprites.add(ProfilerSprite(profiler))
+
+        self.sprites.clear(window, self.background)
+        self.repaintAll()
+
+    def createBackground(self) -> pg.Surface:
+        '''
+        Returns a window-sized surface with everything static drawn on it:
+        the black backdrop and the missing HP parts of the HP bars.
+        '''
+        background = pg.Surface(self.window.get_size())
+        background.fill(constants.BLACK)
+        for player in self.gameState.characters:
+            (missing_hp_rect, _) = self.gameState.getHpBarRects(player)
+            pg.draw.rect(background, constants.WHITE, missing_hp_rect)
+        return background
+
+    def repaintAll(self) -> None:
+        '''
+        Redraws the whole window on the next render(), e.g. after it was drawn over by something else.
+        '''
+        self.sprites.repaint_rect(self.window.get_rect())
+
+    def render(self, alpha: float = 1.0) -> list[pg.Rect]:
+        '''
+        Redraws whatever changed since the last call, updates only those parts of the display,
+        and returns the rects that were updated.
+        alpha is how far between the last two simulation steps to draw Characters, see Character.getRenderPosition().
+        '''
+        profiler.begin("render")
+        for sprite in self.characterSprites:
+            sprite.alpha = alpha
+        self.sprites.update()
+        rects = self.sprites.draw(self.window)
+        profiler.end("render")
+        
+        profiler.begin("display")
+        pg.display.update(rects)
+        profiler.end("display")
+        return rects
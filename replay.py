@@ -0,0 +1,242 @@
+'''
+Compact binary replays of every player's InputHistory.
+
+A replay file is a 16 byte header followed by 16 byte records, appended as the match is played:
+- span records: one completed Input (button bitmask, start_frame, end_frame) of one player,
+  so a held button costs one record however long it is held.
+- checksum records: GameState.checksum() every checksum_interval frames, to detect playback desyncs.
+- latency records (optional): how long each key event took to become an Input, see input_capture.InputCapture,
+  for offline analysis (see analytics.py). Playback ignores them.
+
+Records are written in order of their end frame (a span is written once the next Input replaces it),
+so a file can be memory-mapped and bisected by frame without reading it all.
+'''
+from __future__ import annotations
+import mmap
+import os
+import struct
+from collections import deque
+from typing import BinaryIO, Iterator
+
+import constants
+import inputs
+from desync import DesyncDetector
+from gamestate import GameState
+from input_capture import InputCapture
+from profiler import NANOSECONDS_PER_MICROSECOND
+
+MAGIC = b"FGRP"
+# Bumped whenever GameState.checksum() or the simulation changes, so old replays are rejected instead of desyncing
+VERSION = 5
+
+# magic, version, simulation rate, checksum interval, player count
+HEADER = struct.Struct("<4sHHHB5x")
+# record type, player index, (reserved), start frame, end frame, value (button bitmask or checksum)
+RECORD = struct.Struct("<BBHIII")
+
+RECORD_SPAN = 1
+RECORD_CHECKSUM = 2
+# 3 is spectator.RECORD_KEYFRAME
+RECORD_LATENCY = 4
+
+class ReplayError(Exception):
+    pass
+
+class ReplayRecorder():
+    '''
+    Writes a GameState's inputs to a replay file as they happen.
+    Call record() after every GameState.update(), and close() at the end of the match.
+    If inputCapture is given, its latency measurements are recorded too, in microseconds.
+    '''
+    def __init__(self, file: BinaryIO, gameState: GameState, checksum_interval: int = 60,
+                 inputCapture: InputCapture | None = None) -> None:
+        self.file = file
+        self.gameState = gameState
+        self.checksum_interval = checksum_interval
+        self.inputCapture = inputCapture
+        # inputCapture.latency_count as of the last latencies written
+        self.latency_count = inputCapture.latency_count if inputCapture is not None else 0
+        self.histories = list(gameState.inputHistories.values())
+        # Newest Input of each player, not written yet since it may still be extended
+        self.openInputs: list[inputs.Input | None] = [None] * len(self.histories)
+
+        file.write(HEADER.pack(MAGIC, VERSION, constants.SIMULATION_RATE, checksum_interval, len(self.histories)))
+
+    def record(self) -> None:
+        for (index, inputHistory) in enumerate(self.histories):
+            latest = inputHistory.inputs[-1]
+            previous = self.openInputs[index]
+            if latest is not previous:
+                if previous is not None:
+                    self.writeSpan(index, previous)
+                self.openInputs[index] = latest
+
+        frame = self.gameState.current_frame
+        if frame % self.checksum_interval == 0:
+            self.file.write(RECORD.pack(RECORD_CHECKSUM, 0, 0, frame, frame, self.gameState.checksum()))
+        if self.inputCapture is not None:
+            self.writeLatencies(frame)
+
+    def writeLatencies(self, frame: int) -> None:
+        '''
+        Writes the latencies inputCapture measured since the last call (as many as it still holds), at frame.
+        '''
+        latencies = self.inputCapture.latencies
+        count = self.inputCapture.latency_count
+        for index in range(max(self.latency_count, count - len(latencies)), count):
+            microseconds = min(latencies[index % len(latencies)] // NANOSECONDS_PER_MICROSECOND, 0xFFFFFFFF)
+            self.file.write(RECORD.pack(RECORD_LATENCY, 0, 0, frame, frame, max(microseconds, 0)))
+        self.latency_count = count
+
+    def writeSpan(self, player_index: int, input: inputs.Input) -> None:
+        self.file.write(RECORD.pack(RECORD_SPAN, player_index, 0, input.start_frame, input.end_frame, input.bits))
+
+    def close(self) -> None:
+        '''
+        Writes the Inputs still being held, and closes the file.
+        '''
+        for (index, input) in enumerate(self.openInputs):
+            if input is not None:
+                self.writeSpan(index, input)
+        self.openInputs = [None] * len(self.histories)
+        self.file.close()
+
+class ReplayReader():
+    '''
+    Memory-mapped view of a replay file. Records are only read (and paged in) as they are needed.
+    '''
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap can't map empty files
+            self.file.close()
+            raise ReplayError(f"{path} is empty")
+
+        if len(self.data) < HEADER.size:
+            self.close()
+            raise ReplayError(f"{path} is too short to be a replay")
+        (magic, self.version, self.simulation_rate, self.checksum_interval, self.player_count) = HEADER.unpack_from(self.data)
+        if magic != MAGIC or self.version != VERSION:
+            self.close()
+            raise ReplayError(f"{path} is not a version {VERSION} replay")
+
+    def __enter__(self) -> ReplayReader:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def recordCount(self) -> int:
+        # A partially written last record (e.g. the game crashed mid-write) is ignored
+        return (len(self.data) - HEADER.size) // RECORD.size
+
+    def getRecord(self, index: int) -> tuple[int, int, int, int, int, int]:
+        return RECORD.unpack_from(self.data, HEADER.size + index * RECORD.size)
+
+    def iterRecords(self, start_index: int = 0) -> Iterator[tuple[int, int, int, int, int, int]]:
+        '''
+        Yields (type, player index, reserved, start frame, end frame, value) records from start_index on.
+        '''
+        end = HEADER.size + self.recordCount() * RECORD.size
+        view = memoryview(self.data)[HEADER.size + start_index * RECORD.size:end]
+        try:
+            yield from RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def findFrame(self, frame_number: int) -> int:
+        '''
+        Takes a frame number, and returns the index of the first record ending after it
+        (so spans covering frame_number and everything later), by binary search.
+        '''
+        low = 0
+        high = self.recordCount()
+        while low < high:
+            mid = (low + high) // 2
+            if self.getRecord(mid)[4] <= frame_number:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def close(self) -> None:
+        self.data.close()
+        self.file.close()
+
+class ReplayPlayer():
+    '''
+    Plays a replay back into a new GameState, one frame per step(),
+    reading records only as far ahead as needed and checking every checksum on the way.
+    '''
+    def __init__(self, reader: ReplayReader, gameState: GameState) -> None:
+        if reader.player_count != len(gameState.inputHistories):
+            raise ReplayError(f"Replay has {reader.player_count} players, GameState has {len(gameState.inputHistories)}")
+        self.gameState = gameState
+        self.histories = list(gameState.inputHistories.values())
+        self.records = reader.iterRecords()
+        self.exhausted = False
+        # End frame of the last record read
+        self.readFrame = 0
+
+        # Spans read but not played yet, per player: (bits, start frame, end frame)
+        self.spans: list[deque[tuple[int, int, int]]] = [deque() for _ in self.histories]
+        # (frame, checksum) read but not checked yet
+        self.checksums: deque[tuple[int, int]] = deque()
+        # The replay's checksums are the remote side, gameState's are the local side
+        self.desyncDetector = DesyncDetector()
+
+    def readRecord(self) -> bool:
+        '''
+        Reads the next record, returning False at the end of the replay.
+        '''
+        record = next(self.records, None)
+        if record is None:
+            self.exhausted = True
+            return False
+        (record_type, player_index, _, start_frame, end_frame, value) = record
+        if record_type == RECORD_SPAN:
+            self.spans[player_index].append((value, start_frame, end_frame))
+        elif record_type == RECORD_CHECKSUM:
+            self.checksums.append((end_frame, value))
+        self.readFrame = end_frame
+        return True
+
+    def step(self) -> bool:
+        '''
+        Plays one frame. Returns False (without playing anything) at the end of the replay.
+        '''
+        frame = self.gameState.current_frame
+        for spans in self.spans:
+            while True:
+                while len(spans) > 0 and spans[0][2] <= frame:
+                    spans.popleft()
+                if len(spans) > 0:
+                    break
+                if not self.readRecord():
+                    return False
+
+        for (inputHistory, spans) in zip(self.histories, self.spans):
+            inputHistory.append(inputs.Input(spans[0][0], frame, frame + 1))
+        self.gameState.update()
+
+        # Every record ending by now has been read once a later one has (records are in end frame order)
+        frame = self.gameState.current_frame
+        while self.readFrame <= frame and not self.exhausted:
+            self.readRecord()
+        while len(self.checksums) > 0 and self.checksums[0][0] <= frame:
+            (checksum_frame, expected) = self.checksums.popleft()
+            if checksum_frame == frame:
+                self.desyncDetector.addRemote(frame, expected)
+                self.desyncDetector.addLocal(frame, self.gameState.checksum())
+        return True
+
+    def run(self, max_frames: int | None = None) -> int:
+        '''
+        Plays up to max_frames frames (default: the whole replay), and returns how many were played.
+        '''
+        played = 0
+        while (max_frames is None or played < max_frames) and self.step():
+            played = played + 1
+        return played
@@ -0,0 +1,258 @@
+'''
+Rollback netcode session around GameState.update() and InputHistory.
+
+Each frame, the local player's input is simulated immediately,
+and the remote player's input is predicted by repeating their last confirmed input.
+When the remote's real inputs arrive and differ from what was predicted,
+the session loads the GameStateSnapshot from the first mispredicted frame and re-simulates up to the present.
+Inputs are sent redundantly (every input the peer hasn't acknowledged yet goes in each packet),
+so lost or reordered packets don't need resending.
+Each packet also carries the checksum of the newest frame whose inputs are all confirmed,
+which the receiver compares with its own to detect desyncs.
+
+Benchmark with a simulated connection, e.g.:
+
+    python rollback.py --delay 50 --jitter 20 --loss 5
+'''
+from __future__ import annotations
+import argparse
+import random
+import struct
+import time
+from array import array
+from typing import Sequence
+
+import constants
+import inputs
+import simulation
+from desync import DesyncDetector
+from gamestate import GameState, GameStateSnapshot
+from transport import LoopbackTransport, MAX_PACKET_SIZE
+
+# Packet header: newest frame of the receiver's inputs the sender has all inputs up to (ack),
+# frame of the first input in this packet, number of inputs,
+# frame and GameState.checksum() of the sender's newest confirmed state (frame -1 if none yet).
+# Followed by that many uint32 button bitmasks.
+PACKET_HEADER = struct.Struct("<iiHiI")
+MAX_INPUTS_PER_PACKET = (MAX_PACKET_SIZE - PACKET_HEADER.size) // 4
+
+class RollbackSession():
+    def __init__(self, gameState: GameState, local_player: str, transport, max_rollback: int = 8) -> None:
+        '''
+        gameState should be freshly created, and is simulated by this session from then on.
+        local_player is the player whose inputs are passed to advanceFrame(); the other player is remote.
+        max_rollback is how many frames of remote input can be predicted before the session stalls to wait for them.
+        '''
+        self.gameState = gameState
+        self.transport = transport
+        self.max_rollback = max_rollback
+        self.local_history = gameState.inputHistories[local_player]
+        (self.remote_history,) = [ih for (player, ih) in gameState.inputHistories.items() if player != local_player]
+
+        # Snapshot taken before simulating each frame, indexed by frame % len(self.snapshots)
+        self.snapshots = [GameStateSnapshot(gameState) for _ in range(max_rollback + 1)]
+        # (frame, checksum) after simulating each frame, indexed by frame % len(self.checksums)
+        self.checksums: list[tuple[int, int]] = [(-1, 0)] * (max_rollback + 2)
+
+        # Button bitmasks by frame number
+        self.local_inputs: dict[int, int] = {}
+        self.remote_inputs: dict[int, int] = {}
+        # Remote bitmasks that were guessed when simulating frames we hadn't received inputs for yet
+        self.predicted_inputs: dict[int, int] = {}
+
+        # Newest frame such that the remote's inputs up to and including it have all been received
+        self.confirmed_frame = -1
+        # Same as confirmed_frame, but for our inputs as received by the remote
+        self.remote_ack_frame = -1
+        # Earliest frame found to be mispredicted since the last rollback
+        self.rollback_frame: int | None = None
+        # Newest frame whose checksum is final (every input before it is confirmed), and that checksum
+        self.checksum_frame = 0
+        self.confirmed_checksum = 0
+        self.desyncDetector = DesyncDetector()
+        # Inputs older than these frames have been deleted
+        self.local_pruned_frame = 0
+        self.remote_pruned_frame = 0
+
+        # Stats
+        self.rollbacks = 0
+        self.rollback_frames = 0
+        self.rollback_time = 0.0
+        self.stalls = 0
+
+    def advanceFrame(self, local_bits: int) -> bool:
+        '''
+        Takes the local player's button bitmask for the current frame, and simulates the frame
+        (after rolling back to correct any mispredicted frames).
+
+        Returns False without simulating anything if the remote is too far behind to keep predicting its inputs;
+        the frame should be retried (with fresh local input) next time.
+        '''
+        self.poll()
+        frame = self.gameState.current_frame
+        if frame - self.confirmed_frame > self.max_rollback:
+            self.stalls = self.stalls + 1
+            self.sendInputs()
+            return False
+
+        if self.rollback_frame is not None:
+            self.rollback()
+        self.local_inputs[frame] = local_bits
+        self.simulateFrame(frame)
+        self.confirmChecksums()
+        self.sendInputs()
+        self.pruneInputs()
+        return True
+
+    def poll(self) -> None:
+        '''
+        Receives packets from the remote, and records the earliest mispredicted frame (if any) for the next rollback.
+        '''
+        for packet in self.transport.receive():
+            (ack_frame, start_frame, count, checksum_frame, checksum) = PACKET_HEADER.unpack_from(packet)
+            self.remote_ack_frame = max(self.remote_ack_frame, ack_frame)
+            if checksum_frame >= 0:
+                self.desyncDetector.addRemote(checksum_frame, checksum)
+            remote_bits = array('I')
+            remote_bits.frombytes(packet[PACKET_HEADER.size:PACKET_HEADER.size + count * 4])
+
+            for (frame, bits) in enumerate(remote_bits, start_frame):
+                if frame <= self.confirmed_frame or frame in self.remote_inputs:
+                    continue
+                self.remote_inputs[frame] = bits
+                predicted = self.predicted_inputs.pop(frame, None)
+                if predicted is not None and predicted != bits:
+                    if self.rollback_frame is None or frame < self.rollback_frame:
+                        self.rollback_frame = frame
+
+        while self.confirmed_frame + 1 in self.remote_inputs:
+            self.confirmed_frame = self.confirmed_frame + 1
+
+    def simulateFrame(self, frame: int) -> None:
+        '''
+        Saves a snapshot, then simulates frame with the confirmed or predicted remote input.
+        '''
+        self.gameState.saveState(self.snapshots[frame % len(self.snapshots)])
+
+        remote_bits = self.remote_inputs.get(frame)
+        if remote_bits is None:
+            # Predict that the remote is still holding the last input we know about
+            remote_bits = self.remote_inputs.get(self.confirmed_frame, 0)
+            self.predicted_inputs[frame] = remote_bits
+
+        self.local_history.append(inputs.Input(self.local_inputs[frame], frame, frame + 1))
+        self.remote_history.append(inputs.Input(remote_bits, frame, frame + 1))
+        self.gameState.update()
+        self.checksums[(frame + 1) % len(self.checksums)] = (frame + 1, self.gameState.checksum())
+
+    def rollback(self) -> None:
+        '''
+        Restores the snapshot from before self.rollback_frame and re-simulates up to the current frame.
+        '''
+        start = time.perf_counter()
+        current_frame = self.gameState.current_frame
+        self.gameState.loadState(self.snapshots[self.rollback_frame % len(self.snapshots)])
+        for frame in range(self.rollback_frame, current_frame):
+            self.simulateFrame(frame)
+
+        self.rollbacks = self.rollbacks + 1
+        self.rollback_frames = self.rollback_frames + current_frame - self.rollback_frame
+        self.rollback_time = self.rollback_time + time.perf_counter() - start
+        self.rollback_frame = None
+
+    def confirmChecksums(self) -> None:
+        '''
+        Passes the checksums of frames that can no longer be rolled back to the DesyncDetector.
+        '''
+        final_frame = min(self.confirmed_frame + 1, self.gameState.current_frame)
+        while self.checksum_frame < final_frame:
+            (frame, checksum) = self.checksums[(self.checksum_frame + 1) % len(self.checksums)]
+            self.checksum_frame = self.checksum_frame + 1
+            if frame == self.checksum_frame:
+                self.confirmed_checksum = checksum
+                self.desyncDetector.addLocal(frame, checksum)
+
+    def sendInputs(self) -> None:
+        '''
+        Sends every local input the remote hasn't acknowledged yet.
+        '''
+        end_frame = self.gameState.current_frame
+        start_frame = max(self.remote_ack_frame + 1, self.local_pruned_frame)
+        end_frame = min(end_frame, start_frame + MAX_INPUTS_PER_PACKET)
+        local_bits = array('I', [self.local_inputs[frame] for frame in range(start_frame, end_frame)])
+        checksum_frame = self.checksum_frame if self.checksum_frame > 0 else -1
+        header = PACKET_HEADER.pack(self.confirmed_frame, start_frame, len(local_bits), checksum_frame, self.confirmed_checksum)
+        self.transport.send(header + local_bits.tobytes())
+
+    def pruneInputs(self) -> None:
+        '''
+        Deletes inputs that can no longer be needed for re-simulation, prediction or resending.
+        '''
+        oldest_rollback_frame = self.gameState.current_frame - len(self.snapshots)
+        local_limit = min(self.remote_ack_frame + 1, oldest_rollback_frame)
+        while self.local_pruned_frame < local_limit:
+            self.local_inputs.pop(self.local_pruned_frame, None)
+            self.local_pruned_frame = self.local_pruned_frame + 1
+
+        remote_limit = min(self.confirmed_frame, oldest_rollback_frame)
+        while self.remote_pruned_frame < remote_limit:
+            self.remote_inputs.pop(self.remote_pruned_frame, None)
+            self.remote_pruned_frame = self.remote_pruned_frame + 1
+
+    def rollbackFramesPerSecond(self) -> float:
+        '''
+        Returns how many frames per second were re-simulated during rollbacks (0 if there were none).
+        '''
+        if self.rollback_time == 0:
+            return 0.0
+        return self.rollback_frames / self.rollback_time
+
+def runLoopbackMatch(scripts: dict[str, simulation.Script], delay: float, jitter: float, loss: float,
+                     seed: int = 0, max_rollback: int = 8) -> tuple[RollbackSession, RollbackSession]:
+    '''
+    Plays scripts through two RollbackSessions connected by LoopbackTransports,
+    on a simulated clock that advances one frame per loop, and returns the (P1, P2) sessions.
+    '''
+    now = 0.0
+    (p1_transport, p2_transport) = LoopbackTransport.pair(delay, jitter, loss, seed, clock=lambda: now)
+    sessions = (RollbackSession(simulation.createHeadlessGame(), "P1", p1_transport, max_rollback),
+                RollbackSession(simulation.createHeadlessGame(), "P2", p2_transport, max_rollback))
+    players = ("P1", "P2")
+    frames = max(len(script) for script in scripts.values())
+
+    while any(session.gameState.current_frame < frames for session in sessions):
+        for (player, session) in zip(players, sessions):
+            frame = session.gameState.current_frame
+            if frame < frames:
+                script = scripts[player]
+                session.advanceFrame(script[frame] if frame < len(script) else 0)
+        now = now + 1.0 / constants.SIMULATION_RATE
+
+    return sessions
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark rollback over a simulated connection.")
+    parser.add_argument("--frames", type=int, default=3600)
+    parser.add_argument("--delay", type=float, default=50, help="one-way delay, in ms")
+    parser.add_argument("--jitter", type=float, default=20, help="maximum extra random delay, in ms")
+    parser.add_argument("--loss", type=float, default=5, help="packet loss, in percent")
+    parser.add_argument("--max-rollback", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    # A second of neutral at the end, so both sides finish with every real input confirmed
+    scripts = {player: simulation.randomScript(rng, args.frames) + [0] * constants.SIMULATION_RATE
+               for player in simulation.PLAYERS}
+    sessions = runLoopbackMatch(scripts, args.delay / 1000, args.jitter / 1000, args.loss / 100,
+                                args.seed, args.max_rollback)
+
+    for session in sessions:
+        print(f"{session.local_history.player}: {session.rollbacks} rollbacks, "
+              f"{session.rollback_frames} frames re-simulated, {session.stalls} stalls, "
+              f"{session.rollbackFramesPerSecond():.0f} rollback frames/s")
+    for session in sessions:
+        print(f"{session.local_history.player}: {session.desyncDetector}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+'''
+Headless simulation of GameState, driven by scripted inputs instead of the keyboard.
+
+Nothing here opens a window or touches the pygame video/font subsystems,
+and nothing waits on clock.tick, so matches run as fast as the CPU allows.
+Useful for AI training and regression testing, e.g.:
+
+    python simulation.py --matches 1000 --frames 600 --workers 8
+'''
+from __future__ import annotations
+import argparse
+import multiprocessing
+import random
+import time
+from array import array
+from typing import Iterable, Iterator, Sequence
+
+import inputs
+from inputs import Button
+from gamestate import GameState
+
+# A script is the button bitmask (see Button.bit) held on each frame, starting from frame 0.
+# Frames past the end of a script are neutral.
+Script = Sequence[int]
+
+PLAYERS = ("P1", "P2")
+
+class FrameStats():
+    '''
+    Per-frame values of each Character, one array per player per column, indexed by frame.
+    '''
+    def __init__(self, players: Iterable[str]) -> None:
+        self.xpos: dict[str, array] = {}
+        self.hp: dict[str, array] = {}
+        for player in players:
+            self.xpos[player] = array('i')
+            self.hp[player] = array('i')
+            
+    def record(self, gameState: GameState) -> None:
+        '''
+        Appends the current values of gameState's Characters.
+        '''
+        for (player, character) in gameState.characters.items():
+            self.xpos[player].append(character.xpos)
+            self.hp[player].append(character.hp)
+
+class MatchResult():
+    '''
+    Final state of one simulated match, plus its FrameStats if they were recorded.
+    '''
+    def __init__(self, match_id: int, gameState: GameState, frame_stats: FrameStats | None = None) -> None:
+        self.match_id = match_id
+        self.frame_stats = frame_stats
+        self.frames: int = gameState.current_frame
+        self.round_timer: float = gameState.round_timer
+        self.hp: dict[str, int] = {}
+        self.roundsWon: dict[str, int] = {}
+        for (player, character) in gameState.characters.items():
+            self.hp[player] = character.hp
+            self.roundsWon[player] = character.roundsWon
+
+    def winner(self) -> str | None:
+        '''
+        Returns the player with the most HP left, or None for a draw.
+        '''
+        if self.hp["P1"] == self.hp["P2"]:
+            return None
+        return "P1" if self.hp["P1"] > self.hp["P2"] else "P2"
+
+    def __repr__(self) -> str:
+        return f"MatchResult(match_id={self.match_id}, frames={self.frames}, hp={self.hp}, roundsWon={self.roundsWon})"
+
+def createHeadlessGame() -> GameState:
+    '''
+    Returns a new headless GameState with empty InputHistories.
+    '''
+    inputHistories = {}
+    for player in PLAYERS:
+        inputHistories[player] = inputs.InputHistory(player)
+    return GameState(inputHistories, headless=True)
+
+def runMatch(scripts: dict[str, Script], max_frames: int | None = None, match_id: int = 0,
+             record_frames: bool = False) -> MatchResult:
+    '''
+    Takes a dict of each player's Script, and simulates a match with them
+    until the round is over or max_frames frames have passed (default: the length of the longest script).
+    If record_frames is True, the result includes FrameStats recorded after every frame.
+    '''
+    gameState = createHeadlessGame()
+    frame_stats = FrameStats(gameState.characters) if record_frames else None
+    if max_frames is None:
+        max_frames = max((len(script) for script in scripts.values()), default=0)
+
+    histories = [(gameState.inputHistories[player], scripts.get(player, ())) for player in gameState.inputHistories]
+    for frame in range(max_frames):
+        for (inputHistory, script) in histories:
+            bits = script[frame] if frame < len(script) else 0
+            inputHistory.append(inputs.Input(bits, frame, frame + 1))
+        gameState.update()
+        if frame_stats is not None:
+            frame_stats.record(gameState)
+        if gameState.isRoundOver():
+            break
+
+    return MatchResult(match_id, gameState, frame_stats)
+
+def runBatch(matches: Iterable[dict[str, Script]], max_frames: int | None = None,
+             record_frames: bool = False) -> Iterator[MatchResult]:
+    '''
+    Takes an iterable of script dicts (see runMatch()), and yields a MatchResult for each in order.
+    match_id is the index of the match in matches.
+    '''
+    for (match_id, scripts) in enumerate(matches):
+        yield runMatch(scripts, max_frames, match_id, record_frames)
+
+def encodeScript(script: Script) -> bytes:
+    '''
+    Takes a Script and returns it run-length encoded as (bits, frame count) uint32 pairs,
+    which is much smaller than the per-frame list (or pickled Inputs) when sent to worker processes.
+    '''
+    spans = array('I')
+    for bits in script:
+        if len(spans) > 0 and spans[-2] == bits:
+            spans[-1] = spans[-1] + 1
+        else:
+            spans.append(bits)
+            spans.append(1)
+    return spans.tobytes()
+
+def decodeScript(data: bytes) -> list[int]:
+    '''
+    Inverse of encodeScript().
+    '''
+    spans = array('I')
+    spans.frombytes(data)
+    script: list[int] = []
+    for i in range(0, len(spans), 2):
+        script.extend([spans[i]] * spans[i + 1])
+    return script
+
+def _runEncodedMatch(job: tuple[int, dict[str, bytes], int | None, bool]) -> MatchResult:
+    '''
+    Worker process side of runBatchParallel().
+    '''
+    (match_id, encoded_scripts, max_frames, record_frames) = job
+    scripts = {player: decodeScript(data) for (player, data) in encoded_scripts.items()}
+    return runMatch(scripts, max_frames, match_id, record_frames)
+
+def runBatchParallel(matches: Iterable[dict[str, Script]], max_frames: int | None = None,
+                     record_frames: bool = False, workers: int | None = None,
+                     chunksize: int = 8) -> Iterator[MatchResult]:
+    '''
+    Like runBatch(), but spreads the matches over a pool of worker processes (default: one per core).
+    MatchResults are yielded as soon as each one finishes, so NOT in match_id order.
+    '''
+    jobs = ((match_id, {player: encodeScript(script) for (player, script) in scripts.items()}, max_frames, record_frames)
+            for (match_id, scripts) in enumerate(matches))
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(_runEncodedMatch, jobs, chunksize)
+
+# Buttons a random script picks from; macros are left out since they only expand to these.
+RANDOM_SCRIPT_BUTTONS = [Button.LEFT, Button.DOWN, Button.RIGHT, Button.UP,
+                         Button.PUNCH, Button.KICK, Button.SLASH, Button.HEAVY, Button.DUST]
+
+def randomScript(rng: random.Random, length: int, max_hold_frames: int = 20) -> list[int]:
+    '''
+    Returns a Script of length frames that holds random SOCD-cleaned button combinations
+    for 1 to max_hold_frames frames each, like a (very bad) human player.
+    '''
+    script: list[int] = []
+    while len(script) < length:
+        bits = 0
+        for button in RANDOM_SCRIPT_BUTTONS:
+            if rng.random() < 0.2:
+                bits = bits | button.bit
+        bits = inputs.cleanSocdBits(bits)
+        script.extend([bits] * rng.randint(1, max_hold_frames))
+    del script[length:]
+    return script
+
+def randomMatches(count: int, length: int, seed: int = 0) -> Iterator[dict[str, Script]]:
+    '''
+    Yields count script dicts of random Scripts, reproducible from seed.
+    '''
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {player: randomScript(rng, length) for player in PLAYERS}
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate random matches headlessly, as fast as possible.")
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=600, help="maximum frames per match")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (0 for one per core, 1 to run in this process)")
+    args = parser.parse_args(argv)
+
+    matches = list(randomMatches(args.matches, args.frames, args.seed))
+    start = time.perf_counter()
+    total_frames = 0
+    if args.workers == 1:
+        results = runBatch(matches, args.frames)
+    else:
+        results = runBatchParallel(matches, args.frames, workers=args.workers or None)
+    for result in results:
+        total_frames = total_frames + result.frames
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.matches} matches, {total_frames} frames in {elapsed:.2f}s "
+          f"({args.matches / elapsed:.0f} matches/s, {total_frames / elapsed:.0f} frames/s)")
+
+if __name__ == "__main__":
+    main()
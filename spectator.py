@@ -0,0 +1,329 @@
+'''
+Spectator mode: a running game broadcasts its inputs over TCP, and each viewer simulates the match itself,
+which costs a few dozen bytes per frame instead of a video stream.
+
+The stream is a replay (see replay.py) with one more record type: the header, then span and checksum records,
+plus keyframe records, each followed by its payload, the JSON-encoded GameState (see encodeKeyframe()).
+Unlike a replay, a held button isn't sent as one span once released: every frame, each player's inputs up to
+the frame just simulated are sent as spans, so viewers never wait on an input that is still being held.
+
+Viewers joining mid-match are sent the latest keyframe and every record since, so they catch up
+by simulating at most keyframe_interval frames, instead of the whole match.
+
+The server runs an asyncio event loop on its own thread. The game loop only packs each frame's records
+into one bytes object and hands it over (SpectatorServer.publish()), so its cost doesn't depend on the number
+of viewers; fanning out to every viewer is the event loop's job, and viewers too slow to keep up are disconnected
+rather than buffered for without limit.
+'''
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Sequence
+
+import constants
+import inputs
+import replay
+from desync import DesyncDetector
+from gamestate import Character, GameState
+from replay import HEADER, RECORD, RECORD_CHECKSUM, RECORD_SPAN, ReplayError
+
+# Stream-only record: start and end frame are the keyframe's frame, value is the length of the payload that follows
+RECORD_KEYFRAME = 3
+
+DEFAULT_PORT = 7000
+
+def encodeKeyframe(gameState: GameState) -> bytes:
+    '''
+    Returns everything GameState.saveState() saves (but the InputHistories, which viewers rebuild from spans) as JSON.
+    '''
+    snapshot = gameState.saveState()
+    values = list(snapshot.values)
+    values[3] = snapshot.projectiles[:values[3]]
+    offset = GameState.STATE_SIZE
+    for character in gameState.characters.values():
+        # The motion recognizer state refers to its nodes directly
+        index = offset + Character.STATE_SIZE - 1
+        values[index] = character.motionRecognizer.encodeState(values[index])
+        offset = offset + Character.STATE_SIZE
+    return json.dumps(values, separators=(",", ":")).encode()
+
+def loadKeyframe(gameState: GameState, payload: bytes) -> None:
+    '''
+    Loads an encodeKeyframe() payload into gameState, and clears its InputHistories.
+    '''
+    for inputHistory in gameState.inputHistories.values():
+        inputHistory.inputs.clear()
+    snapshot = gameState.saveState()
+    values = json.loads(payload)
+    if len(values) != len(snapshot.values):
+        raise ReplayError(f"Keyframe has {len(values)} values, GameState has {len(snapshot.values)}")
+    snapshot.projectiles[:] = values[3]
+    values[3] = len(values[3])
+    offset = GameState.STATE_SIZE
+    for character in gameState.characters.values():
+        index = offset + Character.STATE_SIZE - 1
+        values[index] = character.motionRecognizer.decodeState(values[index])
+        offset = offset + Character.STATE_SIZE
+    snapshot.values[:] = values
+    gameState.loadState(snapshot)
+
+class SpectatorServer():
+    '''
+    Accepts viewer connections, and sends every viewer the data published by the game.
+    Runs on its own thread; publish() and close() may be called from any other thread.
+    '''
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_buffer: int = 1 << 20) -> None:
+        '''
+        Viewers with more than max_buffer bytes not sent yet are disconnected.
+        port 0 picks a free port, see self.address once start() returns.
+        '''
+        self.host = host
+        self.port = port
+        self.max_buffer = max_buffer
+        self.address: tuple[str, int] | None = None
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="SpectatorServer", daemon=True)
+        self.server: asyncio.Server | None = None
+        # Only used on the event loop's thread:
+        self.viewers: set[asyncio.StreamWriter] = set()
+        # What a viewer joining now is sent first: the stream header, the latest keyframe and everything since
+        self.catchUp = bytearray()
+        self.dropped_viewers = 0
+
+    def start(self) -> SpectatorServer:
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.listen(), self.loop).result()
+        return self
+
+    async def listen(self) -> None:
+        self.server = await asyncio.start_server(self.handleViewer, self.host, self.port)
+        self.address = self.server.sockets[0].getsockname()[:2]
+
+    async def handleViewer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # A copy, since the transport may keep a view of any part it can't send yet, and fanOut() resizes catchUp
+        writer.write(bytes(self.catchUp))
+        self.viewers.add(writer)
+        try:
+            # Viewers don't send anything; wait for them to disconnect
+            while len(await reader.read(1024)) > 0:
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.viewers.discard(writer)
+            writer.close()
+
+    def publish(self, data: bytes, header: bool = False, keyframe: bool = False) -> None:
+        '''
+        Sends data to every viewer. header and keyframe data also restart what new viewers are sent first
+        (a keyframe replaces everything since the previous one, after the header).
+        Thread safe, and doesn't wait for anything to be sent.
+        '''
+        self.loop.call_soon_threadsafe(self.fanOut, data, header, keyframe)
+
+    def fanOut(self, data: bytes, header: bool, keyframe: bool) -> None:
+        if header:
+            self.catchUp = bytearray(data)
+        elif keyframe:
+            del self.catchUp[HEADER.size:]
+            self.catchUp += data
+        else:
+            self.catchUp += data
+
+        slow = []
+        for writer in self.viewers:
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                slow.append(writer)
+            else:
+                writer.write(data)
+        for writer in slow:
+            self.viewers.discard(writer)
+            writer.transport.abort()
+            self.dropped_viewers = self.dropped_viewers + 1
+
+    def viewerCount(self) -> int:
+        return len(self.viewers)
+
+    def close(self) -> None:
+        '''
+        Sends viewers everything published so far, disconnects them, and stops the server thread.
+        '''
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def shutdown(self) -> None:
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.viewers):
+            writer.close()
+        for writer in list(self.viewers):
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.viewers.clear()
+
+class SpectatorBroadcaster():
+    '''
+    Publishes a GameState's inputs, checksums and keyframes to a SpectatorServer.
+    Call record() after every GameState.update(), like replay.ReplayRecorder.
+    '''
+    def __init__(self, gameState: GameState, server: SpectatorServer, checksum_interval: int = 60,
+                 keyframe_interval: int = 600) -> None:
+        self.gameState = gameState
+        self.server = server
+        self.checksum_interval = checksum_interval
+        self.keyframe_interval = keyframe_interval
+        self.histories = list(gameState.inputHistories.values())
+        # Frame every player's inputs have been sent up to
+        self.sentFrame = gameState.current_frame
+
+        server.publish(HEADER.pack(replay.MAGIC, replay.VERSION, constants.SIMULATION_RATE, checksum_interval,
+                                   len(self.histories)), header=True)
+        server.publish(self.packKeyframe(), keyframe=True)
+
+    def packKeyframe(self) -> bytes:
+        frame = self.gameState.current_frame
+        payload = encodeKeyframe(self.gameState)
+        return RECORD.pack(RECORD_KEYFRAME, 0, 0, frame, frame, len(payload)) + payload
+
+    def record(self) -> None:
+        frame = self.gameState.current_frame
+        records = []
+        for (index, inputHistory) in enumerate(self.histories):
+            # Inputs covering frames since the last record(), newest first; usually just the newest one
+            spans = []
+            for input in reversed(inputHistory.inputs):
+                if input.end_frame <= self.sentFrame:
+                    break
+                spans.append(RECORD.pack(RECORD_SPAN, index, 0, max(input.start_frame, self.sentFrame),
+                                         min(input.end_frame, frame), input.bits))
+            records.extend(reversed(spans))
+        self.sentFrame = frame
+
+        if frame % self.checksum_interval == 0:
+            records.append(RECORD.pack(RECORD_CHECKSUM, 0, 0, frame, frame, self.gameState.checksum()))
+        self.server.publish(b"".join(records))
+        if frame % self.keyframe_interval == 0:
+            self.server.publish(self.packKeyframe(), keyframe=True)
+
+class SpectatorViewer():
+    '''
+    Rebuilds a broadcast match in gameState from the stream's bytes, simulating frames as soon as
+    every player's input for them has arrived.
+    '''
+    def __init__(self, gameState: GameState) -> None:
+        self.gameState = gameState
+        self.histories = list(gameState.inputHistories.values())
+        self.buffer = bytearray()
+        self.headerRead = False
+        # Nothing is simulated until the first keyframe
+        self.synced = False
+        # Spans received but not played yet, per player: (bits, start frame, end frame)
+        self.spans: list[deque[tuple[int, int, int]]] = [deque() for _ in self.histories]
+        self.checksums: deque[tuple[int, int]] = deque()
+        self.desyncDetector = DesyncDetector()
+        # Frame of the keyframe the viewer started from, and keyframes received in all
+        self.start_frame: int | None = None
+        self.keyframes = 0
+
+    def feed(self, data: bytes) -> int:
+        '''
+        Takes the next bytes of the stream (any amount), and simulates every frame they complete.
+        Returns how many frames were simulated.
+        '''
+        self.buffer += data
+        position = 0
+        if not self.headerRead:
+            if len(self.buffer) < HEADER.size:
+                return 0
+            (magic, version, _, _, player_count) = HEADER.unpack_from(self.buffer)
+            if magic != replay.MAGIC or version != replay.VERSION:
+                raise ReplayError(f"Not a version {replay.VERSION} stream")
+            if player_count != len(self.histories):
+                raise ReplayError(f"Stream has {player_count} players, GameState has {len(self.histories)}")
+            self.headerRead = True
+            position = HEADER.size
+
+        while len(self.buffer) - position >= RECORD.size:
+            (record_type, player_index, _, start_frame, end_frame, value) = RECORD.unpack_from(self.buffer, position)
+            if record_type == RECORD_KEYFRAME:
+                if len(self.buffer) - position < RECORD.size + value:
+                    break
+                payload = bytes(self.buffer[position + RECORD.size:position + RECORD.size + value])
+                position = position + RECORD.size + value
+                if not self.synced:
+                    loadKeyframe(self.gameState, payload)
+                    self.start_frame = start_frame
+                    self.synced = True
+                self.keyframes = self.keyframes + 1
+                continue
+            position = position + RECORD.size
+            if not self.synced:
+                continue
+            if record_type == RECORD_SPAN:
+                self.spans[player_index].append((value, start_frame, end_frame))
+            elif record_type == RECORD_CHECKSUM:
+                self.checksums.append((end_frame, value))
+        del self.buffer[:position]
+        return self.advance()
+
+    def advance(self) -> int:
+        simulated = 0
+        while self.synced:
+            # Checksums can arrive after the spans of the frame they are for, so they're checked before stepping too
+            self.checkChecksums()
+            frame = self.gameState.current_frame
+            for spans in self.spans:
+                while len(spans) > 0 and spans[0][2] <= frame:
+                    spans.popleft()
+            if any(len(spans) == 0 for spans in self.spans):
+                break
+            for (inputHistory, spans) in zip(self.histories, self.spans):
+                inputHistory.append(inputs.Input(spans[0][0], frame, frame + 1))
+            self.gameState.update()
+            simulated = simulated + 1
+        return simulated
+
+    def checkChecksums(self) -> None:
+        frame = self.gameState.current_frame
+        while len(self.checksums) > 0 and self.checksums[0][0] <= frame:
+            (checksum_frame, expected) = self.checksums.popleft()
+            if checksum_frame == frame:
+                self.desyncDetector.addRemote(frame, expected)
+                self.desyncDetector.addLocal(frame, self.gameState.checksum())
+
+async def watch(host: str, port: int, gameState: GameState) -> SpectatorViewer:
+    '''
+    Connects to a SpectatorServer, and rebuilds its match in gameState until the server disconnects.
+    '''
+    viewer = SpectatorViewer(gameState)
+    (reader, writer) = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            data = await reader.read(65536)
+            if len(data) == 0:
+                break
+            viewer.feed(data)
+    finally:
+        writer.close()
+    return viewer
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Watch a broadcast match headlessly, checking it stays in sync.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    inputHistories = {player: inputs.InputHistory(player) for player in ("P1", "P2")}
+    viewer = asyncio.run(watch(args.host, args.port, GameState(inputHistories, headless=True)))
+    print(f"Watched up to frame {viewer.gameState.current_frame}: {viewer.desyncDetector}")
+
+if __name__ == "__main__":
+    main()
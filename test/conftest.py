@@ -0,0 +1,13 @@
+import pytest
+
+import constants
+
+
+@pytest.fixture(autouse=True, scope="session")
+def noCharacterCache():
+    '''
+    Compiles character definitions without caching them, so the tests don't write .character_cache/ into the working directory.
+    '''
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(constants, "CHARACTER_CACHE_DIR", None)
+        yield
@@ -0,0 +1,50 @@
+'''
+Helpers shared by the tests: stepping headless GameStates through scripted inputs, and comparing their state.
+'''
+import random
+
+import inputs
+import simulation
+
+
+def stepFrame(gameState, bits=None, ai=None):
+    '''
+    Simulates one frame, each player holding their button bitmask in bits (neutral if missing),
+    except ai's player if an AIController is given, whose Input ai appends.
+    '''
+    frame = gameState.current_frame
+    for (player, inputHistory) in gameState.inputHistories.items():
+        if ai is None or player != ai.player:
+            inputHistory.append(inputs.Input(bits.get(player, 0) if bits else 0, frame, frame + 1))
+    if ai is not None:
+        ai.update()
+    gameState.update()
+
+
+def stepFrames(gameState, scripts, frames=None):
+    '''
+    Simulates frames frames with each player's simulation.Script, indexed by frame number (neutral past its end),
+    by default up to the end of the longest script.
+    '''
+    if frames is None:
+        frames = max(len(script) for script in scripts.values()) - gameState.current_frame
+    for _ in range(frames):
+        frame = gameState.current_frame
+        stepFrame(gameState, {player: script[frame] for (player, script) in scripts.items() if frame < len(script)})
+
+
+def holdFrames(gameState, bits, frames):
+    '''
+    Simulates frames frames, each player holding their button bitmask in bits throughout (see stepFrame()).
+    '''
+    for _ in range(frames):
+        stepFrame(gameState, bits)
+
+
+def randomScripts(length, seed=0):
+    rng = random.Random(seed)
+    return {player: simulation.randomScript(rng, length) for player in simulation.PLAYERS}
+
+
+def characterValues(gameState):
+    return [(c.xpos, c.ypos, c.hp, c.facingLeft, c.roundsWon) for c in gameState.characters.values()]
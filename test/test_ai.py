@@ -0,0 +1,59 @@
+import simulation
+from ai import AIController
+from inputs import Button
+
+from .helpers import stepFrame
+
+def test_createActions_facing():
+    gameState = simulation.createHeadlessGame()
+    ai = AIController(gameState, action_frames=6)
+    
+    (right, left) = ai.actions
+    assert all(len(action) >= 6 for action in right)
+    # Walking forward is RIGHT facing right and LEFT facing left
+    assert right[1] == (Button.RIGHT.bit,) * 6
+    assert left[1] == (Button.LEFT.bit,) * 6
+    # 236P facing right: down, down-forward, forward + punch
+    fireball = (Button.DOWN.bit, Button.DOWN.bit | Button.RIGHT.bit, Button.RIGHT.bit | Button.PUNCH.bit)
+    assert fireball + (fireball[-1],) * 3 in right
+    
+    
+def test_search_leavesGameStateUntouched():
+    gameState = simulation.createHeadlessGame()
+    ai = AIController(gameState, time_budget=1.0, max_depth=2)
+    for _ in range(10):
+        stepFrame(gameState, ai=ai)
+    
+    checksum = gameState.checksum()
+    newest = gameState.inputHistories["P2"].inputs[-1]
+    end_frame = newest.end_frame
+    ai.search()
+    
+    assert ai.depth == 2
+    assert gameState.checksum() == checksum
+    assert gameState.inputHistories["P2"].inputs[-1] is newest
+    assert newest.end_frame == end_frame
+    
+    
+def test_search_timeBudget():
+    gameState = simulation.createHeadlessGame()
+    ai = AIController(gameState, time_budget=0.0, max_depth=4)
+    stepFrame(gameState, ai=ai)
+    
+    # Out of time before finishing any depth: falls back to standing still
+    assert ai.depth == 0
+    assert list(ai.plan) == [0] * (ai.action_frames - 1)
+    
+    
+def test_ai_beatsIdleOpponent():
+    gameState = simulation.createHeadlessGame()
+    ai = AIController(gameState, time_budget=1.0, max_depth=1)
+    for _ in range(600):
+        stepFrame(gameState, ai=ai)
+        if gameState.isRoundOver():
+            break
+    
+    characters = gameState.characters
+    assert characters["P2"].hp > characters["P1"].hp
+    # Only P2's InputHistory was written by the AI
+    assert all(frame_input.bits == 0 for frame_input in gameState.inputHistories["P1"].inputs)
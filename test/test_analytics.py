@@ -0,0 +1,135 @@
+import os
+import random
+from collections import Counter
+
+import pytest
+
+import analytics
+import inputs
+import replay
+import simulation
+from input_capture import InputCapture
+from inputs import Button
+
+
+def recordMatch(path, frames, seed):
+    rng = random.Random(seed)
+    scripts = {player: simulation.randomScript(rng, frames) for player in simulation.PLAYERS}
+    gameState = simulation.createHeadlessGame()
+    recorder = replay.ReplayRecorder(open(path, "wb"), gameState, 10)
+    # Per-frame bits and state of each player, for checking queries against
+    frameValues = {player: [] for player in simulation.PLAYERS}
+    for frame in range(frames):
+        for (player, inputHistory) in gameState.inputHistories.items():
+            inputHistory.append(inputs.Input(scripts[player][frame], frame, frame + 1))
+        gameState.update()
+        recorder.record()
+        for (player, character) in gameState.characters.items():
+            frameValues[player].append((scripts[player][frame], character.hp, character.facingLeft, character.xpos))
+    recorder.close()
+    return frameValues
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    paths = [str(tmp_path / f"match{seed}.fgrp") for seed in range(3)]
+    frameValues = {path: recordMatch(path, 600, seed) for (seed, path) in enumerate(paths)}
+    return (analytics.ReplayDataset(paths, str(tmp_path / "index")), frameValues)
+
+
+def test_frameIndex_columns(dataset):
+    (dataset, frameValues) = dataset
+    assert dataset.buildIndexes() == 3
+    for (path, index) in dataset.iterIndexes():
+        assert index.frame_count == 600
+        for player in simulation.PLAYERS:
+            assert list(index.column(player, "bits")) == [values[0] for values in frameValues[path][player]]
+            assert list(index.column(player, "hp")) == [values[1] for values in frameValues[path][player]]
+            assert list(index.column(player, "xpos")) == [values[3] for values in frameValues[path][player]]
+        assert len(index.latencies()) == 0
+
+
+def test_frameIndex_cache(dataset):
+    (dataset, _) = dataset
+    assert dataset.buildIndexes() == 3
+    assert dataset.buildIndexes() == 0
+    # Re-recording a replay makes its index outdated
+    os.utime(dataset.paths[1], ns=(0, 0))
+    assert dataset.buildIndexes() == 1
+    assert dataset.buildIndexes() == 0
+
+
+def test_heldBackWhileLosingHp(dataset):
+    (dataset, frameValues) = dataset
+    results = dataset.heldBackWhileLosingHp("P1")
+
+    expected = {}
+    for (path, values) in frameValues.items():
+        frames = []
+        for frame in range(1, len(values["P1"])):
+            (bits, hp, _, _) = values["P1"][frame]
+            (_, previous_hp, facingLeft, _) = values["P1"][frame - 1]
+            back = Button.RIGHT.bit if facingLeft else Button.LEFT.bit
+            if bits & back and hp < previous_hp:
+                frames.append(frame)
+        if len(frames) > 0:
+            expected[path] = frames
+    assert len(expected) > 0
+    assert results == expected
+
+
+def test_buttonCombinations(dataset):
+    (dataset, frameValues) = dataset
+    combinations = dataset.buttonCombinations()
+
+    expected = Counter()
+    for values in frameValues.values():
+        for player in simulation.PLAYERS:
+            previous = 0
+            for (bits, _, _, _) in values[player]:
+                held = bits & analytics.ATTACK_BITS
+                if held != 0 and held != previous:
+                    expected[held] += 1
+                previous = held
+    assert combinations == expected
+    assert analytics.formatCombination(Button.LEFT.bit | Button.PUNCH.bit | Button.KICK.bit) == "← PK"
+
+
+def test_masks():
+    bits = memoryview(bytearray(4 * 4)).cast('I')
+    for (frame, value) in enumerate([0, Button.LEFT.bit, Button.PUNCH.bit | Button.MACRO_PK.bit, Button.PUNCH.bit]):
+        bits[frame] = value
+    assert analytics.heldMask(bits, Button.LEFT.bit | Button.PUNCH.bit) == bytes([0, 1, 1, 1])
+    assert analytics.heldMask(bits, Button.MACRO_PK.bit) == bytes([0, 0, 1, 0])
+    assert analytics.decreasedMask([5, 3, 3, 4, 1]) == bytes([0, 1, 0, 0, 1])
+    assert analytics.changedMask([5, 3, 3]) == bytes([1, 1, 0])
+    assert analytics.maskFrames(analytics.andMasks(bytes([1, 1, 0, 1]), analytics.notMask(bytes([0, 1, 0, 0])))) == [0, 3]
+
+
+def test_latencyHistogram(tmp_path):
+    capture = InputCapture()
+    gameState = simulation.createHeadlessGame()
+    path = str(tmp_path / "match.fgrp")
+    recorder = replay.ReplayRecorder(open(path, "wb"), gameState, 10, inputCapture=capture)
+    latencies = [500, 1500, 1700, 2500, 9000]
+    for (frame, latency) in enumerate(latencies):
+        capture.latencies[capture.latency_count] = latency * 1000
+        capture.latency_count = capture.latency_count + 1
+        for inputHistory in gameState.inputHistories.values():
+            inputHistory.append(inputs.Input(0, frame, frame + 1))
+        gameState.update()
+        recorder.record()
+    recorder.close()
+
+    dataset = analytics.ReplayDataset([path], str(tmp_path / "index"))
+    histogram = dataset.latencyHistogram(1000)
+    assert histogram == {0: 1, 1: 2, 2: 1, 9: 1}
+    assert analytics.histogramPercentile(histogram, 50) == 1
+    assert analytics.histogramPercentile(histogram, 99) == 9
+
+
+def test_main(dataset, capsys):
+    (dataset, _) = dataset
+    analytics.main([os.path.dirname(dataset.paths[0]), "--index-dir", dataset.index_dir, "--query", "combinations"])
+    output = capsys.readouterr().out
+    assert output.startswith("3 replays (3 indexed)")
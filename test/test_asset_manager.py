@@ -0,0 +1,104 @@
+import pygame as pg
+
+from asset_manager import AssetManager
+
+SPRITE_PATH = "assets/guy2.png"
+
+
+def test_getImage_loadsOnce():
+    manager = AssetManager()
+    image = manager.getImage(SPRITE_PATH)
+    
+    assert manager.getImage(SPRITE_PATH) is image
+    assert manager.getFlippedImage(SPRITE_PATH) is manager.getFlippedImage(SPRITE_PATH)
+    
+
+def test_getFlippedImage():
+    manager = AssetManager()
+    image = manager.getImage(SPRITE_PATH)
+    flipped = manager.getFlippedImage(SPRITE_PATH)
+    
+    (width, height) = image.get_size()
+    assert flipped.get_size() == (width, height)
+    for y in range(0, height, 7):
+        assert flipped.get_at((0, y)) == image.get_at((width - 1, y))
+        
+
+def test_getDerived_lru():
+    manager = AssetManager(max_derived=2)
+    created = []
+    def create(name):
+        def inner():
+            created.append(name)
+            return pg.Surface((1, 1))
+        return inner
+    
+    a = manager.getDerived("a", create("a"))
+    manager.getDerived("b", create("b"))
+    # "a" is now the most recently used, so adding "c" evicts "b"
+    assert manager.getDerived("a", create("a")) is a
+    manager.getDerived("c", create("c"))
+    manager.getDerived("b", create("b"))
+    
+    assert created == ["a", "b", "c", "b"]
+    assert list(manager.derived.keys()) == ["c", "b"]
+    
+    
+def test_getScaledImage():
+    manager = AssetManager()
+    scaled = manager.getScaledImage(SPRITE_PATH, (10, 20))
+    
+    assert scaled.get_size() == (10, 20)
+    assert manager.getScaledImage(SPRITE_PATH, (10, 20)) is scaled
+    assert manager.getScaledImage(SPRITE_PATH, (10, 20), flipped=True) is not scaled
+
+
+def test_renderText_cache():
+    pg.font.init()
+    manager = AssetManager(max_texts=2)
+    font = manager.getFont("assets/seguisym.ttf", 20)
+    assert manager.getFont("assets/seguisym.ttf", 20) is font
+    
+    text = manager.renderText(font, "→ P 3", (255, 255, 255))
+    assert manager.renderText(font, "→ P 3", (255, 255, 255)) is text
+    assert manager.renderText(font, "→ P 3", (255, 0, 0)) is not text
+    
+    # Oldest text is evicted past max_texts
+    manager.renderText(font, "← K 1", (255, 255, 255))
+    assert len(manager.texts) == 2
+    assert manager.renderText(font, "→ P 3", (255, 255, 255)) is not text
+
+
+def test_preloadImages():
+    manager = AssetManager()
+    manager.preloadImages([SPRITE_PATH])
+    preloaded = manager.preloadedImages[SPRITE_PATH]
+    
+    image = manager.getImage(SPRITE_PATH)
+    assert image.get_size() == preloaded.get_size()
+    assert SPRITE_PATH not in manager.preloadedImages
+    # Already loaded images aren't read again
+    manager.preloadImages([SPRITE_PATH])
+    assert manager.preloadedImages == {}
+    
+    
+def test_findSysFont_cache(tmp_path):
+    cache_path = str(tmp_path / "fonts.json")
+    manager = AssetManager(font_cache_path=cache_path)
+    path = manager.findSysFont("NoSuchFontAnywhere")
+    assert path is None
+    
+    # A new AssetManager (the next startup) uses the cached result without searching again
+    manager = AssetManager(font_cache_path=cache_path)
+    assert manager.readFontCache() == {"NoSuchFontAnywhere": None}
+    assert manager.findSysFont("NoSuchFontAnywhere") is None
+    assert manager.sysFontPaths == {"NoSuchFontAnywhere": None}
+    
+    
+def test_getSysFont_initializesFont(tmp_path):
+    manager = AssetManager(font_cache_path=str(tmp_path / "fonts.json"))
+    font = manager.getSysFont("NoSuchFontAnywhere", 12)
+    
+    assert pg.font.get_init()
+    assert manager.getSysFont("NoSuchFontAnywhere", 12) is font
+    assert font.render("99", True, (255, 255, 255)).get_width() > 0
@@ -0,0 +1,34 @@
+import json
+
+import benchmark
+
+
+def test_runBenchmarks():
+    results = benchmark.runBenchmarks(["input_history_append", "gamestate_update_headless"], min_time=0.001, repeat=2)
+    
+    assert list(results["benchmarks"]) == ["input_history_append", "gamestate_update_headless"]
+    for result in results["benchmarks"].values():
+        assert result["repeat"] == 2
+        assert result["ops_per_second"] == 1 / result["best_seconds"] > 0
+    # Output is plain JSON
+    assert json.loads(json.dumps(results)) == results
+
+
+def test_compareResults():
+    baseline = {"benchmarks": {"fast": {"best_seconds": 1.0}, "slow": {"best_seconds": 1.0}, "removed": {"best_seconds": 1.0}}}
+    results = {"benchmarks": {"fast": {"best_seconds": 0.5}, "slow": {"best_seconds": 1.5}, "new": {"best_seconds": 9.0}}}
+    
+    assert benchmark.compareResults(results, baseline, tolerance=0.1) == [("slow", 0.5)]
+    assert benchmark.compareResults(results, baseline, tolerance=0.6) == []
+
+
+def test_main_failsOnRegression(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    assert benchmark.main(["get_frame_buttons", "--min-time", "0.001", "--repeat", "1", "--output", str(output)]) == 0
+    
+    # A baseline that was impossibly fast
+    baseline = json.loads(output.read_text())
+    baseline["benchmarks"]["get_frame_buttons"]["best_seconds"] = 1e-12
+    output.write_text(json.dumps(baseline))
+    assert benchmark.main(["get_frame_buttons", "--min-time", "0.001", "--repeat", "1", "--baseline", str(output)]) == 1
+    assert "REGRESSION: get_frame_buttons" in capsys.readouterr().err
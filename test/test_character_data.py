@@ -0,0 +1,158 @@
+import json
+
+import pytest
+
+import character_data
+import simulation
+from character_data import BOX_SIZE
+from inputs import Button
+
+from .helpers import holdFrames, stepFrame
+
+DEFINITION = {
+    "name": "Test",
+    "sprite": "assets/guy2.png",
+    "stats": {"maxHp": 100, "forwardWalkspeed": 4, "backwardWalkspeed": 2},
+    "hurtboxes": [{"x": -10, "y": -50, "width": 20, "height": 50}],
+    "moves": {
+        "Jab": {
+            "button": "P", "startup": 2, "active": 2, "recovery": 1, "damage": 5,
+            "hitboxes": [{"x": 5, "y": -40, "width": 10, "height": 5}]
+        },
+        "Uppercut": {
+            "command": "623P", "startup": 1, "active": 3, "recovery": 2,
+            "hitboxes": [{"frames": [2, 3], "x": 0, "y": -60, "width": 8, "height": 20}],
+            "hurtboxes": [{"frames": [4, 5], "x": -10, "y": -50, "width": 20, "height": 50}]
+        }
+    }
+}
+
+
+def frameBoxes(data, boxes, starts, ends, move, frame):
+    index = data.moveStart[move] + frame
+    return [tuple(boxes[i:i + BOX_SIZE]) for i in range(BOX_SIZE * starts[index], BOX_SIZE * ends[index], BOX_SIZE)]
+
+
+def test_compileCharacter():
+    data = character_data.compileCharacter(DEFINITION)
+    
+    assert (data.maxHp, data.forwardWalkspeed, data.backwardWalkspeed) == (100, 4, 2)
+    assert data.moveNames == ["Jab", "Uppercut"]
+    assert list(data.moveButtons) == [Button.PUNCH.bit, 0]
+    assert list(data.moveLength) == [5, 6]
+    assert list(data.moveStart) == [0, 5]
+    assert list(data.frameActive) == [0, 0, 1, 1, 0] + [0, 1, 1, 1, 0, 0]
+    assert [command.name for command in data.commands.commands] == ["Uppercut"]
+    
+    jab = data.moveIndices["Jab"]
+    hits = [frameBoxes(data, data.hitboxes, data.frameHitboxStart, data.frameHitboxEnd, jab, frame) for frame in range(5)]
+    assert hits == [[], [], [(5, -40, 10, 5)], [(5, -40, 10, 5)], []]
+    # Moves without hurtboxes use the idle ones on every frame
+    assert frameBoxes(data, data.hurtboxes, data.frameHurtboxStart, data.frameHurtboxEnd, jab, 0) == [(-10, -50, 20, 50)]
+    
+    uppercut = data.moveIndices["Uppercut"]
+    hits = [len(frameBoxes(data, data.hitboxes, data.frameHitboxStart, data.frameHitboxEnd, uppercut, frame)) for frame in range(6)]
+    assert hits == [0, 0, 1, 1, 0, 0]
+    hurts = [len(frameBoxes(data, data.hurtboxes, data.frameHurtboxStart, data.frameHurtboxEnd, uppercut, frame)) for frame in range(6)]
+    assert hurts == [0, 0, 0, 0, 1, 1]
+
+
+def test_compileCharacter_invalid():
+    with pytest.raises(ValueError):
+        character_data.compileCharacter({**DEFINITION, "stats": {"maxHp": 1}})
+    with pytest.raises(ValueError):
+        character_data.compileCharacter({**DEFINITION, "moves": {"Nothing": {"startup": 1, "active": 1, "recovery": 1}}})
+    with pytest.raises(ValueError):
+        character_data.compileCharacter({**DEFINITION, "moves": {"Jab": {"button": "Q", "startup": 1, "active": 1, "recovery": 1}}})
+
+
+def test_loadCharacterData_cache(tmp_path, monkeypatch):
+    path = tmp_path / "test.json"
+    path.write_text(json.dumps(DEFINITION))
+    cache_dir = tmp_path / "cache"
+    
+    data = character_data.loadCharacterData(str(path), str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 1
+    
+    # Cached data is used without compiling
+    def fail(*args):
+        raise AssertionError("compiled again")
+    with monkeypatch.context() as patch:
+        patch.setattr(character_data, "compileCharacter", fail)
+        cached = character_data.loadCharacterData(str(path), str(cache_dir))
+    assert cached.moveNames == data.moveNames
+    assert cached.hitboxes == data.hitboxes
+    assert [command.name for command in cached.commands.commands] == ["Uppercut"]
+    
+    # Changing the source invalidates the cache
+    path.write_text(json.dumps({**DEFINITION, "stats": {**DEFINITION["stats"], "maxHp": 150}}))
+    assert character_data.loadCharacterData(str(path), str(cache_dir)).maxHp == 150
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+def test_character_startsMoves():
+    gameState = simulation.createHeadlessGame()
+    character = gameState.characters["P1"]
+    data = character.data
+    
+    stepFrame(gameState, {"P1": Button.PUNCH.bit})
+    assert data.moveNames[character.move] == "5P"
+    assert character.moveFrame == 0
+    # Can't walk during a move
+    stepFrame(gameState, {"P1": Button.RIGHT.bit})
+    assert character.xpos == 50
+    for _ in range(data.moveLength[character.move]):
+        stepFrame(gameState)
+    assert character.move == -1
+    
+    # Dragon punch motion, forward down downforward + Punch
+    for bits in (Button.RIGHT.bit, Button.DOWN.bit, Button.DOWN.bit | Button.RIGHT.bit):
+        stepFrame(gameState, {"P1": bits})
+    stepFrame(gameState, {"P1": Button.DOWN.bit | Button.RIGHT.bit | Button.PUNCH.bit})
+    assert data.moveNames[character.move] == "Dragon Punch"
+
+
+def test_character_moveFrames():
+    gameState = simulation.createHeadlessGame()
+    character = gameState.characters["P1"]
+    jab = character.data.moveIndices["5P"]
+    
+    # Holding the button doesn't restart the move, which counts up one frame per update until it ends
+    for frame in range(character.data.moveLength[jab]):
+        stepFrame(gameState, {"P1": Button.PUNCH.bit})
+        assert (character.move, character.moveFrame) == (jab, frame)
+    stepFrame(gameState, {"P1": Button.PUNCH.bit})
+    assert character.move == -1
+
+
+def test_character_stun():
+    gameState = simulation.createHeadlessGame()
+    character = gameState.characters["P1"]
+    character.stun = 3
+    
+    # Can't walk or start moves while stunned
+    holdFrames(gameState, {"P1": Button.RIGHT.bit}, 2)
+    stepFrame(gameState, {"P1": Button.RIGHT.bit | Button.PUNCH.bit})
+    assert (character.stun, character.xpos, character.move) == (0, 50, -1)
+    stepFrame(gameState, {"P1": Button.RIGHT.bit})
+    assert character.xpos == 50 + character.forwardWalkspeed
+
+
+def test_character_projectileFrame():
+    gameState = simulation.createHeadlessGame()
+    character = gameState.characters["P1"]
+    data = character.data
+    fireball = data.moveIndices["Fireball"]
+    
+    # Quarter circle forward + Punch
+    for bits in (Button.DOWN.bit, Button.DOWN.bit | Button.RIGHT.bit, Button.RIGHT.bit | Button.PUNCH.bit):
+        stepFrame(gameState, {"P1": bits})
+    assert (character.move, character.moveFrame) == (fireball, 0)
+    while character.moveFrame < data.moveProjectileFrame[fireball]:
+        assert len(gameState.projectiles) == 0
+        stepFrame(gameState)
+    # Spawned in front of the Character, then moved along with every other projectile that frame
+    assert len(gameState.projectiles) == 1
+    projectile = gameState.projectiles[0]
+    assert projectile.xpos == character.xpos + data.moveProjectileX[fireball] + data.moveProjectileSpeed[fireball]
+    assert projectile.ypos == character.ypos + data.moveProjectileY[fireball]
@@ -0,0 +1,175 @@
+import json
+import random
+from array import array
+
+import constants
+import inputs
+import simulation
+from collision import CollisionWorld, HIT, HURT
+from gamestate import GameState, Projectile
+from inputs import Button
+
+from .helpers import holdFrames, stepFrame, stepFrames
+
+
+def test_addBoxes_flipsFacingLeft():
+    world = CollisionWorld()
+    boxes = array('h', [10, -50, 20, 30])
+    world.addBoxes(HIT, "right", 0, 100, 200, False, boxes, 0, 1)
+    world.addBoxes(HIT, "left", 0, 100, 200, True, boxes, 0, 1)
+    assert list(world.iterRects(HIT)) == [(110, 150, 20, 30), (70, 150, 20, 30)]
+
+
+def test_findCollisions():
+    world = CollisionWorld()
+    hurtbox = array('h', [-10, -50, 20, 50])
+    # Two hitboxes whose bounds overlap the hurtbox, but only the second box does
+    hitboxes = array('h', [0, -100, 10, 10, 5, -20, 10, 10])
+    world.addBoxes(HURT, "defender", 1, 100, 300, False, hurtbox, 0, 1)
+    world.addBoxes(HIT, "attacker", 0, 80, 300, False, hitboxes, 0, 2)
+    world.addBoxes(HIT, "teammate", 1, 80, 300, False, hitboxes, 0, 2)
+    world.addBoxes(HIT, "missed", 0, 80, 300, False, hitboxes, 0, 1)
+    
+    assert world.findCollisions() == [("attacker", "defender")]
+
+
+def test_findCollisions_broadPhaseSkipsFarApartBoxes():
+    world = CollisionWorld()
+    boxes = array('h', [-10, -50, 20, 50] * 10)
+    world.addBoxes(HURT, "P1", 0, 50, 300, False, boxes, 0, 10)
+    world.addBoxes(HIT, "P1", 0, 50, 300, False, boxes, 0, 10)
+    world.addBoxes(HURT, "P2", 1, 500, 300, True, boxes, 0, 10)
+    world.addBoxes(HIT, "P2", 1, 500, 300, True, boxes, 0, 10)
+    
+    assert world.findCollisions() == []
+    assert world.boxTests == 0
+
+
+def test_findCollisions_matchesBruteForce():
+    rng = random.Random(8)
+    world = CollisionWorld()
+    box = array('h', [0, 0, 8, 8])
+    for i in range(300):
+        kind = rng.choice((HIT, HURT))
+        world.addBoxes(kind, (kind, i), rng.randrange(2), rng.randrange(2000), rng.randrange(200), False, box, 0, 1)
+    
+    expected = []
+    for hit in range(len(world.groupOwners[HIT])):
+        for hurt in range(len(world.groupOwners[HURT])):
+            if world.groupTeams[HIT][hit] != world.groupTeams[HURT][hurt] and world.groupsOverlap(hit, hurt):
+                expected.append((world.groupOwners[HIT][hit], world.groupOwners[HURT][hurt]))
+    assert len(expected) > 0
+    assert world.findCollisions() == expected
+    # Far fewer box tests than the 300 * 300 / 4 pairs
+    assert world.boxTests < 1000
+
+
+def test_gameState_hitAndBlock():
+    gameState = simulation.createHeadlessGame()
+    (p1, p2) = gameState.characters.values()
+    # Walk P1 into range, then jab
+    holdFrames(gameState, {"P1": Button.RIGHT.bit}, 45)
+    assert p2.xpos - p1.xpos == 90
+    holdFrames(gameState, {"P1": Button.PUNCH.bit}, 10)
+    assert p2.hp == p2.maxHp - p1.data.moveDamage[p1.data.moveIndices["5P"]]
+    assert p1.moveHit
+    
+    # Holding back (right, facing left) blocks
+    holdFrames(gameState, {}, 30)
+    hp = p2.hp
+    holdFrames(gameState, {"P1": Button.PUNCH.bit}, 4)
+    stepFrame(gameState, {"P1": Button.PUNCH.bit, "P2": Button.RIGHT.bit})
+    assert p2.stun == p1.data.moveBlockstun[p1.move]
+    # Only the HP lost by walking backwards (for now)
+    assert p2.hp == hp - 1
+
+
+def test_gameState_projectile():
+    gameState = simulation.createHeadlessGame()
+    (p1, p2) = gameState.characters.values()
+    # Quarter circle forward + Punch
+    script = [Button.DOWN.bit, Button.DOWN.bit | Button.RIGHT.bit, Button.RIGHT.bit | Button.PUNCH.bit] + [0] * 100
+    stepFrames(gameState, {"P1": script}, 20)
+    assert len(gameState.projectiles) == 1
+    
+    # Rolling back restores projectiles
+    snapshot = gameState.saveState()
+    checksum = gameState.checksum()
+    stepFrames(gameState, {"P1": script})
+    assert len(gameState.projectiles) == 0
+    assert p2.hp == p2.maxHp - p1.data.moveDamage[p1.data.moveIndices["Fireball"]]
+    
+    gameState.loadState(snapshot)
+    assert len(gameState.projectiles) == 1
+    assert gameState.checksum() == checksum
+
+
+def test_gameState_trade():
+    gameState = simulation.createHeadlessGame()
+    (p1, p2) = gameState.characters.values()
+    holdFrames(gameState, {"P1": Button.RIGHT.bit}, 45)
+    # Both jab on the same frame: each takes the other's jab, not whatever move the cancelled one reads as
+    jab = p1.data.moveIndices["5P"]
+    for _ in range(10):
+        stepFrame(gameState, {"P1": Button.PUNCH.bit, "P2": Button.PUNCH.bit})
+        if p1.hp < p1.maxHp:
+            break
+    assert p1.hp == p1.maxHp - p2.data.moveDamage[jab]
+    assert p2.hp == p2.maxHp - p1.data.moveDamage[jab]
+    assert p1.stun == p2.data.moveHitstun[jab]
+    assert p2.stun == p1.data.moveHitstun[jab]
+
+
+def test_gameState_blockMultiHitProjectile(tmp_path):
+    # Fireball hitting twice, the second time during the blockstun of the first
+    with open(constants.DEFAULT_CHARACTER) as file:
+        definition = json.load(file)
+    definition["moves"]["Fireball"]["projectile"].update(hits=2, hitInterval=4)
+    path = tmp_path / "guy.json"
+    path.write_text(json.dumps(definition))
+    inputHistories = {player: inputs.InputHistory(player) for player in simulation.PLAYERS}
+    gameState = GameState(inputHistories, headless=True, characterPaths={"P1": str(path)})
+    (p1, p2) = gameState.characters.values()
+    p2.xpos = p1.xpos + 150
+    
+    # Quarter circle forward + Punch
+    for bits in (Button.DOWN.bit, Button.DOWN.bit | Button.RIGHT.bit, Button.RIGHT.bit | Button.PUNCH.bit):
+        stepFrame(gameState, {"P1": bits})
+    while len(gameState.projectiles) == 0:
+        stepFrame(gameState)
+    
+    # Holding back (right, facing left) blocks both hits, only losing the HP of walking backwards (for now)
+    walking_frames = 0
+    blocked = 0
+    while len(gameState.projectiles) > 0:
+        if p2.stun == 0:
+            walking_frames = walking_frames + 1
+        stun = p2.stun
+        stepFrame(gameState, {"P2": Button.RIGHT.bit})
+        if p2.stun > stun:
+            assert p2.blocking
+            blocked = blocked + 1
+    assert blocked == 2
+    assert p2.hp == p2.maxHp - walking_frames
+
+
+def test_gameState_blockSameFrameHits():
+    gameState = simulation.createHeadlessGame()
+    (p1, p2) = gameState.characters.values()
+    holdFrames(gameState, {"P1": Button.RIGHT.bit}, 45)
+    jab = p1.data.moveIndices["5P"]
+    stepFrame(gameState, {"P1": Button.PUNCH.bit})
+    while not p1.data.frameActive[p1.data.moveStart[jab] + p1.moveFrame + 1]:
+        stepFrame(gameState)
+    
+    # A projectile reaching P2 on the frame the jab becomes active: both are blocked
+    projectile = Projectile(p1, p1.data.moveIndices["Fireball"])
+    projectile.xpos = p2.xpos
+    gameState.projectiles.append(projectile)
+    hp = p2.hp
+    stepFrame(gameState, {"P2": Button.RIGHT.bit})
+    assert p1.moveHit
+    assert len(gameState.projectiles) == 0
+    assert p2.blocking
+    # Only the HP lost by walking backwards (for now)
+    assert p2.hp == hp - 1
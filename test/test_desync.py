@@ -0,0 +1,64 @@
+import random
+
+import constants
+import desync
+import simulation
+from inputs import Button
+
+
+def test_desyncDetector():
+    detector = desync.DesyncDetector()
+    detector.addLocal(1, 100)
+    detector.addLocal(2, 200)
+    detector.addRemote(2, 200)
+    assert detector.compared == 1
+    assert not detector.isDesynced()
+
+    # Either side may report first
+    detector.addRemote(3, 301)
+    detector.addLocal(3, 300)
+    detector.addRemote(1, 101)
+    assert detector.compared == 3
+    assert detector.desyncs == [(3, 300, 301), (1, 100, 101)]
+    assert detector.first_desync_frame == 1
+
+
+def test_desyncDetector_forgetsOldestPending():
+    detector = desync.DesyncDetector(max_pending=2)
+    for frame in range(1, 4):
+        detector.addLocal(frame, frame)
+    assert list(detector.pending[0]) == [2, 3]
+
+
+def test_compareSimulations_findsFirstDivergence():
+    rng = random.Random(6)
+    scripts = {player: simulation.randomScript(rng, 100) for player in simulation.PLAYERS}
+    local = simulation.createHeadlessGame()
+    remote = simulation.createHeadlessGame()
+
+    detector = desync.compareSimulations(local, remote, scripts, max_frames=50)
+    assert detector.compared == 50
+    assert not detector.isDesynced()
+
+    remote.characters["P1"].xpos = remote.characters["P1"].xpos + 1
+    detector = desync.compareSimulations(local, remote, scripts)
+    assert detector.first_desync_frame == 51
+
+
+def test_fixedPointTimer_endsRoundOnExactFrame():
+    frames = constants.ROUND_TIME * constants.SIMULATION_RATE
+    result = simulation.runMatch({"P1": [0] * (frames + 10)})
+    assert result.frames == frames
+    assert result.round_timer == 0.0
+
+
+def test_floatTimer_accumulatesError():
+    fixed = simulation.createHeadlessGame()
+    floating = simulation.createHeadlessGame()
+    floating.fixed_point_timer = False
+    scripts = {"P1": [Button.RIGHT.bit] * 600, "P2": [0] * 600}
+    for gameState in (fixed, floating):
+        for _ in desync.iterChecksums(gameState, scripts):
+            pass
+    assert fixed.round_timer == constants.ROUND_TIME - 10
+    assert floating.round_timer != fixed.round_timer
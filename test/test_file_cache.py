@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+import file_cache
+
+
+def test_getCachePath(tmp_path):
+    path = file_cache.getCachePath("a/guy.json", str(tmp_path), ".pickle")
+    assert os.path.dirname(path) == str(tmp_path)
+    assert os.path.basename(path).startswith("guy-") and path.endswith(".pickle")
+    # Same file name in another folder
+    assert file_cache.getCachePath("b/guy.json", str(tmp_path), ".pickle") != path
+
+
+def test_writeAtomically(tmp_path):
+    path = str(tmp_path / "cache" / "file.bin")
+    with file_cache.writeAtomically(path) as file:
+        file.write(b"new")
+    assert open(path, "rb").read() == b"new"
+    
+    # A failed write leaves the old contents, and no temporary file
+    with pytest.raises(ValueError):
+        with file_cache.writeAtomically(path) as file:
+            file.write(b"partial")
+            raise ValueError()
+    assert open(path, "rb").read() == b"new"
+    assert os.listdir(tmp_path / "cache") == ["file.bin"]
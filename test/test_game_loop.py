@@ -0,0 +1,57 @@
+from game_loop import FixedTimestep
+
+MS = 1_000_000
+
+
+def test_fixedTimestep_steady():
+    timestep = FixedTimestep(60)
+    
+    # First step runs immediately, then one per 1/60s
+    assert timestep.advance(0) == 1
+    assert timestep.advance(8 * MS) == 0
+    assert timestep.alpha == 0.48
+    assert timestep.advance(17 * MS) == 1
+    # Rendering faster than the simulation doesn't speed it up
+    steps = sum(timestep.advance(t * MS) for t in range(18, 1000))
+    assert steps + 2 == 60
+    
+
+def test_fixedTimestep_noDrift():
+    timestep = FixedTimestep(60)
+    # Render at an uneven ~37 fps for an hour
+    steps = sum(timestep.advance(t * 27_027_027) for t in range(37 * 3600))
+    now = (37 * 3600 - 1) * 27_027_027
+    
+    assert steps == now * 60 // 1_000_000_000 + 1
+    
+    
+def test_fixedTimestep_catchUp():
+    timestep = FixedTimestep(60, max_steps_per_frame=4, max_lag=1.0)
+    timestep.advance(0)
+    
+    # A 100ms hitch is caught up over the next frames, without dropping steps
+    assert timestep.advance(100 * MS) == 4
+    assert timestep.alpha == 1.0
+    assert timestep.advance(101 * MS) == 2
+    assert timestep.step_count == 7
+    assert timestep.dropped_steps == 0
+    
+    
+def test_fixedTimestep_dropsLongPauses():
+    timestep = FixedTimestep(60, max_lag=0.25)
+    timestep.advance(0)
+    
+    assert timestep.advance(5000 * MS) == 1
+    assert timestep.dropped_steps == 299
+    assert timestep.advance(5001 * MS) == 0
+
+
+def test_fixedTimestep_getStepTime():
+    timestep = FixedTimestep(60)
+    timestep.advance(5 * MS)
+    
+    assert timestep.getStepTime(0) == 5 * MS
+    # Each step is due once the one before it is a whole step old, which is when advance() runs it
+    assert timestep.advance(timestep.getStepTime(1) - 1) == 0
+    assert timestep.advance(timestep.getStepTime(1)) == 1
+    assert timestep.getStepTime(60) == 5 * MS + 1_000_000_000
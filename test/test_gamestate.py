@@ -0,0 +1,59 @@
+import simulation
+from inputs import Button
+
+from .helpers import characterValues, randomScripts, stepFrames
+
+
+def test_saveState_loadState():
+    scripts = randomScripts(200, seed=3)
+    gameState = simulation.createHeadlessGame()
+    stepFrames(gameState, scripts, 100)
+    
+    snapshot = gameState.saveState()
+    expected_frame = (gameState.current_frame, gameState.round_timer, characterValues(gameState))
+    expected_inputs = [[(i.bits, i.start_frame, i.end_frame) for i in ih.inputs] for ih in gameState.inputHistories.values()]
+    
+    stepFrames(gameState, scripts, 50)
+    end_state = (gameState.current_frame, gameState.round_timer, characterValues(gameState))
+    
+    gameState.loadState(snapshot)
+    assert (gameState.current_frame, gameState.round_timer, characterValues(gameState)) == expected_frame
+    assert [[(i.bits, i.start_frame, i.end_frame) for i in ih.inputs] for ih in gameState.inputHistories.values()] == expected_inputs
+    
+    # Re-simulating from the snapshot gives the same result
+    stepFrames(gameState, scripts, 50)
+    assert (gameState.current_frame, gameState.round_timer, characterValues(gameState)) == end_state
+    
+    
+def test_saveState_reusesSnapshot():
+    gameState = simulation.createHeadlessGame()
+    stepFrames(gameState, {"P1": [Button.RIGHT.bit] * 10, "P2": [0] * 10}, 5)
+    snapshot = gameState.saveState()
+    values = snapshot.values
+    
+    stepFrames(gameState, {"P1": [Button.RIGHT.bit] * 10, "P2": [0] * 10}, 5)
+    assert gameState.saveState(snapshot) is snapshot
+    assert snapshot.values is values
+    assert snapshot.values[0] == 10
+    
+    # Motion recognizer states and projectiles are copied into the snapshot's existing storage
+    motion_state = snapshot.values[-1]
+    fireball = [Button.DOWN.bit, Button.DOWN.bit | Button.RIGHT.bit, Button.RIGHT.bit | Button.PUNCH.bit]
+    scripts = {"P1": [0] * 10 + fireball + [0] * 30, "P2": [0] * 43}
+    stepFrames(gameState, scripts, 20)
+    assert len(gameState.projectiles) == 1
+    gameState.saveState(snapshot)
+    slot = snapshot.projectiles[0]
+    stepFrames(gameState, scripts, 2)
+    assert gameState.saveState(snapshot).values[-1] is motion_state
+    assert snapshot.projectiles[0] is slot
+
+
+def test_character_getRenderPosition():
+    gameState = simulation.createHeadlessGame()
+    stepFrames(gameState, {"P1": [Button.RIGHT.bit], "P2": [0]}, 1)
+    character = gameState.characters["P1"]
+    
+    assert character.getRenderPosition(1.0) == (60, character.ypos)
+    assert character.getRenderPosition(0.0) == (50, character.ypos)
+    assert character.getRenderPosition(0.5) == (55, character.ypos)
@@ -0,0 +1,81 @@
+import pygame as pg
+from pygame import locals
+
+from input_capture import InputCapture
+from inputs import Button
+
+MS = 1_000_000
+
+
+def keyEvent(capture, key, pressed, timestamp):
+    capture.addEvent(pg.event.Event(pg.KEYDOWN if pressed else pg.KEYUP, key=key), timestamp)
+    
+
+def test_buildInputs_heldKeys():
+    capture = InputCapture()
+    keyEvent(capture, locals.K_z, True, 5 * MS)
+    keyEvent(capture, locals.K_LEFT, True, 6 * MS)
+    
+    frame_inputs = capture.buildInputs(0, 16 * MS, 16 * MS)
+    assert frame_inputs["P1"].bits == Button.PUNCH.bit
+    assert frame_inputs["P2"].bits == Button.LEFT.bit
+    assert (frame_inputs["P1"].start_frame, frame_inputs["P1"].end_frame) == (0, 1)
+    
+    # Still held on the next frame with no new events, until released
+    assert capture.buildInputs(1, 33 * MS, 33 * MS)["P1"].bits == Button.PUNCH.bit
+    keyEvent(capture, locals.K_z, False, 40 * MS)
+    assert capture.buildInputs(2, 50 * MS, 50 * MS)["P1"].bits == 0
+    
+
+def test_buildInputs_subFrameTap():
+    capture = InputCapture()
+    # Pressed and released between two boundaries: sampling once per frame would miss it
+    keyEvent(capture, locals.K_x, True, 3 * MS)
+    keyEvent(capture, locals.K_x, False, 7 * MS)
+    
+    assert capture.buildInputs(0, 16 * MS, 16 * MS)["P1"].bits == Button.KICK.bit
+    assert capture.buildInputs(1, 33 * MS, 33 * MS)["P1"].bits == 0
+    assert capture.taps == 1
+    
+    
+def test_buildInputs_boundary():
+    capture = InputCapture()
+    keyEvent(capture, locals.K_z, True, 10 * MS)
+    keyEvent(capture, locals.K_x, True, 20 * MS)
+    
+    # Events after the boundary wait for the next step
+    assert capture.buildInputs(0, 16 * MS, 25 * MS)["P1"].bits == Button.PUNCH.bit
+    assert capture.buildInputs(1, 33 * MS, 25 * MS)["P1"].bits == Button.PUNCH.bit | Button.KICK.bit
+    
+    
+def test_buildInputs_socdAndMacros():
+    capture = InputCapture()
+    keyEvent(capture, locals.K_7, True, 1 * MS)
+    keyEvent(capture, locals.K_9, True, 2 * MS)
+    keyEvent(capture, locals.K_g, True, 3 * MS)
+    
+    assert capture.buildInputs(0, 16 * MS, 16 * MS)["P1"].bits == Button.MACRO_PK.bit | Button.PUNCH.bit | Button.KICK.bit
+    
+    
+def test_latencyStats():
+    capture = InputCapture(latency_capacity=2)
+    assert capture.getLatencyStats() == {"mean": 0.0, "max": 0.0}
+    
+    keyEvent(capture, locals.K_z, True, 10 * MS)
+    keyEvent(capture, locals.K_z, False, 14 * MS)
+    capture.buildInputs(0, 16 * MS, 16 * MS)
+    assert capture.getLatencyStats() == {"mean": 4.0, "max": 6.0}
+    
+    
+def test_otherEvents():
+    capture = InputCapture()
+    capture.addEvent(pg.event.Event(pg.QUIT), 0)
+    keyEvent(capture, locals.K_F8, True, 0)
+    keyEvent(capture, locals.K_F8, False, 0)
+    
+    # Key presses are still available for hotkeys
+    events = capture.takeOtherEvents()
+    assert [event.type for event in events] == [pg.QUIT, pg.KEYDOWN]
+    assert capture.takeOtherEvents() == []
+    # Unbound keys don't affect any player's Input
+    assert capture.buildInputs(0, 0, 0)["P1"].bits == 0
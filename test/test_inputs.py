@@ -137,3 +137,154 @@ def test_inputHistory_getFrameButtons():
         ih.getFrameButtons(50)
     with pytest.raises(IndexError, match="Frame number 100 >= latest input end frame 50"):
         ih.getFrameButtons(100)
+
+
+def test_input_bits():
+    buttons = create_buttons_dict([Button.LEFT, Button.PUNCH, Button.MACRO_PK])
+    input = inputs.Input(buttons, 0, 1)
+    
+    assert input.bits == Button.LEFT.bit | Button.PUNCH.bit | Button.MACRO_PK.bit
+    # dict API is still available as a view over the bits
+    assert input.buttons == buttons
+    assert input.buttons[Button.PUNCH]
+    assert not input.buttons[Button.KICK]
+    # Inputs built from dicts and from bitmasks are interchangeable
+    assert input == inputs.Input(input.bits, 0, 1)
+    assert input != inputs.Input(input.bits, 0, 2)
+
+
+cleanSocdBits_testcases = [
+    (Button.LEFT.bit | Button.RIGHT.bit | Button.DOWN.bit, Button.DOWN.bit),
+    (Button.LEFT.bit | Button.UP.bit | Button.DOWN.bit, Button.LEFT.bit),
+    (Button.LEFT.bit | Button.RIGHT.bit | Button.UP.bit | Button.DOWN.bit | Button.PUNCH.bit, Button.PUNCH.bit),
+    (Button.RIGHT.bit | Button.UP.bit, Button.RIGHT.bit | Button.UP.bit)
+]
+
+@pytest.mark.parametrize("test_input, expected", cleanSocdBits_testcases)
+def test_cleanSocdBits(test_input, expected):
+    assert inputs.cleanSocdBits(test_input) == expected
+
+
+def test_expandMacroBits():
+    expected = Button.MACRO_PD.bit | Button.PUNCH.bit | Button.DUST.bit
+    assert inputs.expandMacroBits(Button.MACRO_PD.bit) == expected
+    assert inputs.expandMacroBits(Button.KICK.bit) == Button.KICK.bit
+
+
+def test_inputHistory_maxInputs():
+    ih = inputs.InputHistory("P1", max_inputs=4)
+    buttons = [Button.PUNCH, Button.KICK]
+    for frame in range(10):
+        ih.append(inputs.Input(create_buttons_dict([buttons[frame % 2]]), frame, frame + 1))
+    
+    # Only the newest 4 inputs are kept, oldest first
+    assert len(ih.inputs) == 4
+    assert [input.start_frame for input in ih.inputs] == [6, 7, 8, 9]
+    assert [input.start_frame for input in reversed(ih.inputs)] == [9, 8, 7, 6]
+    assert ih.inputs[0].start_frame == 6
+    assert ih.inputs[-1].start_frame == 9
+    
+    # Lookups keep working after the buffer has wrapped around
+    for frame in range(6, 10):
+        assert ih.getFrameBits(frame) == buttons[frame % 2].bit
+    with pytest.raises(IndexError, match="Frame number 5 < earliest input start frame 6"):
+        ih.getFrameBits(5)
+    with pytest.raises(IndexError):
+        ih.inputs[4]
+
+
+def test_inputHistory_saveState_loadState():
+    ih = inputs.InputHistory("P1", max_inputs=3)
+    ih.append(inputs.Input(Button.PUNCH.bit, 0, 1))
+    ih.append(inputs.Input(Button.KICK.bit, 1, 2))
+    snapshot = ih.saveState()
+    
+    # extend the newest input, then wrap around the buffer
+    ih.append(inputs.Input(Button.KICK.bit, 2, 3))
+    for frame in range(3, 6):
+        ih.append(inputs.Input(frame, frame, frame + 1))
+    
+    ih.loadState(snapshot)
+    assert list(ih.inputs) == [inputs.Input(Button.PUNCH.bit, 0, 1), inputs.Input(Button.KICK.bit, 1, 2)]
+    assert ih.getFrameBits(1) == Button.KICK.bit
+
+
+# 4 local players, each with one key per Button
+four_player_keybinds = {}
+for (index, player) in enumerate(["P1", "P2", "P3", "P4"]):
+    four_player_keybinds[player] = {}
+    for (offset, button) in enumerate(Button):
+        four_player_keybinds[player][index * 20 + offset] = button
+
+@mock.patch.object(inputs, "keybinds", four_player_keybinds)
+@mock.patch.object(key, "get_pressed")
+def test_keysPressedToInputs(mock_key_get_pressed):
+    buttons = list(Button)
+    pressed_keys = [
+        buttons.index(Button.PUNCH),                                        # P1
+        20 + buttons.index(Button.LEFT), 20 + buttons.index(Button.RIGHT),  # P2, SOCD
+        40 + buttons.index(Button.MACRO_PK), 40 + buttons.index(Button.UP)  # P3
+    ]
+    mock_key_get_pressed.return_value = create_key_mock(pressed_keys)
+    
+    output = inputs.keysPressedToInputs(7)
+    assert output == {
+        "P1": inputs.Input(Button.PUNCH.bit, 7, 8),
+        "P2": inputs.Input(0, 7, 8),
+        "P3": inputs.Input(Button.MACRO_PK.bit | Button.PUNCH.bit | Button.KICK.bit | Button.UP.bit, 7, 8),
+        "P4": inputs.Input(0, 7, 8)
+    }
+
+
+@mock.patch.object(inputs, "keybinds", {"P1": {locals.K_z: Button.PUNCH}})
+@mock.patch.object(key, "get_pressed")
+def test_bindKey_rebuildsInputTable(mock_key_get_pressed):
+    mock_key_get_pressed.return_value = create_key_mock([locals.K_x])
+    assert inputs.keysPressedToInput(0, "P1").bits == 0
+    
+    inputs.bindKey("P1", locals.K_x, Button.KICK)
+    assert inputs.keysPressedToInput(0, "P1").bits == Button.KICK.bit
+    
+    inputs.unbindKey("P1", locals.K_x)
+    assert inputs.keysPressedToInput(0, "P1").bits == 0
+
+
+def test_inputDisplay_incremental():
+    ih = inputs.InputHistory("P1", max_inputs=4)
+    display = inputs.InputDisplay(ih, rows=6)
+    with mock.patch.object(display, "renderText", wraps=display.renderText) as renderText:
+        for frame in range(20):
+            ih.append(inputs.Input(Button.PUNCH.bit if frame % 4 < 2 else 0, frame, frame + 1))
+            (newest, older) = (display.newestVersion, display.olderVersion)
+            display.update()
+            # Holding only redraws the newest row; a new Input scrolls the older ones
+            assert display.newestVersion == newest + 1
+            assert display.olderVersion == (older + 1 if frame % 2 == 0 else older)
+            assert display.newestLength == frame % 2 + 1
+        
+        # Text is only rendered once per button bitmask, not per frame
+        assert renderText.call_count == 2
+    
+    # Nothing changed, nothing redrawn
+    display.update()
+    assert display.newestVersion == newest + 1
+    # 10 Inputs were shown, more than the InputHistory keeps, but only the newest rows fit
+    assert display.surface.get_height() == 6 * inputs.ROW_HEIGHT
+    
+    
+def test_inputDisplay_loadState():
+    ih = inputs.InputHistory("P1")
+    display = inputs.InputDisplay(ih)
+    ih.append(inputs.Input(Button.PUNCH.bit, 0, 1))
+    snapshot = ih.saveState()
+    ih.append(inputs.Input(Button.KICK.bit, 1, 2))
+    display.update()
+    
+    ih.loadState(snapshot)
+    ih.append(inputs.Input(Button.SLASH.bit, 1, 2))
+    display.update()
+    # The mispredicted KICK row is gone
+    assert display.newest is ih.inputs[-1]
+    expected = inputs.InputDisplay(ih)
+    expected.update()
+    assert bytes(display.surface.get_buffer()) == bytes(expected.surface.get_buffer())
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+import pytest
+
+import character_data
+import constants
+import loading
+from asset_manager import assetManager
+
+
+def test_backgroundLoader():
+    order = []
+    loader = loading.BackgroundLoader([("first", lambda: order.append(1)), ("second", lambda: order.append(2))])
+    assert loader.getProgress() == 0.0
+    assert loader.getDescription() == "first"
+    
+    loader.start().join()
+    assert loader.isDone()
+    assert order == [1, 2]
+    assert loader.getProgress() == 1.0
+    assert loader.getDescription() == ""
+    
+    
+def test_backgroundLoader_error():
+    def fail():
+        raise ValueError("missing asset")
+    loader = loading.BackgroundLoader([("fail", fail), ("never run", lambda: pytest.fail())]).start()
+    
+    with pytest.raises(ValueError, match="missing asset"):
+        loader.join()
+    assert loader.completed == 0
+    
+    
+def test_getStartupTasks():
+    loading.BackgroundLoader(loading.getStartupTasks([constants.DEFAULT_CHARACTER] * 2)).start().join()
+    
+    sprite = character_data.getCharacterData(constants.DEFAULT_CHARACTER).sprite
+    assert sprite in assetManager.preloadedImages or sprite in assetManager.images
+    
+    
+def test_importMain_noSideEffects():
+    # Nothing is initialized, and no window is created, until main.main() is called
+    code = "import main, pygame; assert not pygame.display.get_init(); assert not pygame.font.get_init()"
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
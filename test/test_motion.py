@@ -0,0 +1,116 @@
+import pytest
+
+import motion
+from inputs import Button
+from motion import MotionCommand, MotionRecognizer
+
+L = Button.LEFT.bit
+R = Button.RIGHT.bit
+D = Button.DOWN.bit
+U = Button.UP.bit
+P = Button.PUNCH.bit
+K = Button.KICK.bit
+
+
+def feed(recognizer, frames, facingLeft=False, start_frame=0):
+    '''
+    Takes a list of (bitmask, frame count), and returns [(frame, command name)] for every command completed.
+    '''
+    completed = []
+    frame = start_frame
+    for (bits, count) in frames:
+        for _ in range(count):
+            for command in recognizer.update(bits, frame, facingLeft):
+                completed.append((frame, command.name))
+            frame = frame + 1
+    return completed
+
+
+def test_motionCommand_parse():
+    command = MotionCommand("Sonic Boom", "[4]6PK")
+    assert command.charge == 4
+    assert command.directions == [6]
+    assert command.buttons == P | K
+    
+    assert MotionCommand("Fireball", "↓↘→P").directions == [2, 3, 6]
+    with pytest.raises(ValueError):
+        MotionCommand("Bad", "236X")
+    with pytest.raises(ValueError):
+        MotionCommand("Bad", "P")
+        
+
+def test_directionsToNumpad():
+    assert motion.directionsToNumpad(D | R, False) == 3
+    assert motion.directionsToNumpad(D | R, True) == 1
+    assert motion.directionsToNumpad(U | L | P, False) == 7
+    assert motion.directionsToNumpad(0, True) == 5
+
+
+def test_quarterCircle():
+    recognizer = MotionRecognizer([MotionCommand("Fireball", "236P")])
+    assert feed(recognizer, [(D, 3), (D | R, 2), (R, 2), (R | P, 1)]) == [(7, "Fireball")]
+    
+    # Mirrored when facing left
+    recognizer = MotionRecognizer([MotionCommand("Fireball", "236P")])
+    assert feed(recognizer, [(D, 3), (D | L, 2), (L | P, 1)], facingLeft=True) == [(5, "Fireball")]
+    
+    
+def test_leniency():
+    recognizer = MotionRecognizer([MotionCommand("Fireball", "236P", window=5, buffer=3)])
+    # Extra directions in between are fine
+    assert feed(recognizer, [(D, 2), (D | L, 1), (D | R, 1), (R, 3), (P, 1)]) == [(7, "Fireball")]
+    
+    # Too slow between directions
+    assert feed(recognizer, [(0, 1), (D, 10), (D | R, 1), (R, 1), (R | P, 1)], start_frame=100) == []
+    
+    # Pressing the button too late after the motion
+    assert feed(recognizer, [(0, 1), (D, 1), (D | R, 1), (R, 5), (R | P, 1)], start_frame=200) == []
+    
+
+def test_priority():
+    recognizer = MotionRecognizer([MotionCommand("Fireball", "236P"), MotionCommand("Dragon Punch", "623P")])
+    # 6 3 2 3 + P only completes the dragon punch
+    assert feed(recognizer, [(R, 1), (D | R, 1), (D, 1), (D | R, 1), (D | R | P, 1)]) == [(4, "Dragon Punch")]
+    
+    recognizer = MotionRecognizer([MotionCommand("Fireball", "236P"), MotionCommand("Dragon Punch", "623P")])
+    # 2 3 6 2 3 + P completes both, the most recently completed motion (dragon punch) first
+    completed = feed(recognizer, [(D, 1), (D | R, 1), (R, 1), (D, 1), (D | R, 1), (D | R | P, 1)])
+    assert completed == [(5, "Dragon Punch"), (5, "Fireball")]
+
+
+def test_charge():
+    commands = [MotionCommand("Sonic Boom", "[4]6P", charge_frames=30)]
+    recognizer = MotionRecognizer(commands)
+    assert feed(recognizer, [(L, 30), (R, 2), (R | P, 1)]) == [(32, "Sonic Boom")]
+    
+    # Not charged for long enough
+    recognizer = MotionRecognizer(commands)
+    assert feed(recognizer, [(L, 29), (R | P, 1)]) == []
+    
+    # Down-back counts as back
+    recognizer = MotionRecognizer(commands)
+    assert feed(recognizer, [(L, 15), (D | L, 15), (R | P, 1)]) == [(30, "Sonic Boom")]
+    
+
+def test_doubleTap():
+    recognizer = MotionRecognizer([MotionCommand("Forward Dash", "66", window=8)])
+    assert feed(recognizer, [(R, 3), (0, 2), (R, 10)]) == [(5, "Forward Dash")]
+    # Holding forward is not a dash
+    assert feed(recognizer, [(0, 20), (R, 30)], start_frame=100) == []
+    # Nor is rolling through down-forward without returning to neutral
+    assert feed(recognizer, [(0, 20), (R, 3), (D | R, 2), (R, 10)], start_frame=200) == []
+
+
+def test_saveState_loadState():
+    recognizer = MotionRecognizer([MotionCommand("Fireball", "236P")])
+    feed(recognizer, [(D, 1), (D | R, 1)])
+    state = recognizer.saveState()
+    
+    assert feed(recognizer, [(R | P, 1)], start_frame=2) == [(2, "Fireball")]
+    recognizer.loadState(state)
+    assert feed(recognizer, [(P, 1)], start_frame=2) == []
+    recognizer.loadState(state)
+    assert feed(recognizer, [(R, 1), (R | P, 1)], start_frame=2) == [(3, "Fireball")]
+    # Saving into an existing state reuses it
+    assert recognizer.saveState(state) is state
+    assert state.active == recognizer.active and state.active is not recognizer.active
@@ -0,0 +1,75 @@
+import csv
+import json
+
+from profiler import Profiler
+
+
+def recordFrames(profiler, frames):
+    for _ in range(frames):
+        profiler.beginFrame()
+        profiler.begin("update")
+        profiler.end("update")
+        profiler.begin("render")
+        profiler.end("render")
+        profiler.begin("update")
+        profiler.end("update")
+    profiler.beginFrame()
+
+
+def test_profiler_disabledRecordsNothing():
+    profiler = Profiler()
+    recordFrames(profiler, 3)
+    assert profiler.frame_count == 0
+    assert profiler.sections == {}
+
+
+def test_profiler_ringBuffer():
+    profiler = Profiler(capacity=4, enabled=True)
+    recordFrames(profiler, 10)
+    
+    assert list(profiler.completedFrames()) == [7, 8, 9]
+    assert list(profiler.sections) == ["update", "render"]
+    for frame_number in profiler.completedFrames():
+        frame = profiler.getFrame(frame_number)
+        assert frame["frame"] >= frame["update"] + frame["render"] > 0
+    # Every frame took longer than 0 ms
+    assert profiler.slowFrames(deadline=0) == [7, 8, 9]
+    
+
+def test_profiler_export(tmp_path):
+    profiler = Profiler(enabled=True)
+    recordFrames(profiler, 5)
+    
+    profiler.exportCsv(tmp_path / "profile.csv")
+    with open(tmp_path / "profile.csv", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["frame_number", "frame", "update", "render"]
+    assert [row[0] for row in rows[1:]] == ["0", "1", "2", "3", "4"]
+    
+    profiler.exportJson(tmp_path / "profile.json")
+    with open(tmp_path / "profile.json") as file:
+        data = json.load(file)
+    assert data["sections"] == ["update", "render"]
+    assert len(data["frames"]) == 5
+    assert set(data["frames"][0]) == {"frame_number", "frame", "update", "render"}
+
+
+def test_profiler_peaks(tmp_path):
+    profiler = Profiler(enabled=True)
+    profiler.beginFrame()
+    profiler.recordPeak("input_latency", 2_000_000)
+    profiler.recordPeak("input_latency", 5_000_000)
+    profiler.recordPeak("input_latency", 1_000_000)
+    profiler.beginFrame()
+    profiler.beginFrame()
+    
+    assert profiler.getFrame(0)["input_latency"] == 5.0
+    # Reset every frame
+    assert profiler.getFrame(1)["input_latency"] == 0.0
+    # Exported, but not a section
+    assert profiler.sections == {}
+    profiler.exportJson(tmp_path / "profile.json")
+    with open(tmp_path / "profile.json") as file:
+        data = json.load(file)
+    assert data["peaks"] == ["input_latency"]
+    assert data["frames"][0]["input_latency"] == 5.0
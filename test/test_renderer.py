@@ -0,0 +1,100 @@
+import os
+
+import pygame as pg
+import pytest
+
+# Render to an offscreen dummy display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import constants
+import inputs
+from fps_counter import FpsCounter
+from gamestate import GameState
+from inputs import Button
+from profiler import profiler
+from renderer import DirtyRectRenderer, ProfilerSprite, WorldRectsSprite, HUD_LAYER
+
+from .helpers import stepFrame
+
+
+@pytest.fixture
+def window():
+    pg.display.init()
+    pg.font.init()
+    window = pg.display.set_mode((constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT))
+    yield window
+    pg.display.quit()
+
+
+def fullRender(gameState, inputHistories, fpsCounter):
+    '''
+    Renders everything to a new Surface the way main.py used to.
+    '''
+    surface = pg.Surface((constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT))
+    surface.fill(constants.BLACK)
+    gameState.render(surface)
+    fpsCounter.render(surface)
+    if constants.SHOW_INPUT_HISTORY:
+        for inputHistory in inputHistories.values():
+            inputHistory.render(surface)
+    return surface
+
+
+def test_dirtyRectRenderer(window):
+    inputHistories = {player: inputs.InputHistory(player) for player in ("P1", "P2")}
+    gameState = GameState(inputHistories)
+    fpsCounter = FpsCounter()
+    renderer = DirtyRectRenderer(window, gameState, fpsCounter, inputHistories)
+    # Don't let a slow test machine switch LayeredDirty over to full screen updates
+    renderer.sprites.set_timing_threshold(float("inf"))
+    
+    stepFrame(gameState, {})
+    assert renderer.render() == [window.get_rect()]
+    
+    # Nothing changes while both players stay neutral except the neutral input's frame count
+    stepFrame(gameState, {})
+    rects = renderer.render()
+    assert len(rects) > 0
+    assert all(rect.height < constants.WINDOW_HEIGHT for rect in rects)
+    
+    # Walking back moves P1 and drains their HP bar
+    for _ in range(5):
+        stepFrame(gameState, {"P1": Button.LEFT.bit})
+        renderer.render()
+    
+    expected = fullRender(gameState, inputHistories, fpsCounter)
+    for x in range(0, constants.WINDOW_WIDTH, 4):
+        for y in range(0, constants.WINDOW_HEIGHT, 4):
+            assert window.get_at((x, y)) == expected.get_at((x, y)), (x, y)
+
+
+def test_profilerOverlay(window, monkeypatch):
+    monkeypatch.setattr(constants, "SHOW_PROFILER", True)
+    inputHistories = {player: inputs.InputHistory(player) for player in ("P1", "P2")}
+    gameState = GameState(inputHistories)
+    renderer = DirtyRectRenderer(window, gameState, FpsCounter(), inputHistories)
+    renderer.sprites.set_timing_threshold(float("inf"))
+    monkeypatch.setattr(profiler, "enabled", True)
+    profiler.clear()
+    
+    for _ in range(5):
+        profiler.beginFrame()
+        stepFrame(gameState, {})
+        renderer.render()
+    
+    assert {"P1 update", "P2 update", "render", "display"} <= set(profiler.sections)
+    profilerSprite = next(sprite for sprite in renderer.sprites if isinstance(sprite, ProfilerSprite))
+    assert profilerSprite.visible
+    assert profilerSprite.graphFrame == 3
+    assert profilerSprite.rect.bottomright == (constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT)
+    profiler.clear()
+
+
+def test_sprite_abstract():
+    class UndrawnSprite(WorldRectsSprite):
+        def getState(self):
+            return ()
+
+    # Missing draw(), so it can't be created
+    with pytest.raises(TypeError):
+        UndrawnSprite(HUD_LAYER)
@@ -0,0 +1,106 @@
+import pygame as pg
+import pytest
+from pygame import locals
+
+import inputs
+import replay
+import simulation
+from input_capture import InputCapture
+
+from .helpers import characterValues, randomScripts
+
+
+def recordMatch(path, frames, seed=5, checksum_interval=10):
+    scripts = randomScripts(frames, seed)
+    gameState = simulation.createHeadlessGame()
+    recorder = replay.ReplayRecorder(open(path, "wb"), gameState, checksum_interval)
+    for frame in range(frames):
+        for (player, inputHistory) in gameState.inputHistories.items():
+            inputHistory.append(inputs.Input(scripts[player][frame], frame, frame + 1))
+        gameState.update()
+        recorder.record()
+    recorder.close()
+    return gameState
+
+
+def test_replay_playsBackMatch(tmp_path):
+    path = tmp_path / "match.fgrp"
+    recorded = recordMatch(path, 300)
+
+    with replay.ReplayReader(path) as reader:
+        assert reader.player_count == 2
+        assert reader.checksum_interval == 10
+        # Held inputs take one record each, so far fewer records than frames per player
+        assert reader.recordCount() < 300
+        gameState = simulation.createHeadlessGame()
+        player = replay.ReplayPlayer(reader, gameState)
+        assert player.run() == 300
+        assert not player.desyncDetector.isDesynced()
+        assert player.desyncDetector.compared == 30
+
+    assert gameState.current_frame == recorded.current_frame
+    assert characterValues(gameState) == characterValues(recorded)
+    assert gameState.checksum() == recorded.checksum()
+
+
+def test_replay_detectsDesync(tmp_path):
+    path = tmp_path / "match.fgrp"
+    recordMatch(path, 100)
+
+    # Corrupt the value of the first checksum record
+    data = bytearray(path.read_bytes())
+    with replay.ReplayReader(path) as reader:
+        index = next(i for (i, record) in enumerate(reader.iterRecords()) if record[0] == replay.RECORD_CHECKSUM)
+        frame = reader.getRecord(index)[4]
+    offset = replay.HEADER.size + index * replay.RECORD.size + 12
+    data[offset:offset + 4] = bytes(4 - i for i in range(4))
+    path.write_bytes(bytes(data))
+
+    with replay.ReplayReader(path) as reader:
+        player = replay.ReplayPlayer(reader, simulation.createHeadlessGame())
+        player.run()
+        assert player.desyncDetector.first_desync_frame == frame
+        assert len(player.desyncDetector.desyncs) == 1
+
+
+def test_replayReader_findFrame(tmp_path):
+    path = tmp_path / "match.fgrp"
+    recordMatch(path, 200)
+
+    with replay.ReplayReader(path) as reader:
+        index = reader.findFrame(150)
+        records = list(reader.iterRecords())
+        assert all(record[4] <= 150 for record in records[:index])
+        assert all(record[4] > 150 for record in records[index:])
+        assert list(reader.iterRecords(index)) == records[index:]
+
+
+def test_replayReader_rejectsOtherFiles(tmp_path):
+    path = tmp_path / "not_a_replay"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(replay.ReplayError):
+        replay.ReplayReader(path)
+
+
+def test_replayRecorder_latencies(tmp_path):
+    path = tmp_path / "match.fgrp"
+    capture = InputCapture(latency_capacity=4)
+    gameState = simulation.createHeadlessGame()
+    recorder = replay.ReplayRecorder(open(path, "wb"), gameState, 10, inputCapture=capture)
+    for frame in range(20):
+        if frame % 5 == 0:
+            capture.addEvent(pg.event.Event(pg.KEYDOWN, key=locals.K_z), frame * 1_000_000)
+        frame_inputs = capture.buildInputs(frame, frame * 1_000_000 + 500_000, frame * 1_000_000 + 2_000_000)
+        for (player, inputHistory) in gameState.inputHistories.items():
+            inputHistory.append(frame_inputs[player])
+        gameState.update()
+        recorder.record()
+    recorder.close()
+
+    with replay.ReplayReader(path) as reader:
+        records = [record for record in reader.iterRecords() if record[0] == replay.RECORD_LATENCY]
+        assert [(record[4], record[5]) for record in records] == [(frame + 1, 2000) for frame in range(0, 20, 5)]
+        # Playback ignores them
+        player = replay.ReplayPlayer(reader, simulation.createHeadlessGame())
+        assert player.run() == 20
+        assert not player.desyncDetector.isDesynced()
@@ -0,0 +1,53 @@
+import random
+
+import rollback
+import simulation
+from transport import LoopbackTransport
+
+from .helpers import characterValues
+
+
+def test_loopbackTransport():
+    now = 0.0
+    (first, second) = LoopbackTransport.pair(delay=0.1, clock=lambda: now)
+    first.send(b"hello")
+    
+    assert second.receive() == []
+    now = 0.1
+    assert second.receive() == [b"hello"]
+    assert second.receive() == []
+    assert first.receive() == []
+
+
+def test_loopbackTransport_loss():
+    (first, second) = LoopbackTransport.pair(loss=1.0)
+    first.send(b"hello")
+    assert second.receive() == []
+
+
+def test_rollbackSession_staysInSync():
+    rng = random.Random(4)
+    # Neutral inputs at the end, so every real input is confirmed (and correctly predicted) by both sides
+    scripts = {player: simulation.randomScript(rng, 300) + [0] * 60 for player in simulation.PLAYERS}
+    (p1_session, p2_session) = rollback.runLoopbackMatch(scripts, delay=0.05, jitter=0.03, loss=0.1, seed=4)
+    
+    assert p1_session.rollbacks > 0
+    assert p2_session.rollbacks > 0
+    assert p1_session.gameState.current_frame == p2_session.gameState.current_frame == 360
+    assert characterValues(p1_session.gameState) == characterValues(p2_session.gameState)
+    for session in (p1_session, p2_session):
+        assert session.desyncDetector.compared > 0
+        assert not session.desyncDetector.isDesynced()
+    
+    # Rolling back gives the same result as never needing to
+    expected = simulation.runMatch(scripts)
+    assert [c.hp for c in p1_session.gameState.characters.values()] == list(expected.hp.values())
+
+
+def test_rollbackSession_stallsWithoutRemoteInputs():
+    (local, _) = LoopbackTransport.pair()
+    session = rollback.RollbackSession(simulation.createHeadlessGame(), "P1", local, max_rollback=3)
+    
+    advanced = [session.advanceFrame(0) for _ in range(5)]
+    assert advanced == [True, True, True, False, False]
+    assert session.stalls == 2
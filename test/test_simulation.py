@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+import simulation
+from inputs import Button
+
+
+def test_runMatch_headless():
+    # P1 faces right, so holding LEFT walks backwards (and loses HP, for now)
+    result = simulation.runMatch({"P1": [Button.LEFT.bit] * 10})
+    
+    assert result.frames == 10
+    assert result.hp == {"P1": 190, "P2": 200}
+    assert result.winner() == "P2"
+    assert result.round_timer == pytest.approx(99.0 - 10 / 60)
+    
+
+def test_runMatch_stopsWhenRoundOver():
+    result = simulation.runMatch({"P2": [Button.RIGHT.bit] * 1000})
+    
+    assert result.hp["P2"] == 0
+    # P2 only starts facing left after its first update
+    assert result.frames == 201
+
+
+def test_runBatch_deterministic():
+    matches = list(simulation.randomMatches(5, 300, seed=1))
+    first = [(result.frames, result.hp) for result in simulation.runBatch(matches)]
+    second = [(result.frames, result.hp) for result in simulation.runBatch(matches)]
+    
+    assert first == second
+    assert [result.match_id for result in simulation.runBatch(matches)] == [0, 1, 2, 3, 4]
+
+
+def test_randomScript():
+    script = simulation.randomScript(random.Random(0), 100)
+    
+    assert len(script) == 100
+    for bits in script:
+        assert not (bits & Button.LEFT.bit and bits & Button.RIGHT.bit)
+
+
+def test_encodeScript():
+    script = [0, 0, 0, Button.PUNCH.bit, Button.PUNCH.bit, 0]
+    data = simulation.encodeScript(script)
+    
+    # 3 spans of (bits, frame count) uint32 pairs
+    assert len(data) == 3 * 2 * 4
+    assert simulation.decodeScript(data) == script
+    assert simulation.decodeScript(simulation.encodeScript([])) == []
+
+
+def test_runBatchParallel():
+    matches = list(simulation.randomMatches(6, 120, seed=2))
+    serial = {result.match_id: result for result in simulation.runBatch(matches, record_frames=True)}
+    parallel = list(simulation.runBatchParallel(matches, record_frames=True, workers=2, chunksize=1))
+    
+    assert sorted(result.match_id for result in parallel) == list(range(6))
+    for result in parallel:
+        expected = serial[result.match_id]
+        assert (result.frames, result.hp) == (expected.frames, expected.hp)
+        assert result.frame_stats.hp == expected.frame_stats.hp
+        assert len(result.frame_stats.xpos["P1"]) == result.frames
@@ -0,0 +1,109 @@
+import asyncio
+import random
+
+import simulation
+import spectator
+from inputs import Button
+from spectator import SpectatorBroadcaster, SpectatorServer, SpectatorViewer
+
+from .helpers import randomScripts, stepFrames
+    
+
+def test_keyframe_roundTrip():
+    scripts = randomScripts(400)
+    host = simulation.createHeadlessGame()
+    for _ in range(200):
+        stepFrames(host, scripts, 1)
+    
+    viewer = simulation.createHeadlessGame()
+    spectator.loadKeyframe(viewer, spectator.encodeKeyframe(host))
+    assert viewer.current_frame == 200
+    assert viewer.checksum() == host.checksum()
+    # Motion recognizer progress (not in the checksum) carries over too, so both stay in sync
+    for _ in range(200):
+        stepFrames(host, scripts, 1)
+        stepFrames(viewer, scripts, 1)
+        assert viewer.checksum() == host.checksum()
+        
+
+def test_keyframe_projectile():
+    fireball = [Button.DOWN.bit, Button.DOWN.bit | Button.RIGHT.bit, Button.RIGHT.bit | Button.PUNCH.bit]
+    scripts = {"P1": fireball + [0] * 100, "P2": [0] * 103}
+    host = simulation.createHeadlessGame()
+    for _ in range(20):
+        stepFrames(host, scripts, 1)
+    assert len(host.projectiles) == 1
+    
+    viewer = simulation.createHeadlessGame()
+    spectator.loadKeyframe(viewer, spectator.encodeKeyframe(host))
+    assert len(viewer.projectiles) == 1
+    assert viewer.checksum() == host.checksum()
+        
+
+class FakeServer():
+    def __init__(self):
+        self.data = bytearray()
+        
+    def publish(self, data, header=False, keyframe=False):
+        self.data += data
+        
+        
+def test_viewer_feedInChunks():
+    scripts = randomScripts(300, seed=1)
+    host = simulation.createHeadlessGame()
+    server = FakeServer()
+    broadcaster = SpectatorBroadcaster(host, server, checksum_interval=10, keyframe_interval=100)
+    for _ in range(300):
+        stepFrames(host, scripts, 1)
+        broadcaster.record()
+        
+    viewer = SpectatorViewer(simulation.createHeadlessGame())
+    rng = random.Random(0)
+    data = bytes(server.data)
+    position = 0
+    while position < len(data):
+        size = rng.randrange(1, 200)
+        viewer.feed(data[position:position + size])
+        position = position + size
+    
+    assert viewer.gameState.current_frame == 300
+    assert viewer.gameState.checksum() == host.checksum()
+    assert viewer.keyframes == 4
+    assert viewer.desyncDetector.compared == 30
+    assert not viewer.desyncDetector.isDesynced()
+    
+    
+def test_server_lateJoiners():
+    scripts = randomScripts(600, seed=2)
+    host = simulation.createHeadlessGame()
+    server = SpectatorServer(port=0).start()
+    (address, port) = server.address
+    broadcaster = SpectatorBroadcaster(host, server, checksum_interval=30, keyframe_interval=100)
+    
+    async def waitForViewers(count):
+        while server.viewerCount() < count:
+            await asyncio.sleep(0.01)
+    
+    async def scenario():
+        early = [asyncio.create_task(spectator.watch(address, port, simulation.createHeadlessGame())) for _ in range(3)]
+        await waitForViewers(3)
+        for _ in range(350):
+            stepFrames(host, scripts, 1)
+            broadcaster.record()
+        late = asyncio.create_task(spectator.watch(address, port, simulation.createHeadlessGame()))
+        await waitForViewers(4)
+        for _ in range(250):
+            stepFrames(host, scripts, 1)
+            broadcaster.record()
+        await asyncio.to_thread(server.close)
+        return (await asyncio.gather(*early), await late)
+    
+    (early, late) = asyncio.run(scenario())
+    for viewer in early + [late]:
+        assert viewer.gameState.current_frame == 600
+        assert viewer.gameState.checksum() == host.checksum()
+        assert not viewer.desyncDetector.isDesynced()
+    assert [viewer.start_frame for viewer in early] == [0, 0, 0]
+    # Caught up from the latest keyframe, not the start of the match
+    assert late.start_frame == 300
+    assert late.desyncDetector.compared > 0
@@ -0,0 +1,103 @@
+'''
+Packet transports for netcode (see rollback.py).
+
+Every transport has the same interface:
+- send(data: bytes) sends one packet to the peer, without blocking.
+- receive() -> list[bytes] returns every packet that has arrived since the last call, without blocking.
+- close()
+
+Like UDP, packets may be lost, duplicated or reordered; the netcode on top has to cope with that.
+'''
+from __future__ import annotations
+import heapq
+import random
+import socket
+import time
+from typing import Callable
+
+# Large enough for any packet rollback.py sends
+MAX_PACKET_SIZE = 1024
+
+class UdpTransport():
+    '''
+    Transport over a non-blocking UDP socket.
+    Packets from any address other than remote_address are ignored.
+    '''
+    def __init__(self, local_address: tuple[str, int], remote_address: tuple[str, int]) -> None:
+        self.remote_address = remote_address
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(local_address)
+        self.socket.setblocking(False)
+
+    def send(self, data: bytes) -> None:
+        try:
+            self.socket.sendto(data, self.remote_address)
+        except (BlockingIOError, ConnectionRefusedError):
+            # Same as the packet being lost on the way
+            pass
+
+    def receive(self) -> list[bytes]:
+        packets = []
+        while True:
+            try:
+                (data, address) = self.socket.recvfrom(MAX_PACKET_SIZE)
+            except (BlockingIOError, ConnectionResetError):
+                # ConnectionResetError: on Windows, an ICMP port unreachable from an earlier send
+                break
+            if address == self.remote_address:
+                packets.append(data)
+        return packets
+
+    def close(self) -> None:
+        self.socket.close()
+
+class LoopbackTransport():
+    '''
+    In-process transport for testing netcode on one machine.
+    Each packet is delayed by delay seconds plus up to jitter seconds (so packets can arrive out of order),
+    and dropped with probability loss.
+
+    clock can be replaced to run on simulated time instead of time.perf_counter().
+    Create connected transports with LoopbackTransport.pair().
+    '''
+    def __init__(self, delay: float = 0.0, jitter: float = 0.0, loss: float = 0.0, seed: int | None = None,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        self.delay = delay
+        self.jitter = jitter
+        self.loss = loss
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.peer: LoopbackTransport | None = None
+        # heap of (delivery time, send order, data)
+        self.queue: list[tuple[float, int, bytes]] = []
+        self.sent_count = 0
+
+    @staticmethod
+    def pair(delay: float = 0.0, jitter: float = 0.0, loss: float = 0.0, seed: int | None = None,
+             clock: Callable[[], float] = time.perf_counter) -> tuple[LoopbackTransport, LoopbackTransport]:
+        '''
+        Returns two LoopbackTransports connected to each other, with the same conditions in both directions.
+        '''
+        rng = random.Random(seed)
+        first = LoopbackTransport(delay, jitter, loss, rng.randrange(2 ** 32), clock)
+        second = LoopbackTransport(delay, jitter, loss, rng.randrange(2 ** 32), clock)
+        first.peer = second
+        second.peer = first
+        return (first, second)
+
+    def send(self, data: bytes) -> None:
+        self.sent_count = self.sent_count + 1
+        if self.peer is None or self.rng.random() < self.loss:
+            return
+        delivery_time = self.clock() + self.delay + self.rng.uniform(0.0, self.jitter)
+        heapq.heappush(self.peer.queue, (delivery_time, self.sent_count, data))
+
+    def receive(self) -> list[bytes]:
+        now = self.clock()
+        packets = []
+        while len(self.queue) > 0 and self.queue[0][0] <= now:
+            packets.append(heapq.heappop(self.queue)[2])
+        return packets
+
+    def close(self) -> None:
+        self.peer = None